@@ -0,0 +1,116 @@
+import asyncio
+import random
+import typing
+
+import pytest
+
+import cablecar.car as cab_car
+import cablecar.power as cab_power
+import cablecar.route as cab_route
+import cablecar.scheduler as cab_sched
+import cablecar.server as cab_server
+
+
+class HeadlessServer:
+    # Stands in for SimulationServer without an address space, nodes are
+    # represented by their labels and published values are only queued
+    def __init__(self) -> None:
+        self.namespace: int = 0
+        self.diagnostics: None = None
+        self.scheduler: cab_sched.TickScheduler = cab_sched.TickScheduler()
+        self.pending_writes: typing.Dict[str, typing.Any] = {}
+
+    def add_tick(self, group: str, callback: cab_sched.TickCallback) -> None:
+        self.scheduler.add(group, callback)
+
+    def remove_tick(self, group: str, callback: cab_sched.TickCallback) -> None:
+        self.scheduler.remove(group, callback)
+
+    def publish(self, node: str, value: typing.Any) -> None:
+        self.pending_writes[node] = value
+
+    def publish_many(
+        self, nodes: typing.Iterable[str], values: typing.Iterable[typing.Any]
+    ) -> None:
+        self.pending_writes.update(zip(nodes, values))
+
+    async def watch(self, node: str, callback: typing.Callable) -> None:
+        pass
+
+    async def historize(self, *nodes: str) -> None:
+        pass
+
+    async def add_object(
+        self,
+        label: str,
+        description: str,
+        variables: typing.Dict[str, cab_server.VariableSpec],
+        namespace: typing.Optional[int] = None,
+        kind: typing.Optional[str] = None,
+    ) -> typing.Dict[str, str]:
+        return {key: variable.label for key, variable in variables.items()}
+
+
+def _build_route(
+    winder: typing.Optional[cab_power.Winder], n_stops: int, spacing: float = 50.0
+) -> cab_route.Route:
+    _route = cab_route.Route(winder)
+    _route.add_stops({f"Stop {i}": i * spacing for i in range(n_stops)})
+    return _route
+
+
+class Line(typing.NamedTuple):
+    loop: asyncio.AbstractEventLoop
+    server: HeadlessServer
+    winder: cab_power.Winder
+    route: cab_route.Route
+    cars: typing.List[cab_car.CableCar]
+
+    def tick(self, group: str) -> None:
+        self.loop.run_until_complete(self.server.scheduler[group].tick())
+
+    def reset(self) -> None:
+        # Spreads the cars over the route with every other car gripping the
+        # cable so that each tick has both moving and coasting cars
+        for i, car in enumerate(self.cars):
+            car.position = random.uniform(0, self.route.length)
+            car.speed = 0.0
+            car.grip_state = (
+                cab_car.GripState.ENGAGED if i % 2 else cab_car.GripState.RELEASED
+            )
+            if car._fleet is not None:
+                car._fleet.reload(car._fleet_slot)
+
+
+@pytest.fixture
+def build_route() -> typing.Callable[[int], cab_route.Route]:
+    return lambda n_stops: _build_route(None, n_stops)
+
+
+@pytest.fixture
+def build_line() -> typing.Iterator[typing.Callable[..., Line]]:
+    _loop = asyncio.new_event_loop()
+    random.seed(0)
+
+    def _build(n_cars: int, n_stops: int, fleet: bool = False) -> Line:
+        _server = HeadlessServer()
+        _winder = cab_power.Winder("Bench", _server)
+        _loop.run_until_complete(_winder.setup())
+        _route = _build_route(_winder, n_stops)
+        _fleet = None
+        if fleet:
+            # Imported here as the fleet engine requires numpy
+            import cablecar.fleet as cab_fleet
+
+            _fleet = cab_fleet.Fleet(_route, capacity=n_cars)
+        _cars: typing.List[cab_car.CableCar] = []
+        for i in range(n_cars):
+            _cars.append(cab_car.CableCar(i + 1))
+            _loop.run_until_complete(_cars[-1].add_to_route(_route, fleet=_fleet))
+        _line = Line(_loop, _server, _winder, _route, _cars)
+        _line.reset()
+        _winder.status = cab_power.Status.CLOCKWISE
+        return _line
+
+    yield _build
+    _loop.close()
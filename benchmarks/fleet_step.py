@@ -0,0 +1,33 @@
+import random
+import timeit
+import types
+import typing
+
+import cablecar.car as cab_car
+import cablecar.fleet as cab_fleet
+import cablecar.route as cab_route
+
+FLEET_SIZES: typing.Tuple[int, ...] = (100, 10_000, 100_000)
+N_STEPS: int = 100
+
+
+def build_fleet(n_cars: int, n_stops: int = 28) -> cab_fleet.Fleet:
+    # The fleet engine only needs the server to register its physics tick
+    _server = types.SimpleNamespace(add_tick=lambda group, callback: None)
+    _route = cab_route.Route(types.SimpleNamespace(server=_server, speed=4.25))
+    _route.add_stops({f"Stop {i}": i * 50.0 for i in range(n_stops)})
+    _fleet = cab_fleet.Fleet(_route, capacity=n_cars)
+    for i in range(n_cars):
+        _fleet.add_car(cab_car.CableCar(i + 1), random.uniform(0, _route.length))
+        if i % 2:
+            _fleet.set_grip(i, cab_car.GripState.ENGAGED)
+    return _fleet
+
+
+if __name__ in "__main__":
+    random.seed(0)
+    print(f"{'Cars':>10} {'step/ms':>10} {'car-ticks/s':>14}")
+    for n_cars in FLEET_SIZES:
+        _fleet = build_fleet(n_cars)
+        _time = timeit.timeit(lambda: _fleet.step(4.25), number=N_STEPS) / N_STEPS
+        print(f"{n_cars:>10} {_time * 1e3:>10.3f} {n_cars / _time:>14.0f}")
@@ -0,0 +1,46 @@
+import random
+import timeit
+import typing
+
+import cablecar.route as cab_route
+
+ROUTE_SIZES: typing.Tuple[int, ...] = (100, 10_000, 50_000)
+N_LOOKUPS: int = 100_000
+
+
+def build_route(n_stops: int, spacing: float = 50.0) -> cab_route.Route:
+    _route = cab_route.Route(None)
+    _route.add_stops({f"Stop {i}": i * spacing for i in range(n_stops)})
+    return _route
+
+
+def bench_where_am_i(route: cab_route.Route) -> float:
+    _positions = [random.uniform(0, route.length) for _ in range(N_LOOKUPS)]
+    _start = timeit.default_timer()
+    for position in _positions:
+        route.where_am_i(position)
+    return (timeit.default_timer() - _start) / N_LOOKUPS
+
+
+def bench_length(route: cab_route.Route) -> float:
+    return timeit.timeit(lambda: route.length, number=N_LOOKUPS) / N_LOOKUPS
+
+
+def bench_cursor(route: cab_route.Route, step: float = 4.25) -> float:
+    _cursor = route.cursor(0.0)
+    _n_steps = min(N_LOOKUPS, int(route.length / step))
+    _start = timeit.default_timer()
+    for i in range(_n_steps):
+        _cursor.advance(i * step)
+    return (timeit.default_timer() - _start) / _n_steps
+
+
+if __name__ in "__main__":
+    random.seed(0)
+    print(f"{'Stops':>10} {'where_am_i/us':>15} {'length/us':>12} {'cursor/us':>12}")
+    for n_stops in ROUTE_SIZES:
+        _route = build_route(n_stops)
+        print(
+            f"{n_stops:>10} {bench_where_am_i(_route) * 1e6:>15.3f} "
+            f"{bench_length(_route) * 1e6:>12.3f} {bench_cursor(_route) * 1e6:>12.3f}"
+        )
@@ -0,0 +1,23 @@
+import asyncio
+import time
+import typing
+
+import cablecar.simulation as cab_sim
+
+FLEET_SIZES: typing.Tuple[int, ...] = (1, 100, 1000)
+
+
+async def time_to_ready(n_cars: int) -> float:
+    _start: float = time.perf_counter()
+    async with cab_sim.Simulation(headless=True) as cabsim:
+        for _ in range(n_cars):
+            await cabsim.create_car()
+        _elapsed: float = time.perf_counter() - _start
+    return _elapsed
+
+
+if __name__ in "__main__":
+    print(f"{'Cars':>10} {'ready/s':>10} {'per car/ms':>12}")
+    for n_cars in FLEET_SIZES:
+        _time = asyncio.run(time_to_ready(n_cars))
+        print(f"{n_cars:>10} {_time:>10.3f} {_time / n_cars * 1e3:>12.3f}")
@@ -0,0 +1,59 @@
+import pytest
+
+import cablecar.headway as cab_headway
+import cablecar.power as cab_power
+
+
+@pytest.mark.parametrize("n_stops", (28, 1_000))
+@pytest.mark.parametrize("n_cars", (1, 100, 1_000))
+def test_drive_tick(benchmark, build_line, n_cars: int, n_stops: int) -> None:
+    _line = build_line(n_cars, n_stops)
+    benchmark.extra_info.update(cars=n_cars, stops=n_stops)
+    # One round is one physics tick of every car, the operations per second
+    # reported are therefore ticks per second
+    benchmark.pedantic(_line.tick, args=("physics",), setup=_line.reset, rounds=50)
+
+
+@pytest.mark.parametrize("n_cars", (100, 10_000))
+def test_fleet_tick(benchmark, build_line, n_cars: int) -> None:
+    pytest.importorskip("numpy")
+    _line = build_line(n_cars, 28, fleet=True)
+    benchmark.extra_info.update(cars=n_cars)
+    # Includes queueing the changed values of the moving cars for the next
+    # flush, as well as the vectorised step itself. Cars are not reset
+    # between rounds, so that most keep their location as in a real run.
+    benchmark.pedantic(_line.tick, args=("physics",), rounds=50)
+
+
+@pytest.mark.parametrize("n_cars", (1, 100, 1_000))
+def test_controllers_tick(benchmark, build_line, n_cars: int) -> None:
+    _line = build_line(n_cars, 28)
+    benchmark.extra_info.update(cars=n_cars)
+
+    def _ring_bells() -> None:
+        for car in _line.cars:
+            car.ring_bell()
+
+    benchmark.pedantic(_line.tick, args=("controllers",), setup=_ring_bells, rounds=50)
+
+
+@pytest.mark.parametrize("n_cars", (100, 10_000))
+def test_headway_tick(benchmark, build_line, n_cars: int) -> None:
+    _line = build_line(n_cars, 28)
+    _monitor = cab_headway.HeadwayMonitor(_line.route)
+    _line.loop.run_until_complete(_monitor.setup())
+    for car in _line.cars:
+        _monitor.add_car(car)
+    benchmark.extra_info.update(cars=n_cars)
+    # Cars move a little between ticks, so the order is kept nearly sorted
+    benchmark.pedantic(_line.tick, args=("physics",), rounds=50)
+
+
+def test_winder_commands(benchmark, build_line) -> None:
+    _winder: cab_power.Winder = build_line(0, 28).winder
+
+    def _toggle() -> None:
+        _winder._receive_controller("OFF")
+        _winder._receive_controller("ON")
+
+    benchmark(_toggle)
@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+import cablecar
+import cablecar.car as cab_car
+
+
+@pytest.mark.parametrize("n_stops", (100, 10_000))
+def test_where_am_i(benchmark, build_route, n_stops: int) -> None:
+    _route = build_route(n_stops)
+    _position: float = random.uniform(0, _route.length)
+    benchmark(_route.where_am_i, _position)
+
+
+def test_length(benchmark, build_route) -> None:
+    _route = build_route(100)
+    benchmark(lambda: _route.length)
+
+
+def test_setter_no_change(benchmark, build_line) -> None:
+    _car = build_line(1, 28).cars[0]
+
+    def _set() -> None:
+        _car.position = _car.position
+
+    benchmark(_set)
+
+
+def test_setter_change(benchmark, build_line) -> None:
+    _car = build_line(1, 28).cars[0]
+
+    def _set() -> None:
+        _car.position = _car.position + 1.0
+
+    benchmark(_set)
+
+
+def test_enum_member_str(benchmark) -> None:
+    benchmark(cablecar.enum_member_str, cab_car.GripState.ENGAGED)
+
+
+def test_state_parked(benchmark, build_line) -> None:
+    # A car parked in event driven mode for a long time, whose state should
+    # cost the same however long it has been asleep
+    _line = build_line(1, 28)
+    _car = _line.cars[0]
+    _car.grip_state = cab_car.GripState.RELEASED
+    _car._sleep(0.0)
+    for _ in range(10_000):
+        _line.tick("physics")
+    benchmark(_car.state)
@@ -0,0 +1,43 @@
+import pytest
+
+import cablecar.simulation as cab_sim
+import cablecar.snapshot as cab_snapshot
+
+
+@pytest.mark.parametrize("n_cars", (0, 100))
+def test_simulation_enter(benchmark, n_cars: int) -> None:
+    benchmark.extra_info.update(cars=n_cars)
+
+    def _start() -> None:
+        _simulation = cab_sim.Simulation(headless=True)
+        _simulation.__enter__()
+        for _ in range(n_cars):
+            _simulation.add_car()
+        _simulation.__exit__(None, None, None)
+
+    benchmark.pedantic(_start, rounds=3)
+
+
+@pytest.mark.parametrize("n_cars", (100, 10_000))
+def test_snapshot_restore(benchmark, build_line, tmp_path, n_cars: int) -> None:
+    _line = build_line(n_cars, 28)
+    benchmark.extra_info.update(cars=n_cars)
+    _path: str = str(tmp_path / "line.snapshot")
+    cab_snapshot.write(
+        _path,
+        cab_snapshot.Snapshot(
+            0.0,
+            _line.route.distances,
+            _line.route.stop_names,
+            _line.winder.state(),
+            [car.state() for car in _line.cars],
+        ),
+    )
+
+    def _restore() -> None:
+        _snapshot: cab_snapshot.Snapshot = cab_snapshot.read(_path)
+        _line.winder.restore(_snapshot.winder)
+        for car, state in zip(_line.cars, _snapshot.cars):
+            car.restore(state)
+
+    benchmark.pedantic(_restore, rounds=5)
@@ -0,0 +1,257 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import time
+import typing
+
+import click
+
+import cablecar
+import cablecar.client as cab_client
+
+# Variable expected to change in response to each command
+_RESPONSES: typing.Dict[str, str] = {
+    "GRIP_ENGAGE": "GRIPSTATE",
+    "GRIP_LOOSE": "GRIPSTATE",
+    "GRIP_RELEASE": "GRIPSTATE",
+    "BELL_RING": "BELL",
+    "ON": "STATUS",
+    "OFF": "STATUS",
+}
+
+
+class LatencyStats(typing.NamedTuple):
+    count: int
+    p50: float
+    p99: float
+    max: float
+
+    @classmethod
+    def from_samples(cls, samples: typing.Sequence[float]) -> "LatencyStats":
+        if not samples:
+            return cls(0, 0.0, 0.0, 0.0)
+        _sorted: typing.List[float] = sorted(samples)
+
+        def _percentile(fraction: float) -> float:
+            return _sorted[min(int(fraction * len(_sorted)), len(_sorted) - 1)]
+
+        return cls(len(_sorted), _percentile(0.5), _percentile(0.99), _sorted[-1])
+
+
+class BenchResult(typing.NamedTuple):
+    latencies: typing.Dict[str, LatencyStats]
+    total: LatencyStats
+    timeouts: int
+    duration: float
+
+    @property
+    def throughput(self) -> float:
+        return self.total.count / self.duration if self.duration else 0.0
+
+
+def _next_command(
+    target: typing.Union[int, str], state: typing.Dict[str, typing.Any]
+) -> typing.Optional[str]:
+    # Only commands which are certain to change the state of the target are
+    # issued, otherwise there would be no response to time
+    if isinstance(target, str):
+        return "ON" if state.get("STATUS") == "STOPPED" else "OFF"
+    _options: typing.List[str] = []
+    if state.get("BELL") is False:
+        _options.append("BELL_RING")
+    if state.get("GRIPSTATE") == "LOOSE":
+        _options += ["GRIP_ENGAGE", "GRIP_RELEASE"]
+    elif state.get("GRIPSTATE") is not None:
+        _options.append("GRIP_LOOSE")
+    return random.choice(_options) if _options else None
+
+
+async def _drive(
+    url: str,
+    route: str,
+    cars: typing.Sequence[int],
+    with_winder: bool,
+    commands: int,
+    timeout: float,
+    samples: typing.Dict[str, typing.List[float]],
+) -> int:
+    _state: typing.Dict[typing.Union[int, str], typing.Dict[str, typing.Any]] = {
+        number: {} for number in cars
+    }
+    _waiting: typing.Dict[
+        typing.Tuple[typing.Union[int, str], str], asyncio.Future
+    ] = {}
+    _timeouts: int = 0
+    async with cab_client.CableCarClient(url, route) as client:
+        _targets: typing.List[typing.Union[int, str]] = list(cars)
+        if with_winder:
+            _targets.append(route)
+            _state[route] = {}
+
+        async def _listen() -> None:
+            async for update in client.telemetry(
+                ("GRIPSTATE", "BELL"), cars=cars, period=10
+            ):
+                if update.source not in _state:
+                    continue
+                _state[update.source][update.variable] = update.value
+                _future = _waiting.pop((update.source, update.variable), None)
+                if _future and not _future.done():
+                    _future.set_result(time.perf_counter())
+
+        _listener: asyncio.Task = asyncio.create_task(_listen())
+        try:
+            # Wait for the initial values of every variable to be received
+            while not all(
+                len(_state[target]) >= (1 if isinstance(target, str) else 2)
+                for target in _targets
+            ):
+                await asyncio.sleep(0.01)
+            for _ in range(commands):
+                _target = random.choice(_targets)
+                _command: typing.Optional[str] = _next_command(_target, _state[_target])
+                if _command is None:
+                    await asyncio.sleep(0.01)
+                    continue
+                _future = asyncio.get_running_loop().create_future()
+                _waiting[(_target, _RESPONSES[_command])] = _future
+                _start: float = time.perf_counter()
+                await client.send_commands({_target: _command})
+                try:
+                    _end: float = await asyncio.wait_for(_future, timeout)
+                except asyncio.TimeoutError:
+                    _waiting.pop((_target, _RESPONSES[_command]), None)
+                    _timeouts += 1
+                    continue
+                samples.setdefault(_command, []).append(_end - _start)
+        finally:
+            _listener.cancel()
+            await asyncio.gather(_listener, return_exceptions=True)
+    return _timeouts
+
+
+async def _wait_for_server(url: str, timeout: float) -> None:
+    _deadline: float = time.monotonic() + timeout
+    while True:
+        try:
+            async with cab_client.CableCarClient(url):
+                return
+        except (OSError, asyncio.TimeoutError):
+            if time.monotonic() > _deadline:
+                raise
+            await asyncio.sleep(0.5)
+
+
+async def run_bench(
+    url: str,
+    route: str = "Powell",
+    cars: int = 10,
+    clients: int = 4,
+    commands: int = 1000,
+    timeout: float = 10.0,
+) -> BenchResult:
+    _samples: typing.Dict[str, typing.List[float]] = {}
+    _clients: int = max(min(clients, cars), 1)
+    _start: float = time.perf_counter()
+    # Cars are shared out between clients so that no two clients command the
+    # same car, the first client also drives the winder
+    _timeouts: typing.List[int] = await asyncio.gather(
+        *(
+            _drive(
+                url,
+                route,
+                list(range(i + 1, cars + 1, _clients)),
+                i == 0,
+                commands // _clients + (i < commands % _clients),
+                timeout,
+                _samples,
+            )
+            for i in range(_clients)
+        )
+    )
+    _duration: float = time.perf_counter() - _start
+    return BenchResult(
+        {name: LatencyStats.from_samples(i) for name, i in sorted(_samples.items())},
+        LatencyStats.from_samples([j for i in _samples.values() for j in i]),
+        sum(_timeouts),
+        _duration,
+    )
+
+
+@click.command
+@click.option("--line", default="powell", show_default=True, help="Line to simulate")
+@click.option("--cars", type=int, default=10, show_default=True)
+@click.option(
+    "--clients",
+    type=int,
+    default=4,
+    show_default=True,
+    help="Number of concurrent client connections",
+)
+@click.option(
+    "--commands",
+    type=int,
+    default=1000,
+    show_default=True,
+    help="Total number of controller writes",
+)
+@click.option(
+    "--fleet", is_flag=True, help="Use the vectorised fleet engine (requires numpy)"
+)
+@click.option("--port", type=int, default=4080, show_default=True)
+@click.option(
+    "--timeout",
+    type=float,
+    default=10.0,
+    show_default=True,
+    help="Seconds to wait for the response to a single command",
+)
+@click.option("--seed", type=int, default=None, help="Seed for the random commands")
+def bench(
+    line: str,
+    cars: int,
+    clients: int,
+    commands: int,
+    fleet: bool,
+    port: int,
+    timeout: float,
+    seed: typing.Optional[int],
+) -> None:
+    # Imported here as the network runner imports the simulation CLI, which
+    # itself imports this module
+    import cablecar.network as cab_network
+
+    random.seed(seed)
+    logging.basicConfig(level=logging.ERROR)
+    _url: str = cablecar.SERVER_URL.format(port=port)
+
+    # The server runs in its own process so that the load generating
+    # clients do not compete with it for the event loop
+    _server = multiprocessing.get_context("spawn").Process(
+        target=cab_network._run_line,
+        args=(line, port, cab_network.ShardOptions(fleet=fleet, cars=cars)),
+        name=f"CableCarSim-{line}",
+    )
+    _server.start()
+    try:
+        asyncio.run(_wait_for_server(_url, 60.0))
+        _result: BenchResult = asyncio.run(
+            run_bench(_url, line.title(), cars, clients, commands, timeout)
+        )
+    finally:
+        os.kill(_server.pid, signal.SIGINT)
+        _server.join(10)
+        if _server.is_alive():
+            _server.terminate()
+
+    click.echo(f"{'Command':<14}{'Count':>8}{'p50/ms':>10}{'p99/ms':>10}{'max/ms':>10}")
+    for name, stats in list(_result.latencies.items()) + [("ALL", _result.total)]:
+        click.echo(
+            f"{name:<14}{stats.count:>8}{1e3 * stats.p50:>10.1f}"
+            f"{1e3 * stats.p99:>10.1f}{1e3 * stats.max:>10.1f}"
+        )
+    click.echo(f"Timeouts: {_result.timeouts}")
+    click.echo(f"Throughput: {_result.throughput:.1f} commands/s")
@@ -1,16 +1,24 @@
-import asyncio
 import enum
 import logging
+import math
 import typing
 
-import asyncua.sync
+import asyncua.common.node
 import asyncua.ua
 
 import cablecar
 import cablecar.common as cab_com
 import cablecar.route as cab_route
+import cablecar.scheduler as cab_sched
 import cablecar.server as cab_server
 
+if typing.TYPE_CHECKING:
+    import cablecar.fleet as cab_fleet
+
+
+# Allowance for rounding when timers are counted down in tick periods
+TIMER_TOLERANCE: float = 1e-9
+
 
 class GripState(enum.Enum):
     ENGAGED = enum.auto()
@@ -30,8 +38,61 @@ class Controller(enum.Enum):
     NONE = enum.auto()
 
 
+class CarState(typing.NamedTuple):
+    number: int
+    position: float
+    speed: float
+    segment: int
+    direction: cab_com.Direction
+    grip_state: GripState
+    rail_brake: bool
+    controller: Controller
+    bell: bool
+    grip_target: typing.Optional[GripState]
+    grip_remaining: float
+    bell_remaining: float
+    acceleration: float
+    rail_brake_factor: float
+    shoe_brake_factor: float
+
+
 class CableCar:
-    def __init__(self, number: int) -> None:
+    __slots__ = (
+        "_logger",
+        "_number",
+        "_server",
+        "_forward_direction",
+        "_route",
+        "_cursor",
+        "_fleet",
+        "_fleet_slot",
+        "_namespace",
+        "_objects",
+        "_controller_address",
+        "_acceleration",
+        "_brake_factor",
+        "_grip_state",
+        "_rail_brake",
+        "_speed",
+        "_position",
+        "_location",
+        "_controller",
+        "_bell",
+        "_grip_target",
+        "_grip_remaining",
+        "_bell_remaining",
+        "_event_driven",
+        "_asleep_at",
+        "_velocity",
+    )
+
+    def __init__(
+        self,
+        number: int,
+        acceleration: float = 0.1,
+        rail_brake_factor: float = 2.0,
+        shoe_brake_factor: float = 3.0,
+    ) -> None:
         self._logger: logging.Logger = logging.getLogger(
             f"CableCarSim.{self.__class__.__name__}.Car_{number}"
         )
@@ -39,17 +100,42 @@ class CableCar:
         self._server: typing.Optional[cab_server.SimulationServer] = None
         self._forward_direction: cab_com.Direction = cab_com.Direction.FORWARD
         self._route: typing.Optional[cab_route.Route] = None
+        self._cursor: typing.Optional[cab_route.SegmentCursor] = None
+        self._fleet: typing.Optional["cab_fleet.Fleet"] = None
+        self._fleet_slot: typing.Optional[int] = None
         self._namespace: typing.Optional[int] = None
-        self._objects: typing.Dict[str, asyncua.sync.SyncNode] = {}
+        self._objects: typing.Dict[str, asyncua.common.node.Node] = {}
         self._controller_address: typing.Optional[str] = None
-        self._acceleration: float = 0.1
+        self._acceleration: float = acceleration
         self._brake_factor: typing.Dict[Controller, float] = {
-            Controller.RAIL_BRAKE_APPLY: 2,
-            Controller.SHOE_BRAKE_APPLY: 3,
+            Controller.RAIL_BRAKE_APPLY: rail_brake_factor,
+            Controller.SHOE_BRAKE_APPLY: shoe_brake_factor,
         }
 
+        # Authoritative state of the car, changes are published to the
+        # address space by the server once per synchronisation tick
+        self._grip_state: GripState = GripState.RELEASED
+        self._rail_brake: bool = False
+        self._speed: float = 0.0
+        self._position: float = 0.0
+        self._location: typing.Any = "Depot"
+        self._controller: Controller = Controller.NONE
+        self._bell: bool = False
+        self._grip_target: typing.Optional[GripState] = None
+        self._grip_remaining: float = 0.0
+        self._bell_remaining: float = 0.0
+        # In event driven mode a car whose motion is constant sleeps rather
+        # than ticking, from the physics tick 'asleep_at' at 'velocity'
+        self._event_driven: bool = False
+        self._asleep_at: typing.Optional[int] = None
+        self._velocity: float = 0.0
+
+    @property
+    def number(self) -> int:
+        return self._number
+
     @property
-    def objects_node(self) -> asyncua.sync.SyncNode:
+    def objects_node(self) -> asyncua.common.node.Node:
         return self._server.get_node(
             asyncua.ua.TwoByteNodeId(asyncua.ua.ObjectIds.ObjectsFolder)
         )
@@ -58,217 +144,435 @@ class CableCar:
     def controller_address(self) -> typing.Optional[str]:
         return self._controller_address
 
-    def _create_objects(self) -> None:
+    async def _create_objects(self) -> None:
         if not self._server:
             raise AssertionError("Cannot create objects without route assignment")
 
-        self._objects["CURRENT_LOCATION"] = self.objects_node.add_variable(
-            f'ns={self._namespace};s="CABLECAR_{self._number}_LOCATION"',
-            f"Cable Car {self._number} Location",
-            "Depot",
-        )
-
-        self._objects["CURRENT_POSITION"] = self.objects_node.add_variable(
-            f'ns={self._namespace};s="CABLECAR_{self._number}_POSITION"',
-            f"Cable Car {self._number} Position",
-            0.0,
-        )
-
-        self._objects["GRIP_STATE"] = self.objects_node.add_variable(
-            f'ns={self._namespace};s="CABLECAR_{self._number}_GRIPSTATE"',
-            f"Cable Car {self._number} Grip State",
-            cablecar.enum_member_str(GripState.RELEASED),
-        )
-
-        self._objects["CURRENT_SPEED"] = self.objects_node.add_variable(
-            f'ns={self._namespace};s="CABLECAR_{self._number}_SPEED"',
-            f"Cable Car {self._number} Speed",
-            0.0,
-        )
-
-        self._objects["RAIL_BRAKE"] = self.objects_node.add_variable(
-            f'ns={self._namespace};s="CABLECAR_{self._number}_RAIL_BRAKE"',
-            f"Cable Car {self._number} Rail Brake",
-            False,
-        )
-
         self._controller_address = (
             f'ns={self._namespace};s="CABLECAR_{self._number}_CONTROLLER"'
         )
 
-        self._objects["CONTROLLER"] = self.objects_node.add_variable(
-            self._controller_address,
-            f"Cable Car {self._number} Controller",
-            cablecar.enum_member_str(Controller.NONE),
+        self._objects = await self._server.add_object(
+            f'"CABLECAR_{self._number}"',
+            f"Cable Car {self._number}",
+            {
+                "CURRENT_LOCATION": cab_server.VariableSpec(
+                    f'"CABLECAR_{self._number}_LOCATION"',
+                    f"Cable Car {self._number} Location",
+                    "Depot",
+                ),
+                "CURRENT_POSITION": cab_server.VariableSpec(
+                    f'"CABLECAR_{self._number}_POSITION"',
+                    f"Cable Car {self._number} Position",
+                    0.0,
+                ),
+                "GRIP_STATE": cab_server.VariableSpec(
+                    f'"CABLECAR_{self._number}_GRIPSTATE"',
+                    f"Cable Car {self._number} Grip State",
+                    cablecar.enum_member_str(GripState.RELEASED),
+                ),
+                "CURRENT_SPEED": cab_server.VariableSpec(
+                    f'"CABLECAR_{self._number}_SPEED"',
+                    f"Cable Car {self._number} Speed",
+                    0.0,
+                ),
+                "RAIL_BRAKE": cab_server.VariableSpec(
+                    f'"CABLECAR_{self._number}_RAIL_BRAKE"',
+                    f"Cable Car {self._number} Rail Brake",
+                    False,
+                ),
+                "CONTROLLER": cab_server.VariableSpec(
+                    f'"CABLECAR_{self._number}_CONTROLLER"',
+                    f"Cable Car {self._number} Controller",
+                    cablecar.enum_member_str(Controller.NONE),
+                    writable=True,
+                ),
+                "BELL": cab_server.VariableSpec(
+                    f'"CABLECAR_{self._number}_BELL"',
+                    f"Cable Car {self._number} Bell",
+                    False,
+                ),
+            },
+            kind="car",
         )
-        self._objects["CONTROLLER"].set_writable()
+        await self._server.watch(self._objects["CONTROLLER"], self._receive_controller)
 
-        self._objects["BELL"] = self.objects_node.add_variable(
-            f'ns={self._namespace};s="CABLECAR_{self._number}_BELL"',
-            f"Cable Car {self._number} Bell",
-            False,
-        )
+    def _publish(self, label: str, value: typing.Any) -> None:
+        self._server.publish(self._objects[label], value)
 
     @property
     def grip_state(self) -> GripState:
-        return getattr(GripState, self._objects["GRIP_STATE"].get_value())
+        return self._grip_state
 
     @grip_state.setter
     @cablecar.ignore_no_change
     def grip_state(self, state: GripState) -> None:
-        self._logger.info(f"GRIP_STATE={state}")
-        self._objects["GRIP_STATE"].set_value(cablecar.enum_member_str(state))
+        self._wake()
+        self._logger.info("GRIP_STATE=%s", state)
+        self._grip_state = state
+        self._publish("GRIP_STATE", cablecar.enum_member_str(state))
+        if self._fleet is not None:
+            self._fleet.set_grip(self._fleet_slot, state)
 
     @property
     def rail_brake(self) -> bool:
-        return self._objects["RAIL_BRAKE"].get_value()
+        return self._rail_brake
 
     @rail_brake.setter
     @cablecar.ignore_no_change
     def rail_brake(self, set_on: bool) -> None:
-        self._objects["RAIL_BRAKE"].set_value(set_on)
+        self._wake()
+        self._rail_brake = set_on
+        self._publish("RAIL_BRAKE", set_on)
+        if self._fleet is not None:
+            self._fleet.set_rail_brake(self._fleet_slot, set_on)
 
     @property
     def speed(self) -> float:
-        return float(self._objects["CURRENT_SPEED"].get_value())
+        return self._speed
 
     @speed.setter
     @cablecar.ignore_no_change
     def speed(self, value: float) -> None:
-        self._logger.info(f"CURRENT_SPEED={value}")
-        self._objects["CURRENT_SPEED"].set_value(value)
+        self._wake()
+        self._logger.info("CURRENT_SPEED=%s", value)
+        self._speed = float(value)
+        self._publish("CURRENT_SPEED", self._speed)
 
     @property
     def controller(self) -> Controller:
+        return self._controller
+
+    @controller.setter
+    @cablecar.ignore_no_change
+    def controller(self, value: Controller) -> None:
+        self._controller = value
+        self._publish("CONTROLLER", cablecar.enum_member_str(value))
+
+    def command(self, value: Controller) -> None:
+        # Carries out a command directly, as if it had been written by a
+        # client, without a round trip through the address space
+        self._controller = value
+        self._on_controller()
+
+    def _receive_controller(self, value: str) -> None:
         try:
-            return getattr(Controller, self._objects["CONTROLLER"].get_value())
-        except AttributeError:
-            self._objects["CONTROLLER"].set_value("NONE")
+            self._controller = Controller[value]
+        except KeyError:
+            self._controller = Controller.NONE
+            self._publish("CONTROLLER", cablecar.enum_member_str(Controller.NONE))
+        self._on_controller()
 
     @property
     def bell(self) -> bool:
-        return self._objects["BELL"].get_value()
-
-    async def ring_bell(self) -> None:
-        self._objects["BELL"].set_value(True)
-        await asyncio.sleep(1)
-        self._objects["BELL"].set_value(False)
+        return self._bell
+
+    def _set_bell(self, ringing: bool) -> None:
+        self._bell = ringing
+        self._publish("BELL", ringing)
+
+    def ring_bell(self, duration: float = 1.0) -> None:
+        self._set_bell(True)
+        self._bell_remaining = duration
+        self._server.add_tick("controllers", self._control_tick)
+
+    def state(self) -> CarState:
+        return CarState(
+            self._number,
+            self._exact_position(),
+            self._speed,
+            self.segment_index,
+            self._forward_direction,
+            self._grip_state,
+            self._rail_brake,
+            self._controller,
+            self._bell,
+            self._grip_target,
+            self._grip_remaining,
+            self._bell_remaining,
+            self._acceleration,
+            self._brake_factor[Controller.RAIL_BRAKE_APPLY],
+            self._brake_factor[Controller.SHOE_BRAKE_APPLY],
+        )
 
-    def add_to_route(self, route: cab_route.Route, distance: float = 0.0) -> None:
+    def restore(self, state: CarState) -> None:
+        # The car must already be on a route with the same stops as the one
+        # the state was taken from
+        self._acceleration = state.acceleration
+        self._brake_factor[Controller.RAIL_BRAKE_APPLY] = state.rail_brake_factor
+        self._brake_factor[Controller.SHOE_BRAKE_APPLY] = state.shoe_brake_factor
+        self._forward_direction = state.direction
+        self.grip_state = state.grip_state
+        self.rail_brake = state.rail_brake
+        self.position = state.position
+        self.speed = state.speed
+        # The controller is not published, a client write of the same value
+        # would carry out the command again
+        self._controller = state.controller
+        self._cursor = None
+        self.location = (
+            self._route.segment(state.segment) if state.segment >= 0 else "Depot"
+        )
+        if self._fleet is not None:
+            self._fleet.reload(self._fleet_slot)
+        # Grip changes and bells in progress carry on from where they were
+        self._set_bell(state.bell)
+        self._grip_target = state.grip_target
+        self._grip_remaining = state.grip_remaining
+        self._bell_remaining = state.bell_remaining
+        if self._grip_target or self._bell_remaining:
+            self._server.add_tick("controllers", self._control_tick)
+
+    async def add_to_route(
+        self,
+        route: cab_route.Route,
+        distance: float = 0.0,
+        fleet: typing.Optional["cab_fleet.Fleet"] = None,
+        drive: bool = True,
+        event_driven: bool = False,
+    ) -> None:
         self._server = route.winder.server
-        self._namespace = self._server.register_namespace(
-            f"{self.__class__.__name__}.CableCar{self._number}"
+        self._namespace = self._server.namespace
+        await self._create_objects()
+        await self._server.historize(
+            self._objects["CURRENT_POSITION"], self._objects["CURRENT_SPEED"]
         )
-        self._create_objects()
         self._route = route
         self.position = distance
 
-        self._server.add_task(self._check_bell_trigger)
-        self._server.add_task(self._check_grip_trigger)
-        self._server.add_task(self._drive)
+        # When part of a fleet the motion of the car is computed by the
+        # fleet engine rather than by a tick per car, without 'drive' the car
+        # only mirrors state set from elsewhere, e.g. by a replay
+        if fleet is not None:
+            self._fleet = fleet
+            self._fleet_slot = fleet.add_car(self, distance)
+        elif drive:
+            self._event_driven = event_driven
+            self._server.add_tick("physics", self._drive_tick)
+            if event_driven:
+                # Published positions go stale while the car sleeps, reads
+                # by clients are given the interpolated position instead
+                self._server.add_read_hook(
+                    self._objects["CURRENT_POSITION"], lambda: self.position
+                )
+        if self._server.diagnostics:
+            self._server.diagnostics.add_car()
 
     @property
     def position(self) -> float:
-        return self._objects["CURRENT_POSITION"].get_value()
+        if self._asleep_at is None:
+            return self._position
+        # While asleep the position is interpolated from the number of
+        # physics ticks since the car went to sleep
+        _physics: cab_sched.TickGroup = self._server.scheduler["physics"]
+        return self._position + self._velocity * _physics.period * (
+            _physics.ticks - self._asleep_at
+        )
+
+    @property
+    def segment_index(self) -> int:
+        # Index of the segment last reported as the location of the car, -1
+        # while it is still in the depot
+        if self._location == "Depot":
+            return -1
+        if self._fleet is not None:
+            return int(self._fleet.segments[self._fleet_slot])
+        if self._cursor:
+            return self._cursor.index
+        return self._route.segment_index(self._position)
 
     @property
     def location(self) -> str:
-        return self._objects["CURRENT_LOCATION"].get_value()
+        return self._location
 
     @position.setter
     @cablecar.ignore_no_change
     def position(self, distance: float) -> None:
-        self._logger.info(f"CURRENT_POSITION={distance}")
-        self._objects["CURRENT_POSITION"].set_value(distance)
+        self._wake()
+        self._logger.info("CURRENT_POSITION=%s", distance)
+        self._position = float(distance)
+        self._publish("CURRENT_POSITION", self._position)
 
     @location.setter
     @cablecar.ignore_no_change
     def location(self, location: str) -> None:
-        self._logger.info(f"CURRENT_LOCATION={location}")
-        self._objects["CURRENT_LOCATION"].set_value(location)
-
-    async def _check_bell_trigger(self) -> None:
-        while self._server.running:
-            await asyncio.sleep(0.5)
-            if self.controller == Controller.BELL_RING:
-                await self.ring_bell()
-
-    async def _check_rail_brake(self) -> None:
-        while self._server.running:
-            await asyncio.sleep(0.5)
-            if self.controller == Controller.RAIL_BRAKE_APPLY:
-                # In reality the driver would need to ensure
-                # the grip is released during braking
-                # in the simulation do this automatically
-                self.grip_state = GripState.RELEASED
-                self.rail_brake = True
-
-    async def _check_grip_trigger(self) -> None:
-        while self._server.running:
-            await asyncio.sleep(0.5)
-            if self.controller == Controller.GRIP_ENGAGE:
-                if self.grip_state == GripState.ENGAGED:
-                    continue
-                elif self.grip_state == GripState.LOOSE:
-                    _duration = 1
-                else:
-                    _duration = 3
-                for _ in range(_duration):
-                    await asyncio.sleep(1)
-                self.grip_state = GripState.ENGAGED
-            elif self.controller == Controller.GRIP_LOOSE:
-                if self.grip_state == GripState.LOOSE:
-                    continue
-                self.grip_state = GripState.LOOSE
-            elif self.controller == Controller.GRIP_RELEASE:
-                if self.grip_state == GripState.RELEASED:
-                    continue
-                elif self.grip_state == GripState.LOOSE:
-                    _duration = 1
-                else:
-                    _duration = 2
-                for _ in range(_duration):
-                    await asyncio.sleep(1)
-                self.grip_state = GripState.RELEASED
-
-    async def _drive(self) -> None:
-        while self._server.running:
-            await asyncio.sleep(1)
-            if (
-                self.position < 0.0
-                or self.position > self._route.length
-                and abs(self.speed) > 0
-            ):
-                self._logger.info("Reached route limit, stopping")
-                self.grip_state = GripState.RELEASED
-                self.controller = Controller.NONE
-                self.speed = 0.0
-                self.position = 0.0 if self.position < 0.0 else self._route.length
-                continue
-            elif self.grip_state == GripState.ENGAGED:
-                while abs(self.speed) < abs(self._route.winder.speed):
-                    await asyncio.sleep(1)
-                    self.speed += (
-                        self._acceleration
-                        if self._route.winder.speed > 0
-                        else -self._acceleration
-                    )
-                    self.position += (
-                        self.speed if self._route.winder.speed > 0 else -self.speed
-                    )
-                    self.location = self._route.where_am_i(self.position)
-                self.position += self.speed
-                self.location = self._route.where_am_i(self.position)
-            elif abs(self.speed) > 0:
-                _total_deceleration: float = self._acceleration
-                if self.rail_brake:
-                    _total_deceleration *= self._brake_factor[
-                        Controller.RAIL_BRAKE_APPLY
-                    ]
-                while abs(self.speed) > 0:
-                    await asyncio.sleep(1)
-                    self.position += (
-                        self.speed if self._route.winder.speed > 0 else -self.speed
-                    )
-                    self.location = self._route.where_am_i(self.position)
-                    self.speed -= _total_deceleration
+        self._logger.info("CURRENT_LOCATION=%s", location)
+        self._location = location
+        self._publish("CURRENT_LOCATION", location)
+
+    def _update_location(self) -> None:
+        if not self._cursor:
+            self._cursor = self._route.cursor(self.position)
+        elif not self._cursor.advance(self.position):
+            return
+        self.location = self._cursor.location
+
+    def _apply_rail_brake(self, set_on: bool) -> None:
+        if set_on:
+            # In reality the driver would need to ensure
+            # the grip is released during braking
+            # in the simulation do this automatically
+            self.grip_state = GripState.RELEASED
+        self.rail_brake = set_on
+
+    def _change_grip(self, command: Controller) -> None:
+        if command == Controller.GRIP_ENGAGE:
+            _target = GripState.ENGAGED
+            _duration = {
+                GripState.ENGAGED: 0,
+                GripState.LOOSE: 1,
+                GripState.RELEASED: 3,
+            }[self.grip_state]
+        elif command == Controller.GRIP_LOOSE:
+            _target, _duration = GripState.LOOSE, 0
+        else:
+            _target = GripState.RELEASED
+            _duration = {
+                GripState.RELEASED: 0,
+                GripState.LOOSE: 1,
+                GripState.ENGAGED: 2,
+            }[self.grip_state]
+
+        # A new grip command supersedes one still in progress
+        if not _duration:
+            self._grip_target = None
+            self.grip_state = _target
+            return
+        self._grip_target = _target
+        self._grip_remaining = _duration
+        self._server.add_tick("controllers", self._control_tick)
+
+    def _control_tick(self, dt: float) -> None:
+        if self._grip_target:
+            self._grip_remaining -= dt
+            if self._grip_remaining <= TIMER_TOLERANCE:
+                self.grip_state = self._grip_target
+                self._grip_target = None
+        if self._bell_remaining > 0:
+            self._bell_remaining -= dt
+            if self._bell_remaining <= TIMER_TOLERANCE:
+                self._bell_remaining = 0.0
+                self._set_bell(False)
+        if not self._grip_target and not self._bell_remaining:
+            self._server.remove_tick("controllers", self._control_tick)
+
+    def _on_controller(self) -> None:
+        if self.controller == Controller.BELL_RING:
+            self.ring_bell()
+        elif self.controller == Controller.RAIL_BRAKE_APPLY:
+            self._apply_rail_brake(True)
+        elif self.controller == Controller.RAIL_BRAKE_RELEASE:
+            self._apply_rail_brake(False)
+        elif self.controller in (
+            Controller.GRIP_ENGAGE,
+            Controller.GRIP_LOOSE,
+            Controller.GRIP_RELEASE,
+        ):
+            self._change_grip(self.controller)
+        # Commands are acknowledged by resetting the controller so that the
+        # same command can be sent again
+        self.controller = Controller.NONE
+
+    def _drive_tick(self, dt: float) -> None:
+        if (
+            self.position < 0.0
+            or self.position > self._route.length
+            and abs(self.speed) > 0
+        ):
+            self._logger.info("Reached route limit, stopping")
+            self.grip_state = GripState.RELEASED
+            self.controller = Controller.NONE
+            self.speed = 0.0
+            self.position = 0.0 if self.position < 0.0 else self._route.length
+        elif self.grip_state == GripState.ENGAGED:
+            if abs(self.speed) < abs(self._route.winder.speed):
+                self.speed += (
+                    self._acceleration
+                    if self._route.winder.speed > 0
+                    else -self._acceleration
+                ) * dt
+                self.position += (
+                    self.speed if self._route.winder.speed > 0 else -self.speed
+                ) * dt
+            else:
+                self.position += self.speed * dt
+            self._update_location()
+        elif abs(self.speed) > 0:
+            _total_deceleration: float = self._acceleration * dt
+            if self.rail_brake:
+                _total_deceleration *= self._brake_factor[Controller.RAIL_BRAKE_APPLY]
+            self.position += (
+                self.speed if self._route.winder.speed > 0 else -self.speed
+            ) * dt
+            self._update_location()
+            self.speed = math.copysign(
+                max(abs(self.speed) - _total_deceleration, 0.0), self.speed
+            )
+        if self._event_driven:
+            self._schedule_sleep()
+
+    def _sleep(self, velocity: float, ticks: typing.Optional[int] = None) -> None:
+        _physics: cab_sched.TickGroup = self._server.scheduler["physics"]
+        self._velocity = velocity
+        self._asleep_at = _physics.ticks + 1
+        self._server.remove_tick("physics", self._drive_tick)
+        self._route.winder.add_listener(self._on_winder_speed)
+        if ticks is not None:
+            _physics.call_at(self._asleep_at + ticks, self._wake_tick)
+
+    def _exact_position(self) -> float:
+        # Parked cars sleep indefinitely, but do not move
+        if self._asleep_at is None or not self._velocity:
+            return self._position
+        _physics: cab_sched.TickGroup = self._server.scheduler["physics"]
+        # The missed ticks are accumulated one by one, rather than
+        # interpolated, so that the result matches that of ticking exactly.
+        # Moving cars are always woken before their next stop boundary, so
+        # this is bounded by the ticks taken to cross one segment.
+        _position: float = self._position
+        for _ in range(_physics.ticks - self._asleep_at):
+            _position += self._velocity * _physics.period
+        return _position
+
+    def _wake(self) -> None:
+        if self._asleep_at is None:
+            return
+        _position: float = self._exact_position()
+        self._asleep_at = None
+        self._server.scheduler["physics"].cancel(self._wake_tick)
+        self._route.winder.remove_listener(self._on_winder_speed)
+        self._server.add_tick("physics", self._drive_tick)
+        self.position = _position
+
+    def _wake_tick(self, dt: float) -> None:
+        self._wake()
+
+    def _on_winder_speed(self, speed: float) -> None:
+        self._wake()
+
+    def _schedule_sleep(self) -> None:
+        # Called after each physics tick in event driven mode, the car sleeps
+        # while its motion is constant until the next tick on which it could
+        # change location or reach the route limit
+        _length: float = self._route.length
+        if not 0.0 <= self._position <= _length:
+            return
+        if self.grip_state != GripState.ENGAGED:
+            if not self.speed:
+                self._sleep(0.0)
+            return
+        if abs(self.speed) < abs(self._route.winder.speed):
+            return
+        if not self.speed:
+            self._sleep(0.0)
+            return
+        _lower, _upper = self._cursor.bounds
+        _step: float = self.speed * self._server.scheduler["physics"].period
+        # One tick is kept in hand to allow for rounding, the car is then
+        # ticking again when it reaches the boundary
+        if _step > 0:
+            _ticks: int = math.floor((min(_upper, _length) - self._position) / _step)
+        else:
+            _ticks = math.floor((self._position - max(_lower, 0.0)) / -_step)
+        if _ticks - 1 >= 2:
+            self._sleep(self.speed, _ticks - 1)
@@ -0,0 +1,204 @@
+import asyncio
+import enum
+import re
+import typing
+
+import asyncua
+import asyncua.common.node
+import asyncua.ua
+
+import cablecar
+
+CAR_VARIABLES: typing.Tuple[str, ...] = (
+    "LOCATION",
+    "POSITION",
+    "GRIPSTATE",
+    "SPEED",
+    "RAIL_BRAKE",
+    "CONTROLLER",
+    "BELL",
+)
+WINDER_VARIABLES: typing.Tuple[str, ...] = ("STATUS", "CONTROLLER", "SPEED")
+TELEMETRY_VARIABLES: typing.Tuple[str, ...] = (
+    "LOCATION",
+    "POSITION",
+    "GRIPSTATE",
+    "SPEED",
+)
+
+_CAR_OBJECT: typing.Pattern = re.compile(r'^"CABLECAR_(\d+)"$')
+
+
+def car_node_id(namespace: int, number: int, variable: str) -> asyncua.ua.NodeId:
+    return asyncua.ua.NodeId.from_string(
+        f'ns={namespace};s="CABLECAR_{number}_{variable}"'
+    )
+
+
+def winder_node_id(namespace: int, route: str, variable: str) -> asyncua.ua.NodeId:
+    return asyncua.ua.NodeId.from_string(f"ns={namespace};s={route.upper()}_{variable}")
+
+
+class FleetState(typing.NamedTuple):
+    winder: typing.Dict[str, typing.Any]
+    cars: typing.Dict[int, typing.Dict[str, typing.Any]]
+
+
+class Telemetry(typing.NamedTuple):
+    # 'source' is the car number, or the route name for the winder
+    source: typing.Union[int, str]
+    variable: str
+    value: typing.Any
+
+
+class _TelemetryHandler:
+    def __init__(
+        self,
+        sources: typing.Dict[
+            asyncua.ua.NodeId, typing.Tuple[typing.Union[int, str], str]
+        ],
+        queue: "asyncio.Queue[Telemetry]",
+    ) -> None:
+        self._sources = sources
+        self._queue = queue
+
+    def datachange_notification(
+        self, node: asyncua.common.node.Node, val: typing.Any, data: typing.Any
+    ) -> None:
+        _source, _variable = self._sources[node.nodeid]
+        self._queue.put_nowait(Telemetry(_source, _variable, val))
+
+
+class CableCarClient:
+    def __init__(
+        self,
+        url: str = cablecar.SERVER_URL.format(port=4080),
+        route: str = "Powell",
+        timeout: float = 4,
+    ) -> None:
+        self._client: asyncua.Client = asyncua.Client(url, timeout=timeout)
+        self._route: str = route
+        self._namespace: typing.Optional[int] = None
+        self._cars: typing.Tuple[int, ...] = ()
+        self._nodes: typing.Dict[asyncua.ua.NodeId, asyncua.common.node.Node] = {}
+
+    @property
+    def client(self) -> asyncua.Client:
+        return self._client
+
+    @property
+    def cars(self) -> typing.Tuple[int, ...]:
+        return self._cars
+
+    def _node(self, node_id: asyncua.ua.NodeId) -> asyncua.common.node.Node:
+        if node_id not in self._nodes:
+            self._nodes[node_id] = self._client.get_node(node_id)
+        return self._nodes[node_id]
+
+    def car_node(self, number: int, variable: str) -> asyncua.common.node.Node:
+        return self._node(car_node_id(self._namespace, number, variable))
+
+    def winder_node(self, variable: str) -> asyncua.common.node.Node:
+        return self._node(winder_node_id(self._namespace, self._route, variable))
+
+    async def discover(self) -> typing.Tuple[int, ...]:
+        # A single browse of the Objects folder finds every car, node
+        # identifiers for their variables are then built locally
+        self._namespace = await self._client.get_namespace_index("CableCarSim")
+        _numbers: typing.List[int] = []
+        for child in await self._client.nodes.objects.get_children():
+            if child.nodeid.NamespaceIndex != self._namespace:
+                continue
+            _match = _CAR_OBJECT.match(str(child.nodeid.Identifier))
+            if _match:
+                _numbers.append(int(_match.group(1)))
+        self._cars = tuple(sorted(_numbers))
+        return self._cars
+
+    async def read_fleet_state(
+        self,
+        variables: typing.Sequence[str] = CAR_VARIABLES,
+        cars: typing.Optional[typing.Sequence[int]] = None,
+    ) -> FleetState:
+        _cars: typing.Sequence[int] = self._cars if cars is None else cars
+        _keys: typing.List[typing.Tuple[typing.Optional[int], str]] = [
+            (None, variable) for variable in WINDER_VARIABLES
+        ] + [(number, variable) for number in _cars for variable in variables]
+        _values: typing.List[typing.Any] = await self._client.read_values(
+            [
+                self.winder_node(variable)
+                if number is None
+                else self.car_node(number, variable)
+                for number, variable in _keys
+            ]
+        )
+        _state = FleetState({}, {number: {} for number in _cars})
+        for (number, variable), value in zip(_keys, _values):
+            if number is None:
+                _state.winder[variable] = value
+            else:
+                _state.cars[number][variable] = value
+        return _state
+
+    async def send_commands(
+        self,
+        commands: typing.Dict[typing.Union[int, str], typing.Union[str, enum.Enum]],
+    ) -> None:
+        # Integer keys address the controller of a car, the route name
+        # addresses the controller of its winder
+        _nodes: typing.List[asyncua.common.node.Node] = [
+            self.car_node(target, "CONTROLLER")
+            if isinstance(target, int)
+            else self.winder_node("CONTROLLER")
+            for target in commands
+        ]
+        _values: typing.List[str] = [
+            cablecar.enum_member_str(command)
+            if isinstance(command, enum.Enum)
+            else command
+            for command in commands.values()
+        ]
+        await self._client.write_values(_nodes, _values)
+
+    async def telemetry(
+        self,
+        variables: typing.Sequence[str] = TELEMETRY_VARIABLES,
+        cars: typing.Optional[typing.Sequence[int]] = None,
+        period: float = 100,
+    ) -> typing.AsyncIterator[Telemetry]:
+        _sources: typing.Dict[
+            asyncua.ua.NodeId, typing.Tuple[typing.Union[int, str], str]
+        ] = {
+            car_node_id(self._namespace, number, variable): (number, variable)
+            for number in (self._cars if cars is None else cars)
+            for variable in variables
+        }
+        _sources.update(
+            {
+                winder_node_id(self._namespace, self._route, variable): (
+                    self._route,
+                    variable,
+                )
+                for variable in WINDER_VARIABLES
+            }
+        )
+        _queue: "asyncio.Queue[Telemetry]" = asyncio.Queue()
+        _subscription = await self._client.create_subscription(
+            period, _TelemetryHandler(_sources, _queue)
+        )
+        try:
+            await _subscription.subscribe_data_change(
+                [self._node(node_id) for node_id in _sources]
+            )
+            while True:
+                yield await _queue.get()
+        finally:
+            await _subscription.delete()
+
+    async def __aenter__(self) -> "CableCarClient":
+        await self._client.connect()
+        await self.discover()
+        return self
+
+    async def __aexit__(self, *args, **kwargs) -> None:
+        await self._client.disconnect()
@@ -0,0 +1,98 @@
+import asyncio
+import selectors
+import time
+import typing
+
+
+class Clock:
+    def now(self) -> float:
+        return time.monotonic()
+
+    def select(
+        self, selector: selectors.BaseSelector, timeout: typing.Optional[float]
+    ) -> typing.List[typing.Tuple[selectors.SelectorKey, int]]:
+        return selector.select(timeout)
+
+
+class ScaledClock(Clock):
+    def __init__(self, speedup: float) -> None:
+        if speedup <= 0:
+            raise ValueError(f"Clock speedup must be positive, got {speedup}")
+        self._speedup: float = speedup
+        self._origin: float = time.monotonic()
+
+    def now(self) -> float:
+        return self._origin + (time.monotonic() - self._origin) * self._speedup
+
+    def select(
+        self, selector: selectors.BaseSelector, timeout: typing.Optional[float]
+    ) -> typing.List[typing.Tuple[selectors.SelectorKey, int]]:
+        return selector.select(timeout if timeout is None else timeout / self._speedup)
+
+
+class SteppedClock(Clock):
+    def __init__(self, start: float = 0.0) -> None:
+        self._now: float = start
+
+    def now(self) -> float:
+        return self._now
+
+    def select(
+        self, selector: selectors.BaseSelector, timeout: typing.Optional[float]
+    ) -> typing.List[typing.Tuple[selectors.SelectorKey, int]]:
+        # Pending I/O is always serviced first, time only jumps forward to
+        # the next scheduled wakeup once the loop would otherwise block
+        if timeout is None:
+            return selector.select(None)
+        _events = selector.select(0)
+        if not _events:
+            self._now += timeout
+        return _events
+
+
+class _ClockSelector(selectors.BaseSelector):
+    def __init__(self, clock: Clock, selector: selectors.BaseSelector) -> None:
+        self._clock: Clock = clock
+        self._selector: selectors.BaseSelector = selector
+
+    def register(
+        self, fileobj: typing.Any, events: int, data: typing.Any = None
+    ) -> selectors.SelectorKey:
+        return self._selector.register(fileobj, events, data)
+
+    def unregister(self, fileobj: typing.Any) -> selectors.SelectorKey:
+        return self._selector.unregister(fileobj)
+
+    def modify(
+        self, fileobj: typing.Any, events: int, data: typing.Any = None
+    ) -> selectors.SelectorKey:
+        return self._selector.modify(fileobj, events, data)
+
+    def select(
+        self, timeout: typing.Optional[float] = None
+    ) -> typing.List[typing.Tuple[selectors.SelectorKey, int]]:
+        return self._clock.select(self._selector, timeout)
+
+    def close(self) -> None:
+        self._selector.close()
+
+    def get_key(self, fileobj: typing.Any) -> selectors.SelectorKey:
+        return self._selector.get_key(fileobj)
+
+    def get_map(self) -> typing.Mapping[typing.Any, selectors.SelectorKey]:
+        return self._selector.get_map()
+
+
+class ClockEventLoop(asyncio.SelectorEventLoop):
+    # All timing in the simulation is expressed through asyncio.sleep, so
+    # replacing the time source of the loop changes the pace of every task
+    def __init__(self, clock: Clock) -> None:
+        self._clock: Clock = clock
+        super().__init__(_ClockSelector(clock, selectors.DefaultSelector()))
+
+    @property
+    def clock(self) -> Clock:
+        return self._clock
+
+    def time(self) -> float:
+        return self._clock.now()
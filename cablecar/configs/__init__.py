@@ -1,16 +1,135 @@
+import array
 import glob
 import os.path
+import struct
 import typing
 
 import toml
 
+CONFIG_DIR: str = os.path.dirname(__file__)
 
-class Configs:
-    def __new__(cls: type["Configs"]) -> "Configs":
-        _config_files: typing.List[str] = glob.glob(
-            os.path.join(os.path.dirname(__file__), "*.toml")
+# Magic, format version, modification time of the source TOML in
+# nanoseconds and number of stops
+_CACHE_HEADER: struct.Struct = struct.Struct("<4sHqI")
+_CACHE_MAGIC: bytes = b"CCRT"
+_CACHE_VERSION: int = 1
+
+
+class CompiledRoute(typing.NamedTuple):
+    distances: array.array
+    stop_names: typing.Tuple[str, ...]
+
+
+_loaded: typing.Dict[str, typing.Tuple[int, typing.Dict[str, typing.Any]]] = {}
+_compiled: typing.Dict[str, typing.Tuple[int, CompiledRoute]] = {}
+
+
+def _config_files() -> typing.List[str]:
+    return sorted(glob.glob(os.path.join(CONFIG_DIR, "*.toml")))
+
+
+def available() -> typing.List[str]:
+    return [os.path.splitext(os.path.basename(i))[0] for i in _config_files()]
+
+
+def config_path(name: str) -> str:
+    _path: str = os.path.join(CONFIG_DIR, f"{name}.toml")
+    if not os.path.isfile(_path):
+        raise AttributeError(f"No configuration named '{name}' in {CONFIG_DIR}")
+    return _path
+
+
+def load(name: str) -> typing.Dict[str, typing.Any]:
+    _path: str = config_path(name)
+    _mtime: int = os.stat(_path).st_mtime_ns
+    if name not in _loaded or _loaded[name][0] != _mtime:
+        _loaded[name] = (_mtime, toml.load(_path))
+    return _loaded[name][1]
+
+
+def _cache_path(name: str) -> str:
+    return os.path.join(CONFIG_DIR, f"{name}.route.cache")
+
+
+def _read_cache(name: str, mtime: int) -> typing.Optional[CompiledRoute]:
+    try:
+        with open(_cache_path(name), "rb") as in_f:
+            _data: bytes = in_f.read()
+    except OSError:
+        return None
+    if len(_data) < _CACHE_HEADER.size:
+        return None
+    _magic, _version, _mtime, _count = _CACHE_HEADER.unpack_from(_data)
+    if (_magic, _version, _mtime) != (_CACHE_MAGIC, _CACHE_VERSION, mtime):
+        return None
+    _offset: int = _CACHE_HEADER.size + 8 * _count
+    # A cache cut short or otherwise corrupt is rebuilt rather than read
+    if len(_data) < _offset:
+        return None
+    _distances: array.array = array.array("d")
+    _distances.frombytes(_data[_CACHE_HEADER.size : _offset])
+    try:
+        _names: typing.Tuple[str, ...] = (
+            tuple(_data[_offset:].decode("utf-8").split("\0")) if _count else ()
         )
-        for config in _config_files:
-            _name: str = os.path.splitext(os.path.basename(config))[0]
-            setattr(cls, _name, toml.load(config))
-        return cls
+    except UnicodeDecodeError:
+        return None
+    if len(_names) != _count:
+        return None
+    return CompiledRoute(_distances, _names)
+
+
+def _write_cache(name: str, mtime: int, route: CompiledRoute) -> None:
+    _path: str = _cache_path(name)
+    _temp_path: str = f"{_path}.{os.getpid()}"
+    try:
+        with open(_temp_path, "wb") as out_f:
+            out_f.write(
+                _CACHE_HEADER.pack(
+                    _CACHE_MAGIC, _CACHE_VERSION, mtime, len(route.distances)
+                )
+            )
+            out_f.write(route.distances.tobytes())
+            out_f.write("\0".join(route.stop_names).encode("utf-8"))
+        os.replace(_temp_path, _path)
+    except OSError:
+        # The cache is an optimisation only, e.g. the package directory may
+        # be read only
+        if os.path.exists(_temp_path):
+            os.remove(_temp_path)
+
+
+def compile_route(name: str, use_cache: bool = True) -> CompiledRoute:
+    _mtime: int = os.stat(config_path(name)).st_mtime_ns
+    if name in _compiled and _compiled[name][0] == _mtime:
+        return _compiled[name][1]
+    _route: typing.Optional[CompiledRoute] = (
+        _read_cache(name, _mtime) if use_cache else None
+    )
+    if _route is None:
+        # Stops sharing a distance are resolved as by Route.add_stops, the
+        # last one listed is kept
+        _call_points: typing.Dict[float, str] = {
+            float(distance): stop_name
+            for stop_name, distance in load(name).get("route", {}).items()
+        }
+        _ordered = sorted(_call_points.items())
+        _route = CompiledRoute(
+            array.array("d", (distance for distance, _ in _ordered)),
+            tuple(stop_name for _, stop_name in _ordered),
+        )
+        if use_cache:
+            _write_cache(name, _mtime, _route)
+    _compiled[name] = (_mtime, _route)
+    return _route
+
+
+class Configs:
+    # Configurations are parsed on first access rather than all at once
+    def __getattr__(self, name: str) -> typing.Dict[str, typing.Any]:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return load(name)
+
+    def __dir__(self) -> typing.List[str]:
+        return available()
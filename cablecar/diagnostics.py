@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import time
+import typing
+
+import asyncua.common.callback
+import asyncua.common.node
+
+import cablecar.histogram as cab_hist
+
+if typing.TYPE_CHECKING:
+    import cablecar.server as cab_server
+
+
+class Diagnostics:
+    def __init__(
+        self, server: "cab_server.SimulationServer", interval: float = 1.0
+    ) -> None:
+        self._logger: logging.Logger = logging.getLogger(
+            f"CableCarSim.{self.__class__.__name__}"
+        )
+        self._server: "cab_server.SimulationServer" = server
+        self._interval: float = interval
+        self._namespace: typing.Optional[int] = None
+        self._objects: typing.Dict[str, asyncua.common.node.Node] = {}
+        self._loop_lag: cab_hist.Histogram = cab_hist.Histogram()
+        self._last_loop_lag: float = 0.0
+        self._reads: cab_hist.Histogram = cab_hist.Histogram()
+        self._writes: cab_hist.Histogram = cab_hist.Histogram()
+        self._service_starts: typing.Dict[int, float] = {}
+        self._cars: int = 0
+
+    @property
+    def loop_lag(self) -> cab_hist.Histogram:
+        return self._loop_lag
+
+    @property
+    def reads(self) -> cab_hist.Histogram:
+        return self._reads
+
+    @property
+    def writes(self) -> cab_hist.Histogram:
+        return self._writes
+
+    @property
+    def cars(self) -> int:
+        return self._cars
+
+    def add_car(self) -> None:
+        self._cars += 1
+
+    def snapshot(self) -> typing.Dict[str, typing.Union[int, float]]:
+        _values: typing.Dict[str, typing.Union[int, float]] = {
+            "LOOP_LAG": self._last_loop_lag,
+            "LOOP_LAG_MAX": self._loop_lag.max,
+            "READ_COUNT": self._reads.count,
+            "READ_LATENCY_MEAN": self._reads.mean,
+            "READ_LATENCY_MAX": self._reads.max,
+            "WRITE_COUNT": self._writes.count,
+            "WRITE_LATENCY_MEAN": self._writes.mean,
+            "WRITE_LATENCY_MAX": self._writes.max,
+            "ACTIVE_CARS": self._cars,
+        }
+        for name, group in self._server.scheduler.groups.items():
+            _label: str = name.upper()
+            _values[f"{_label}_TICKS"] = group.ticks
+            _values[f"{_label}_MISSED"] = group.missed
+            _values[f"{_label}_TICK_MEAN"] = group.durations.mean
+            _values[f"{_label}_TICK_P99"] = group.durations.quantile(0.99)
+            _values[f"{_label}_TICK_MAX"] = group.durations.max
+        return _values
+
+    def _service_started(
+        self,
+        event: asyncua.common.callback.ServerItemCallback,
+        dispatcher: asyncua.common.callback.CallbackService,
+    ) -> None:
+        # Only requests from OPC UA clients are counted, not the writes the
+        # server makes itself when publishing
+        if not event.is_external:
+            return
+        self._service_starts[id(event.request_params)] = time.perf_counter()
+
+    def _service_ended(
+        self,
+        event: asyncua.common.callback.ServerItemCallback,
+        dispatcher: asyncua.common.callback.CallbackService,
+    ) -> None:
+        _start: typing.Optional[float] = self._service_starts.pop(
+            id(event.request_params), None
+        )
+        if _start is None:
+            return
+        _histogram: cab_hist.Histogram = (
+            self._reads
+            if event.getName() == asyncua.common.callback.CallbackType.PostRead
+            else self._writes
+        )
+        _histogram.record(time.perf_counter() - _start)
+
+    async def setup(self) -> None:
+        # Imported here as the server itself imports this module
+        import cablecar.server as cab_server
+
+        self._namespace = await self._server.register_namespace(
+            "CableCarSim.Diagnostics"
+        )
+        self._objects = await self._server.add_object(
+            "DIAGNOSTICS",
+            "Diagnostics",
+            {
+                label: cab_server.VariableSpec(
+                    f"DIAGNOSTICS_{label}", label.replace("_", " ").title(), value
+                )
+                for label, value in self.snapshot().items()
+            },
+            namespace=self._namespace,
+        )
+        for event in (
+            asyncua.common.callback.CallbackType.PreRead,
+            asyncua.common.callback.CallbackType.PreWrite,
+        ):
+            self._server.subscribe_server_callback(event, self._service_started)
+        for event in (
+            asyncua.common.callback.CallbackType.PostRead,
+            asyncua.common.callback.CallbackType.PostWrite,
+        ):
+            self._server.subscribe_server_callback(event, self._service_ended)
+
+    def publish(self) -> None:
+        for label, value in self.snapshot().items():
+            self._server.publish(self._objects[label], value)
+
+    async def monitor(self) -> None:
+        _loop = asyncio.get_running_loop()
+        while self._server.running:
+            _expected: float = _loop.time() + self._interval
+            await asyncio.sleep(self._interval)
+            self._last_loop_lag = max(_loop.time() - _expected, 0.0)
+            self._loop_lag.record(self._last_loop_lag)
+            self.publish()
@@ -0,0 +1,259 @@
+import logging
+import typing
+
+import numpy
+
+import cablecar.car as cab_car
+import cablecar.route as cab_route
+
+
+class Fleet:
+    def __init__(self, route: cab_route.Route, capacity: int = 16) -> None:
+        self._logger: logging.Logger = logging.getLogger(
+            f"CableCarSim.{self.__class__.__name__}"
+        )
+        self._route: cab_route.Route = route
+        self._cars: typing.List[cab_car.CableCar] = []
+        self._size: int = 0
+        self._position: numpy.ndarray = numpy.zeros(capacity, dtype=numpy.float64)
+        self._speed: numpy.ndarray = numpy.zeros(capacity, dtype=numpy.float64)
+        self._acceleration: numpy.ndarray = numpy.zeros(capacity, dtype=numpy.float64)
+        self._grip: numpy.ndarray = numpy.full(
+            capacity, cab_car.GripState.RELEASED.value, dtype=numpy.int8
+        )
+        self._rail_brake: numpy.ndarray = numpy.zeros(capacity, dtype=bool)
+        self._shoe_brake: numpy.ndarray = numpy.zeros(capacity, dtype=bool)
+        self._rail_brake_factor: numpy.ndarray = numpy.ones(
+            capacity, dtype=numpy.float64
+        )
+        self._shoe_brake_factor: numpy.ndarray = numpy.ones(
+            capacity, dtype=numpy.float64
+        )
+        self._segment: numpy.ndarray = numpy.zeros(capacity, dtype=numpy.int64)
+        # Whether the location of each car has been published since it was
+        # added or reloaded, or since the stops of the route last changed
+        self._located: numpy.ndarray = numpy.zeros(capacity, dtype=bool)
+        self._stop_distances: numpy.ndarray = numpy.zeros(0, dtype=numpy.float64)
+        self._route_revision: int = -1
+        self._limit_hits: numpy.ndarray = numpy.zeros(0, dtype=numpy.int64)
+        self._route.winder.server.add_tick("physics", self.tick)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def positions(self) -> numpy.ndarray:
+        return self._position[: self._size]
+
+    @property
+    def speeds(self) -> numpy.ndarray:
+        return self._speed[: self._size]
+
+    @property
+    def segments(self) -> numpy.ndarray:
+        return self._segment[: self._size]
+
+    def _grow(self) -> None:
+        _capacity: int = max(2 * len(self._position), 1)
+        for attr, fill in (
+            ("_position", 0.0),
+            ("_speed", 0.0),
+            ("_acceleration", 0.0),
+            ("_grip", cab_car.GripState.RELEASED.value),
+            ("_rail_brake", False),
+            ("_shoe_brake", False),
+            ("_rail_brake_factor", 1.0),
+            ("_shoe_brake_factor", 1.0),
+            ("_segment", 0),
+            ("_located", False),
+        ):
+            _current: numpy.ndarray = getattr(self, attr)
+            _resized: numpy.ndarray = numpy.full(_capacity, fill, dtype=_current.dtype)
+            _resized[: len(_current)] = _current
+            setattr(self, attr, _resized)
+
+    def add_car(self, car: cab_car.CableCar, distance: float = 0.0) -> int:
+        if self._size == len(self._position):
+            self._grow()
+        _slot: int = self._size
+        self._position[_slot] = distance
+        self._speed[_slot] = 0.0
+        self._acceleration[_slot] = car._acceleration
+        self._grip[_slot] = cab_car.GripState.RELEASED.value
+        self._rail_brake[_slot] = False
+        self._shoe_brake[_slot] = False
+        self._rail_brake_factor[_slot] = car._brake_factor[
+            cab_car.Controller.RAIL_BRAKE_APPLY
+        ]
+        self._shoe_brake_factor[_slot] = car._brake_factor[
+            cab_car.Controller.SHOE_BRAKE_APPLY
+        ]
+        self._segment[_slot] = self._route.segment_index(distance)
+        self._located[_slot] = False
+        self._cars.append(car)
+        self._size += 1
+        return _slot
+
+    def reload(self, slot: int) -> None:
+        # Copies the whole state of a car back into its slot, e.g. after the
+        # car has been restored from a snapshot
+        _car: cab_car.CableCar = self._cars[slot]
+        self._position[slot] = _car.position
+        self._speed[slot] = _car.speed
+        self._acceleration[slot] = _car._acceleration
+        self._grip[slot] = _car.grip_state.value
+        self._rail_brake[slot] = _car.rail_brake
+        self._rail_brake_factor[slot] = _car._brake_factor[
+            cab_car.Controller.RAIL_BRAKE_APPLY
+        ]
+        self._shoe_brake_factor[slot] = _car._brake_factor[
+            cab_car.Controller.SHOE_BRAKE_APPLY
+        ]
+        self._segment[slot] = self._route.segment_index(_car.position)
+        self._located[slot] = False
+
+    def set_grip(self, slot: int, state: cab_car.GripState) -> None:
+        self._grip[slot] = state.value
+
+    def set_rail_brake(self, slot: int, set_on: bool) -> None:
+        self._rail_brake[slot] = set_on
+
+    def set_shoe_brake(self, slot: int, set_on: bool) -> None:
+        self._shoe_brake[slot] = set_on
+
+    def _refresh_stops(self) -> None:
+        if self._route_revision == self._route.revision:
+            return
+        self._stop_distances = numpy.frombuffer(
+            self._route.distances, dtype=numpy.float64
+        )
+        self._route_revision = self._route.revision
+        self._located[:] = False
+
+    def step(self, winder_speed: float, dt: float = 1.0) -> numpy.ndarray:
+        # Follows the same arithmetic as the drive tick of a single car, so
+        # that both engines give identical results
+        self._refresh_stops()
+        _n: int = self._size
+        _position: numpy.ndarray = self._position[:_n]
+        _speed: numpy.ndarray = self._speed[:_n]
+        _grip: numpy.ndarray = self._grip[:_n]
+        _limit: float = self._route.length
+        # Cars move along the cable direction while accelerating or coasting
+        _sign: float = 1.0 if winder_speed > 0 else -1.0
+
+        _at_limit: numpy.ndarray = (_position < 0.0) | (
+            (_position > _limit) & (_speed != 0.0)
+        )
+        _engaged: numpy.ndarray = (
+            _grip == cab_car.GripState.ENGAGED.value
+        ) & ~_at_limit
+        _accelerating: numpy.ndarray = _engaged & (
+            numpy.abs(_speed) < abs(winder_speed)
+        )
+        _cruising: numpy.ndarray = _engaged & ~_accelerating
+        _coasting: numpy.ndarray = ~_engaged & ~_at_limit & (_speed != 0.0)
+
+        # Engaged cars accelerate toward the cable speed, then move
+        _speed[_accelerating] += _sign * self._acceleration[:_n][_accelerating] * dt
+        _position[_accelerating] += _sign * _speed[_accelerating] * dt
+        _position[_cruising] += _speed[_cruising] * dt
+
+        # Released cars move at their current speed, then decelerate
+        _deceleration: numpy.ndarray = (
+            self._acceleration[:_n][_coasting]
+            * dt
+            * numpy.where(
+                self._rail_brake[:_n][_coasting],
+                self._rail_brake_factor[:_n][_coasting],
+                1.0,
+            )
+            * numpy.where(
+                self._shoe_brake[:_n][_coasting],
+                self._shoe_brake_factor[:_n][_coasting],
+                1.0,
+            )
+        )
+        _position[_coasting] += _sign * _speed[_coasting] * dt
+        _speed[_coasting] = numpy.copysign(
+            numpy.maximum(numpy.abs(_speed[_coasting]) - _deceleration, 0.0),
+            _speed[_coasting],
+        )
+
+        _position[_at_limit] = numpy.clip(_position[_at_limit], 0.0, _limit)
+        _speed[_at_limit] = 0.0
+        _grip[_at_limit] = cab_car.GripState.RELEASED.value
+
+        # Cars stopped at a route limit keep the location they last reported
+        _moving: numpy.ndarray = _engaged | _coasting
+        self._limit_hits = numpy.flatnonzero(_at_limit)
+        self._segment[:_n][_moving] = numpy.searchsorted(
+            self._stop_distances, _position[_moving], side="left"
+        )
+        return numpy.flatnonzero(_moving | _at_limit)
+
+    def _publish_values(
+        self, label: str, attr: str, slots: numpy.ndarray, values: numpy.ndarray
+    ) -> None:
+        # Mirrors the setter of each car, without waking or comparing, and
+        # queues all values in one call. Cars in a fleet never sleep and only
+        # the slots whose value changed are given.
+        _slots: typing.List[int] = slots.tolist()
+        _values: typing.List[float] = values[slots].tolist()
+        _log: bool = self._logger.isEnabledFor(logging.INFO)
+        _nodes: typing.List[typing.Any] = []
+        for slot, value in zip(_slots, _values):
+            _car: cab_car.CableCar = self._cars[slot]
+            setattr(_car, attr, value)
+            if _log:
+                _car._logger.info("%s=%s", label, value)
+            _nodes.append(_car._objects[label])
+        self._route.winder.server.publish_many(_nodes, _values)
+
+    def _publish(
+        self,
+        slots: numpy.ndarray,
+        speeds: numpy.ndarray,
+        positions: numpy.ndarray,
+        segments: numpy.ndarray,
+    ) -> None:
+        # 'speeds', 'positions' and 'segments' are the values of each slot
+        # before the step which moved 'slots'
+        _limit_hits: typing.List[int] = self._limit_hits.tolist()
+        for slot in _limit_hits:
+            self._cars[slot]._logger.info("Reached route limit, stopping")
+            self._cars[slot].grip_state = cab_car.GripState.RELEASED
+            self._cars[slot].controller = cab_car.Controller.NONE
+        self._publish_values(
+            "CURRENT_SPEED",
+            "_speed",
+            slots[self._speed[slots] != speeds[slots]],
+            self._speed,
+        )
+        self._publish_values(
+            "CURRENT_POSITION",
+            "_position",
+            slots[self._position[slots] != positions[slots]],
+            self._position,
+        )
+        if len(self._stop_distances) > 1:
+            # Cars stopped at a route limit keep the location they last
+            # reported
+            _relocated: numpy.ndarray = slots[
+                ((self._segment[slots] != segments[slots]) | ~self._located[slots])
+                & ~numpy.isin(slots, self._limit_hits)
+            ]
+            for slot in _relocated.tolist():
+                self._cars[slot].location = self._route.segment(
+                    int(self._segment[slot])
+                )
+            self._located[_relocated] = True
+
+    def tick(self, dt: float) -> None:
+        if not self._size:
+            return
+        _speeds: numpy.ndarray = self._speed[: self._size].copy()
+        _positions: numpy.ndarray = self._position[: self._size].copy()
+        _segments: numpy.ndarray = self._segment[: self._size].copy()
+        _slots: numpy.ndarray = self.step(self._route.winder.speed, dt)
+        self._publish(_slots, _speeds, _positions, _segments)
@@ -0,0 +1,131 @@
+import bisect
+import logging
+import math
+import typing
+
+import asyncua.common.node
+
+import cablecar.car as cab_car
+import cablecar.route as cab_route
+import cablecar.server as cab_server
+
+
+def _position(car: cab_car.CableCar) -> float:
+    return car.position
+
+
+class HeadwayMonitor:
+    def __init__(
+        self,
+        route: cab_route.Route,
+        min_headway: float = 20.0,
+        auto_brake: bool = False,
+    ) -> None:
+        self._logger: logging.Logger = logging.getLogger(
+            f"CableCarSim.{self.__class__.__name__}.{route.winder.name}"
+        )
+        self._route: cab_route.Route = route
+        self._server: cab_server.SimulationServer = route.winder.server
+        self._min_headway: float = min_headway
+        self._auto_brake: bool = auto_brake
+        # Cars ordered by position, kept sorted from one tick to the next so
+        # that re-sorting after the cars have moved is close to linear
+        self._order: typing.List[cab_car.CableCar] = []
+        self._conflicts: typing.Set[typing.Tuple[int, int]] = set()
+        # Positions of the cars at the previous tick, keyed by car number
+        self._positions: typing.Dict[int, float] = {}
+        self._headway: float = math.inf
+        self._objects: typing.Dict[str, asyncua.common.node.Node] = {}
+
+    @property
+    def headway(self) -> float:
+        return self._headway
+
+    @property
+    def conflicts(self) -> typing.Set[typing.Tuple[int, int]]:
+        return self._conflicts
+
+    async def setup(self) -> None:
+        _label: str = self._route.winder.name.upper()
+        self._objects = await self._server.add_object(
+            f"{_label}_HEADWAY",
+            f"{self._route.winder.name} Headway",
+            {
+                "MIN_HEADWAY": cab_server.VariableSpec(
+                    f"{_label}_MIN_HEADWAY", "Minimum Headway", -1.0
+                ),
+                "CONFLICT": cab_server.VariableSpec(
+                    f"{_label}_CONFLICT", "Headway Conflict", False
+                ),
+                "CONFLICT_CARS": cab_server.VariableSpec(
+                    f"{_label}_CONFLICT_CARS", "Cars in Conflict", ""
+                ),
+            },
+            kind="headway",
+        )
+        self._server.scheduler["physics"].add_listener(self.tick)
+
+    def add_car(self, car: cab_car.CableCar) -> None:
+        bisect.insort(self._order, car, key=_position)
+
+    def remove_car(self, car: cab_car.CableCar) -> None:
+        self._order.remove(car)
+
+    def _brake(self, behind: cab_car.CableCar, ahead: cab_car.CableCar) -> None:
+        # Cars are only braked while the gap between them is shrinking, and
+        # then only the follower, the car moving the most towards the other.
+        # This is decided from how far each car moved since the previous tick
+        # as cars accelerating against the cable still gain position.
+        if behind.number not in self._positions or ahead.number not in self._positions:
+            return
+        _closing: typing.Tuple[float, float] = (
+            behind.position - self._positions[behind.number],
+            self._positions[ahead.number] - ahead.position,
+        )
+        if sum(_closing) <= 0.0:
+            return
+        _car: cab_car.CableCar = behind if _closing[0] >= _closing[1] else ahead
+        if _car.speed and not _car.rail_brake:
+            self._logger.warning("Applying rail brake of car %d", _car.number)
+            _car.command(cab_car.Controller.RAIL_BRAKE_APPLY)
+
+    def tick(self, dt: float) -> None:
+        self._order.sort(key=_position)
+        _headway: float = math.inf
+        _conflicts: typing.Set[typing.Tuple[int, int]] = set()
+        _previous: typing.Optional[cab_car.CableCar] = None
+        for car in self._order:
+            if _previous is not None:
+                _gap: float = car.position - _previous.position
+                _headway = min(_headway, _gap)
+                if _gap < self._min_headway:
+                    # Pairs are keyed independently of their order so that
+                    # one car passing another is not reported as a new conflict
+                    _conflicts.add(
+                        (
+                            min(_previous.number, car.number),
+                            max(_previous.number, car.number),
+                        )
+                    )
+                    if self._auto_brake:
+                        self._brake(_previous, car)
+            _previous = car
+        for behind, ahead in _conflicts - self._conflicts:
+            self._logger.warning(
+                "Cars %d and %d are within %sm of each other",
+                behind,
+                ahead,
+                self._min_headway,
+            )
+        self._conflicts = _conflicts
+        self._positions = {car.number: car.position for car in self._order}
+        self._headway = _headway
+        # A headway of -1 is published while there are fewer than two cars
+        self._server.publish(
+            self._objects["MIN_HEADWAY"], -1.0 if math.isinf(_headway) else _headway
+        )
+        self._server.publish(self._objects["CONFLICT"], bool(_conflicts))
+        self._server.publish(
+            self._objects["CONFLICT_CARS"],
+            ",".join(f"{i}-{j}" for i, j in sorted(_conflicts)),
+        )
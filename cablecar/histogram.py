@@ -0,0 +1,45 @@
+import bisect
+import typing
+
+
+class Histogram:
+    # Bucket upper bounds in seconds, doubling from one microsecond
+    BOUNDS: typing.Tuple[float, ...] = tuple(1e-6 * 2**i for i in range(28))
+
+    def __init__(self) -> None:
+        self._counts: typing.List[int] = [0] * (len(self.BOUNDS) + 1)
+        self._count: int = 0
+        self._total: float = 0.0
+        self._max: float = 0.0
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def mean(self) -> float:
+        return self._total / self._count if self._count else 0.0
+
+    @property
+    def max(self) -> float:
+        return self._max
+
+    def record(self, value: float) -> None:
+        self._counts[bisect.bisect_left(self.BOUNDS, value)] += 1
+        self._count += 1
+        self._total += value
+        self._max = max(self._max, value)
+
+    def quantile(self, fraction: float) -> float:
+        if not self._count:
+            return 0.0
+        _target: float = fraction * self._count
+        _cumulative: int = 0
+        for bound, count in zip(self.BOUNDS, self._counts):
+            _cumulative += count
+            if _cumulative >= _target:
+                return min(bound, self._max)
+        return self._max
+
+    def buckets(self) -> typing.Dict[float, int]:
+        return dict(zip(self.BOUNDS + (float("inf"),), self._counts))
@@ -0,0 +1,229 @@
+import asyncio
+import concurrent.futures
+import datetime
+import logging
+import sqlite3
+import typing
+
+import asyncua.common.utils
+import asyncua.server.history
+import asyncua.ua
+import asyncua.ua.ua_binary
+
+# Timestamps in the database are integer microseconds since the Unix epoch,
+# the naive datetimes used by asyncua are all in UTC
+_EPOCH: datetime.datetime = datetime.datetime(1970, 1, 1)
+_MICROSECOND: datetime.timedelta = datetime.timedelta(microseconds=1)
+
+_SCHEMA: typing.Tuple[str, ...] = (
+    """CREATE TABLE IF NOT EXISTS history (
+        node TEXT NOT NULL,
+        source_time INTEGER NOT NULL,
+        server_time INTEGER,
+        status INTEGER NOT NULL,
+        value BLOB NOT NULL
+    )""",
+    # Every HistoryRead is a time range query on a single node
+    "CREATE INDEX IF NOT EXISTS history_node_time ON history (node, source_time)",
+)
+
+
+def _to_timestamp(value: typing.Optional[datetime.datetime]) -> typing.Optional[int]:
+    return None if value is None else (value - _EPOCH) // _MICROSECOND
+
+
+def _from_timestamp(value: typing.Optional[int]) -> typing.Optional[datetime.datetime]:
+    return None if value is None else _EPOCH + value * _MICROSECOND
+
+
+class SQLiteHistory(asyncua.server.history.HistoryStorageInterface):
+    def __init__(
+        self,
+        path: str = "history.db",
+        commit_interval: float = 5.0,
+        max_history_data_response_size: int = 10000,
+    ) -> None:
+        super().__init__(max_history_data_response_size)
+        self._logger: logging.Logger = logging.getLogger(
+            f"CableCarSim.{self.__class__.__name__}"
+        )
+        self._path: str = path
+        self._commit_interval: float = commit_interval
+        self._retention: typing.Dict[str, datetime.timedelta] = {}
+        self._pending: typing.List[
+            typing.Tuple[str, int, typing.Optional[int], int, bytes]
+        ] = []
+        self._connection: typing.Optional[sqlite3.Connection] = None
+        # All database access happens on one worker thread so that neither
+        # commits nor queries block the event loop
+        self._executor: concurrent.futures.ThreadPoolExecutor = (
+            concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="CableCarSim-history"
+            )
+        )
+        self._committer: typing.Optional[asyncio.Task] = None
+
+    async def _run(self, function: typing.Callable, *args) -> typing.Any:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, function, *args
+        )
+
+    def _connect(self) -> None:
+        self._connection = sqlite3.connect(self._path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._connection.execute(statement)
+        self._connection.commit()
+
+    async def init(self) -> None:
+        await self._run(self._connect)
+        self._committer = asyncio.create_task(self._commit_periodically())
+
+    async def new_historized_node(
+        self, node_id: asyncua.ua.NodeId, period: datetime.timedelta, count: int = 0
+    ) -> None:
+        # Retention is by age only, 'count' limits are not supported
+        self._retention[node_id.to_string()] = period
+
+    async def save_node_value(
+        self, node_id: asyncua.ua.NodeId, datavalue: asyncua.ua.DataValue
+    ) -> None:
+        # Values are only buffered here and written by the next batch commit
+        _source_time = (
+            datavalue.SourceTimestamp
+            or datavalue.ServerTimestamp
+            or datetime.datetime.utcnow()
+        )
+        self._pending.append(
+            (
+                node_id.to_string(),
+                _to_timestamp(_source_time),
+                _to_timestamp(datavalue.ServerTimestamp),
+                datavalue.StatusCode.value,
+                asyncua.ua.ua_binary.variant_to_binary(datavalue.Value),
+            )
+        )
+
+    def _write(
+        self,
+        rows: typing.List[typing.Tuple[str, int, typing.Optional[int], int, bytes]],
+        cutoffs: typing.List[typing.Tuple[str, int]],
+    ) -> None:
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO history VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._connection.executemany(
+                "DELETE FROM history WHERE node = ? AND source_time < ?", cutoffs
+            )
+
+    async def commit(self) -> None:
+        _rows, self._pending = self._pending, []
+        _now: datetime.datetime = datetime.datetime.utcnow()
+        _cutoffs: typing.List[typing.Tuple[str, int]] = [
+            (node, _to_timestamp(_now - period))
+            for node, period in self._retention.items()
+            if period
+        ]
+        await self._run(self._write, _rows, _cutoffs)
+
+    async def _commit_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self._commit_interval)
+            try:
+                await self.commit()
+            except sqlite3.Error as error:
+                self._logger.error("Failed to commit history: %s", error)
+
+    def _query(
+        self, node: str, start: int, end: int, descending: bool, limit: int
+    ) -> typing.List[typing.Tuple[int, typing.Optional[int], int, bytes]]:
+        return self._connection.execute(
+            "SELECT source_time, server_time, status, value FROM history "
+            "WHERE node = ? AND source_time BETWEEN ? AND ? "
+            f"ORDER BY source_time {'DESC' if descending else 'ASC'} LIMIT ?",
+            (node, start, end, limit),
+        ).fetchall()
+
+    async def read_node_history(
+        self,
+        node_id: asyncua.ua.NodeId,
+        start: typing.Optional[datetime.datetime],
+        end: typing.Optional[datetime.datetime],
+        nb_values: int,
+    ) -> typing.Tuple[
+        typing.List[asyncua.ua.DataValue], typing.Optional[datetime.datetime]
+    ]:
+        # Buffered values are committed first so that reads include them
+        await self.commit()
+        _descending: bool = start is None or start == asyncua.ua.get_win_epoch()
+        if _descending:
+            start = asyncua.ua.get_win_epoch()
+        if end is None or end == asyncua.ua.get_win_epoch():
+            end = datetime.datetime.utcnow() + datetime.timedelta(days=1)
+        if start > end:
+            _descending = True
+            start, end = end, start
+        # One row beyond the response size is fetched to find the
+        # continuation point
+        _limit: int = self.max_history_data_response_size + 1
+        if nb_values:
+            _limit = min(nb_values, _limit)
+        _rows = await self._run(
+            self._query,
+            node_id.to_string(),
+            _to_timestamp(start),
+            _to_timestamp(end),
+            _descending,
+            _limit,
+        )
+        _values: typing.List[asyncua.ua.DataValue] = [
+            asyncua.ua.DataValue(
+                asyncua.ua.ua_binary.variant_from_binary(
+                    asyncua.common.utils.Buffer(value)
+                ),
+                StatusCode_=asyncua.ua.StatusCode(status),
+                SourceTimestamp=_from_timestamp(source_time),
+                ServerTimestamp=_from_timestamp(server_time),
+            )
+            for source_time, server_time, status, value in _rows
+        ]
+        _continuation: typing.Optional[datetime.datetime] = None
+        if len(_values) > self.max_history_data_response_size:
+            _continuation = _values[self.max_history_data_response_size].SourceTimestamp
+            _values = _values[: self.max_history_data_response_size]
+        return _values, _continuation
+
+    async def new_historized_event(
+        self,
+        source_id: asyncua.ua.NodeId,
+        evtypes: typing.List[asyncua.ua.NodeId],
+        period: datetime.timedelta,
+        count: int = 0,
+    ) -> None:
+        # Events are not historized, enabling it on a node is accepted so
+        # that the server can still be set up with the default settings
+        self._logger.debug("Event history is not supported")
+
+    async def save_event(self, event: typing.Any) -> None:
+        pass
+
+    async def read_event_history(
+        self,
+        source_id: asyncua.ua.NodeId,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        nb_values: int,
+        evfilter: typing.Any,
+    ) -> typing.Tuple[typing.List[typing.Any], typing.Optional[datetime.datetime]]:
+        self._logger.warning("Event history is not supported")
+        return [], None
+
+    async def stop(self) -> None:
+        if self._committer:
+            self._committer.cancel()
+            await asyncio.gather(self._committer, return_exceptions=True)
+        await self.commit()
+        await self._run(self._connection.close)
+        self._executor.shutdown()
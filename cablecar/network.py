@@ -0,0 +1,117 @@
+import datetime
+import logging
+import multiprocessing
+import os
+import typing
+
+import cablecar.simulation as cab_sim
+import cablecar.telemetry as cab_telemetry
+
+
+class ShardOptions(typing.NamedTuple):
+    fleet: bool = False
+    event_driven: bool = False
+    speedup: float = 1.0
+    step: bool = False
+    headless: bool = False
+    tick_rates: typing.Optional[typing.Dict[str, float]] = None
+    duration: typing.Optional[float] = None
+    record: typing.Optional[str] = None
+    history: typing.Optional[str] = None
+    history_retention: float = 24.0
+    snapshot: typing.Optional[str] = None
+    snapshot_interval: typing.Optional[float] = None
+    restore: typing.Optional[str] = None
+    shared_state: typing.Optional[str] = None
+    shared_state_file: bool = False
+    min_headway: typing.Optional[float] = None
+    auto_brake: bool = False
+    profile: typing.Optional[str] = None
+    cars: int = 1
+    log_level: str = "WARNING"
+    log_interval: float = 0.0
+    log_changes_only: bool = False
+
+
+def _line_path(path: typing.Optional[str], configuration: str) -> typing.Optional[str]:
+    if not path:
+        return None
+    _root, _extension = os.path.splitext(path)
+    return f"{_root}_{configuration}{_extension}"
+
+
+def _run_line(configuration: str, port: int, options: ShardOptions) -> None:
+    # Each worker process has its own logging setup, event loop and server
+    _listener = cab_telemetry.start_logging(
+        options.log_level, options.log_interval, options.log_changes_only
+    )
+    # Each line keeps its history, snapshot, shared state and profile in its
+    # own file or block, named after the line
+    _history: typing.Optional[str] = _line_path(options.history, configuration)
+    _snapshot: typing.Optional[str] = _line_path(options.snapshot, configuration)
+    _restore: typing.Optional[str] = _line_path(options.restore, configuration)
+    _shared_state: typing.Optional[str] = (
+        _line_path(options.shared_state, configuration)
+        if options.shared_state_file
+        else options.shared_state and f"{options.shared_state}_{configuration}"
+    )
+    try:
+        with cab_sim.Simulation(
+            configuration,
+            fleet=options.fleet,
+            event_driven=options.event_driven,
+            clock=cab_sim.make_clock(options.speedup, options.step),
+            headless=options.headless,
+            tick_rates=options.tick_rates,
+            port=port,
+            record=(
+                os.path.join(options.record, configuration) if options.record else None
+            ),
+            history=_history,
+            history_retention=datetime.timedelta(hours=options.history_retention),
+            shared_state=_shared_state,
+            shared_state_file=options.shared_state_file,
+            snapshot=_snapshot,
+            snapshot_interval=options.snapshot_interval,
+            min_headway=options.min_headway,
+            auto_brake=options.auto_brake,
+            profile=options.profile and f"{options.profile}_{configuration}",
+        ) as cabsim:
+            if _restore:
+                cabsim.restore(_restore)
+            else:
+                for _ in range(options.cars):
+                    cabsim.add_car()
+            cabsim.run_simulation(options.duration)
+    finally:
+        _listener.stop()
+
+
+def run_lines(
+    configurations: typing.Sequence[str],
+    base_port: int = 4080,
+    options: ShardOptions = ShardOptions(),
+) -> typing.Dict[str, int]:
+    _logger: logging.Logger = logging.getLogger("CableCarSim.Network")
+    # Workers are spawned rather than forked as the parent may already be
+    # running the logging listener thread
+    _context = multiprocessing.get_context("spawn")
+    _workers: typing.Dict[str, multiprocessing.process.BaseProcess] = {}
+    for offset, configuration in enumerate(configurations):
+        _port: int = base_port + offset
+        _logger.info("Starting line '%s' on port %d", configuration, _port)
+        _workers[configuration] = _context.Process(
+            target=_run_line,
+            args=(configuration, _port, options),
+            name=f"CableCarSim-{configuration}",
+        )
+        _workers[configuration].start()
+    try:
+        for worker in _workers.values():
+            worker.join()
+    except KeyboardInterrupt:
+        # Workers share the process group of the parent and so receive the
+        # interrupt themselves, wait for them to shut down cleanly
+        for worker in _workers.values():
+            worker.join()
+    return {name: worker.exitcode for name, worker in _workers.items()}
@@ -1,9 +1,8 @@
-import asyncio
 import enum
 import logging
 import typing
 
-import asyncua.sync
+import asyncua.common.node
 
 import cablecar
 import cablecar.common as cab_com
@@ -23,7 +22,30 @@ class Controller(enum.Enum):
     NONE = enum.auto()
 
 
+class WinderState(typing.NamedTuple):
+    name: str
+    status: Status
+    controller: Controller
+    direction: cab_com.Direction
+    speed: float
+    max_speed: float
+
+
 class Winder:
+    __slots__ = (
+        "_logger",
+        "_name",
+        "_objects",
+        "_max_speed",
+        "_server",
+        "_direction",
+        "_namespace",
+        "_speed",
+        "_status",
+        "_controller",
+        "_listeners",
+    )
+
     def __init__(
         self, name: str, server: cab_server.SimulationServer, speed: float = 4.25
     ) -> None:
@@ -31,109 +53,158 @@ class Winder:
             f"CableCarSim.{self.__class__.__name__}.{name}"
         )
         self._name = name
-        self._objects: typing.Dict[str, asyncua.sync.SyncNode] = {}
+        self._objects: typing.Dict[str, asyncua.common.node.Node] = {}
         self._max_speed = speed
         self._server: cab_server.SimulationServer = server
         self._direction = cab_com.Direction.FORWARD
-        self._namespace: int = self._server.register_namespace(
-            f"{self.__class__.__name__}.{self._name}"
-        )
-        self._create_objects()
-        self._server.add_task(self.listener)
-        self._server.add_task(self.speed_setter)
+        self._speed: float = 0.0
+        self._status: Status = Status.STOPPED
+        self._controller: Controller = Controller.NONE
+        self._namespace: typing.Optional[int] = None
+        # Called with the new speed of the cable whenever it changes
+        self._listeners: typing.Dict[typing.Callable[[float], None], None] = {}
+
+    async def setup(self) -> None:
+        self._namespace = self._server.namespace
+        await self._create_objects()
+        await self._server.historize(self._objects["SPEED"])
 
     @property
     def speed(self) -> float:
-        return self._objects["SPEED"].get_value()
+        return self._speed
 
     @speed.setter
     @cablecar.ignore_no_change
     def speed(self, value: float) -> None:
-        self._logger.info(f"SPEED={value}")
-        self._objects["SPEED"].set_value(value)
+        self._logger.info("SPEED=%s", value)
+        self._speed = value
+        self._server.publish(self._objects["SPEED"], value)
+        for listener in tuple(self._listeners):
+            listener(value)
+
+    def add_listener(self, callback: typing.Callable[[float], None]) -> None:
+        self._listeners[callback] = None
+
+    def remove_listener(self, callback: typing.Callable[[float], None]) -> None:
+        self._listeners.pop(callback, None)
+
+    @property
+    def name(self) -> str:
+        return self._name
 
     @property
     def server(self) -> cab_server.SimulationServer:
         return self._server
 
-    def _create_objects(self) -> None:
-        self._objects["STATUS"] = self._server.add_variable(
-            self._namespace,
-            f"{self._name.upper()}_STATUS",
-            f"{self._name} Winder Status",
-            cablecar.enum_member_str(Status.STOPPED),
-        )
-
-        self._objects["CONTROLLER"] = self._server.add_variable(
-            self._namespace,
-            f"{self._name.upper()}_CONTROLLER",
-            f"{self._name} Winder Controller",
-            cablecar.enum_member_str(Controller.NONE),
-        )
-
-        self._objects["SPEED"] = self._server.add_variable(
-            self._namespace,
-            f"{self._name.upper()}_SPEED",
-            f"{self._name} Winder Speed",
-            0.0,
+    async def _create_objects(self) -> None:
+        self._objects = await self._server.add_object(
+            self._name.upper(),
+            f"{self._name} Winder",
+            {
+                "STATUS": cab_server.VariableSpec(
+                    f"{self._name.upper()}_STATUS",
+                    f"{self._name} Winder Status",
+                    cablecar.enum_member_str(Status.STOPPED),
+                ),
+                "CONTROLLER": cab_server.VariableSpec(
+                    f"{self._name.upper()}_CONTROLLER",
+                    f"{self._name} Winder Controller",
+                    cablecar.enum_member_str(Controller.NONE),
+                    writable=True,
+                ),
+                "SPEED": cab_server.VariableSpec(
+                    f"{self._name.upper()}_SPEED",
+                    f"{self._name} Winder Speed",
+                    0.0,
+                ),
+            },
+            kind="winder",
         )
-
-        self._objects["CONTROLLER"].set_writable()
+        await self._server.watch(self._objects["CONTROLLER"], self._receive_controller)
 
     @property
     def status(self) -> Status:
-        return getattr(Status, self._objects["STATUS"].get_value())
+        return self._status
 
     @property
     def controller(self) -> Controller:
-        return getattr(Controller, self._objects["CONTROLLER"].get_value())
+        return self._controller
 
     @controller.setter
     @cablecar.ignore_no_change
     def controller(self, value: Controller) -> None:
-        self._logger.info(f"CONTROLLER={value}")
-        self._objects["CONTROLLER"].set_value(cablecar.enum_member_str(value))
+        self._logger.info("CONTROLLER=%s", value)
+        self._controller = value
+        self._server.publish(
+            self._objects["CONTROLLER"], cablecar.enum_member_str(value)
+        )
+
+    def _receive_controller(self, value: str) -> None:
+        try:
+            self._controller = Controller[value]
+        except KeyError:
+            self._controller = Controller.NONE
+            self._server.publish(
+                self._objects["CONTROLLER"], cablecar.enum_member_str(Controller.NONE)
+            )
+        self._on_controller()
 
     @status.setter
     @cablecar.ignore_no_change
     def status(self, value: Status) -> None:
-        self._logger.info(f"STATUS={value}")
-        self._objects["STATUS"].set_value(cablecar.enum_member_str(value))
+        self._logger.info("STATUS=%s", value)
+        self._status = value
+        self._server.publish(self._objects["STATUS"], cablecar.enum_member_str(value))
+        self._update_speed()
 
     async def stop(self) -> None:
         self.status = Status.STOPPED
 
-    async def speed_setter(self) -> None:
-        while self._server.running:
-            await asyncio.sleep(0.5)
-            if self.status == Status.CLOCKWISE:
-                self.speed = self._max_speed
-            elif self.status == Status.COUNTER_CLOCKWISE:
-                self.speed = -self._max_speed
+    def state(self) -> WinderState:
+        return WinderState(
+            self._name,
+            self._status,
+            self._controller,
+            self._direction,
+            self._speed,
+            self._max_speed,
+        )
+
+    def restore(self, state: WinderState) -> None:
+        self._max_speed = state.max_speed
+        self._direction = state.direction
+        # Not published, as that would carry out the command again
+        self._controller = state.controller
+        self.status = state.status
+        self.speed = state.speed
+
+    def _update_speed(self) -> None:
+        if self.status == Status.CLOCKWISE:
+            self.speed = self._max_speed
+        elif self.status == Status.COUNTER_CLOCKWISE:
+            self.speed = -self._max_speed
+        else:
+            self.speed = 0.0
+
+    def _on_controller(self) -> None:
+        if self.controller == Controller.NONE:
+            return
+        elif self.controller == Controller.OFF:
+            self.status = Status.STOPPED
+        elif self.controller == Controller.SWITCH_DIRECTION:
+            if self.status != Status.STOPPED:
+                return
+            if self._direction == cab_com.Direction.FORWARD:
+                self._direction = cab_com.Direction.REVERSE
+                self.status = Status.COUNTER_CLOCKWISE
+            else:
+                self._direction = cab_com.Direction.FORWARD
+                self.status = Status.CLOCKWISE
+        elif self.controller == Controller.ON:
+            if self.status != Status.STOPPED:
+                return
+            if self._direction == cab_com.Direction.FORWARD:
+                self.status = Status.CLOCKWISE
             else:
-                self.speed = 0.0
-
-    async def listener(self) -> None:
-        while self._server.running:
-            await asyncio.sleep(0.5)
-            if self.controller == Controller.NONE:
-                continue
-            elif self.controller == Controller.OFF:
-                self.status = Status.STOPPED
-            elif self.controller == Controller.SWITCH_DIRECTION:
-                if self.status != Status.STOPPED:
-                    continue
-                if self._direction == cab_com.Direction.FORWARD:
-                    self._direction = cab_com.Direction.REVERSE
-                    self.status = Status.COUNTER_CLOCKWISE
-                else:
-                    self._direction = cab_com.Direction.FORWARD
-                    self.status = Status.CLOCKWISE
-            elif self.controller == Controller.ON:
-                if self.status != Status.STOPPED:
-                    continue
-                if self._direction == cab_com.Direction.FORWARD:
-                    self.status = Status.CLOCKWISE
-                else:
-                    self.status = Status.COUNTER_CLOCKWISE
-            self.controller = Controller.NONE
+                self.status = Status.COUNTER_CLOCKWISE
+        self.controller = Controller.NONE
@@ -0,0 +1,240 @@
+import asyncio
+import asyncio.events
+import collections
+import inspect
+import marshal
+import os
+import selectors
+import signal
+import time
+import types
+import typing
+
+import asyncua
+
+import cablecar.scheduler as cab_sched
+
+# Samples are taken every this many seconds of CPU time
+SAMPLE_INTERVAL: float = 0.001
+
+CATEGORIES: typing.Tuple[str, ...] = ("simulation", "opcua", "other")
+
+_ASYNCIO: str = os.path.dirname(asyncio.__file__)
+_EVENTS: str = asyncio.events.__file__
+_ASYNCUA: str = os.path.dirname(asyncua.__file__)
+_CABLECAR: str = os.path.dirname(__file__)
+_SELECTORS: str = selectors.__file__
+_SCHEDULER: str = cab_sched.__file__
+_INSPECT: str = inspect.__file__
+
+# Label of samples taken outside any callback of the event loop
+_LOOP: str = "event loop"
+
+FunctionKey = typing.Tuple[str, int, str]
+
+
+def _name(code: types.CodeType) -> str:
+    # Qualified names are only available from Python 3.11
+    return getattr(code, "co_qualname", code.co_name)
+
+
+def _key(code: types.CodeType) -> FunctionKey:
+    return (code.co_filename, code.co_firstlineno, _name(code))
+
+
+class _Sample(typing.NamedTuple):
+    label: str
+    category: str
+    # Code objects of the stack from the outermost frame inwards
+    stack: typing.Tuple[types.CodeType, ...]
+
+
+class Profiler:
+    def __init__(self, interval: float = SAMPLE_INTERVAL) -> None:
+        # Sampled on a CPU time interval timer, so that time spent waiting
+        # for I/O is not sampled at all and the samples are taken in the
+        # thread running the event loop rather than competing with it for
+        # the GIL
+        if not hasattr(signal, "setitimer"):
+            raise RuntimeError("Profiling is not supported on this platform")
+        self._interval: float = interval
+        self._handler: typing.Any = None
+        self._started: typing.Optional[float] = None
+        # Number of samples and seconds of CPU time of each distinct stack
+        self._samples: typing.Dict[_Sample, typing.List[float]] = {}
+        self._idle: float = 0.0
+        self._elapsed: float = 0.0
+        self._cpu_time: float = 0.0
+
+    def start(self) -> None:
+        # Signal handlers only run in the main thread, which must therefore
+        # be the one running the event loop
+        self._handler = signal.signal(signal.SIGPROF, self._take_sample)
+        signal.setitimer(signal.ITIMER_PROF, self._interval, self._interval)
+        self._started = time.perf_counter()
+        self._cpu_time = time.process_time()
+
+    def stop(self) -> None:
+        if self._started is None:
+            return
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._handler)
+        self._elapsed += time.perf_counter() - self._started
+        self._started = None
+
+    def _take_sample(
+        self, signum: int, frame: typing.Optional[types.FrameType]
+    ) -> None:
+        # Timer signals are delivered at the resolution of the kernel and may
+        # be merged, so each sample stands for the CPU time since the last
+        _now: float = time.process_time()
+        _dt: float = _now - self._cpu_time
+        self._cpu_time = _now
+        if frame is None:
+            return
+        _sample: typing.Optional[_Sample] = self._sample(frame)
+        if _sample is None:
+            self._idle += _dt
+            return
+        _totals: typing.List[float] = self._samples.setdefault(_sample, [0, 0.0])
+        _totals[0] += 1
+        _totals[1] += _dt
+
+    def _sample(self, frame: types.FrameType) -> typing.Optional[_Sample]:
+        _codes: typing.List[types.CodeType] = []
+        _frame: typing.Optional[types.FrameType] = frame
+        while _frame is not None:
+            _codes.append(_frame.f_code)
+            _frame = _frame.f_back
+        _codes.reverse()
+        # Polling for I/O is the event loop waiting rather than working
+        if any(
+            i.co_filename == _SELECTORS and i.co_name == "select" for i in _codes[-3:]
+        ):
+            return None
+        # Frames up to the handle run by the event loop are the same for
+        # every sample and are dropped
+        _start: int = 0
+        for i, code in enumerate(_codes):
+            if code.co_filename == _EVENTS and code.co_name == "_run":
+                _start = i + 1
+        _stack: typing.Tuple[types.CodeType, ...] = tuple(_codes[_start:])
+        return _Sample(
+            self._label(_stack, bool(_start)), self._category(_stack), _stack
+        )
+
+    def _label(self, stack: typing.Sequence[types.CodeType], in_handle: bool) -> str:
+        if not in_handle:
+            return _LOOP
+        # Time spent in a tick callback is attributed to that callback, so
+        # that e.g. the drive ticks of all cars are grouped together
+        for caller, code in zip(stack, stack[1:]):
+            if (
+                caller.co_filename == _SCHEDULER
+                and caller.co_name == "_run_callbacks"
+                and code.co_filename != _INSPECT
+            ):
+                return _name(code)
+        # Otherwise to the outermost coroutine of the task, or to the
+        # protocol or callback run by the event loop
+        for code in stack:
+            if not code.co_filename.startswith(_ASYNCIO):
+                return _name(code)
+        return _LOOP
+
+    def _category(self, stack: typing.Sequence[types.CodeType]) -> str:
+        # The innermost package decides, so simulation code writing values
+        # to the address space counts as OPC UA work
+        for code in reversed(stack):
+            if code.co_filename.startswith(_ASYNCUA):
+                return "opcua"
+            if code.co_filename.startswith(_CABLECAR):
+                return "simulation"
+        return "other"
+
+    @property
+    def cpu_time(self) -> float:
+        return sum(i[1] for i in self._samples.values())
+
+    def by_label(self) -> typing.Dict[str, float]:
+        _times: typing.Dict[str, float] = collections.defaultdict(float)
+        for sample, (_, seconds) in self._samples.items():
+            _times[sample.label] += seconds
+        return dict(sorted(_times.items(), key=lambda i: -i[1]))
+
+    def by_category(self) -> typing.Dict[str, float]:
+        _times: typing.Dict[str, float] = dict.fromkeys(CATEGORIES, 0.0)
+        for sample, (_, seconds) in self._samples.items():
+            _times[sample.category] += seconds
+        return _times
+
+    def summary(self, limit: int = 15) -> str:
+        _cpu: float = self.cpu_time or 1.0
+        _lines: typing.List[str] = [
+            f"Profiled {self._elapsed:.2f}s, {self.cpu_time:.2f}s of CPU time in "
+            f"callbacks and {self._idle:.2f}s polling for I/O",
+            "",
+            f"{'Task':<48}{'CPU (s)':>10}{'%':>8}",
+        ]
+        for label, seconds in list(self.by_label().items())[:limit]:
+            _lines.append(f"{label:<48}{seconds:>10.3f}{100 * seconds / _cpu:>8.1f}")
+        _lines += ["", f"{'Category':<48}{'CPU (s)':>10}{'%':>8}"]
+        for category, seconds in self.by_category().items():
+            _lines.append(f"{category:<48}{seconds:>10.3f}{100 * seconds / _cpu:>8.1f}")
+        return "\n".join(_lines)
+
+    def write_collapsed(self, path: str) -> None:
+        # One line per stack, outermost frame first, as read by flamegraph.pl
+        # and speedscope, rooted at the category and the task
+        _counts: typing.Dict[str, int] = collections.defaultdict(int)
+        for sample, (count, _) in self._samples.items():
+            _frames: typing.List[str] = [sample.category, sample.label] + [
+                f"{_name(code)} ({os.path.basename(code.co_filename)}"
+                f":{code.co_firstlineno})"
+                for code in sample.stack
+            ]
+            _counts[";".join(i.replace(";", ":") for i in _frames)] += int(count)
+        with open(path, "w") as out_f:
+            for stack, count in sorted(_counts.items()):
+                out_f.write(f"{stack} {count}\n")
+
+    def write_pstats(self, path: str) -> None:
+        # Written in the format of cProfile, with each task as a caller of
+        # its outermost frame and the number of samples in place of calls
+        _stats: typing.Dict[FunctionKey, typing.List[typing.Any]] = {}
+
+        def _entry(key: FunctionKey) -> typing.List[typing.Any]:
+            return _stats.setdefault(key, [0, 0, 0.0, 0.0, {}])
+
+        for sample, (count, _seconds) in self._samples.items():
+            _keys: typing.List[FunctionKey] = [("~", 0, f"<{sample.label}>")] + [
+                _key(code) for code in sample.stack
+            ]
+            _entry(_keys[-1])[2] += _seconds
+            # Recursive functions are only counted once per sample
+            _seen: typing.Set[FunctionKey] = set()
+            for i, key in enumerate(_keys):
+                _stats_entry: typing.List[typing.Any] = _entry(key)
+                if key not in _seen:
+                    _seen.add(key)
+                    _stats_entry[0] += int(count)
+                    _stats_entry[1] += int(count)
+                    _stats_entry[3] += _seconds
+                if i:
+                    _nc, _cc, _tt, _ct = _stats_entry[4].get(
+                        _keys[i - 1], (0, 0, 0.0, 0.0)
+                    )
+                    _stats_entry[4][_keys[i - 1]] = (
+                        _nc + int(count),
+                        _cc + int(count),
+                        _tt + (_seconds if i == len(_keys) - 1 else 0.0),
+                        _ct + _seconds,
+                    )
+        with open(path, "wb") as out_f:
+            marshal.dump({key: tuple(value) for key, value in _stats.items()}, out_f)
+
+    def write(self, prefix: str) -> typing.Tuple[str, str]:
+        _paths: typing.Tuple[str, str] = (f"{prefix}.pstats", f"{prefix}.collapsed")
+        self.write_pstats(_paths[0])
+        self.write_collapsed(_paths[1])
+        return _paths
@@ -0,0 +1,244 @@
+import json
+import logging
+import os
+import typing
+
+import numpy
+
+import cablecar.car as cab_car
+import cablecar.power as cab_power
+import cablecar.route as cab_route
+import cablecar.server as cab_server
+
+FORMAT_VERSION: int = 1
+
+# Columns holding one value per car per tick
+CAR_COLUMNS: typing.Dict[str, str] = {
+    "position": "<f8",
+    "speed": "<f8",
+    "grip_state": "<i1",
+    "segment": "<i4",
+}
+# Columns holding one value per tick
+TICK_COLUMNS: typing.Dict[str, str] = {
+    "time": "<f8",
+    "winder_speed": "<f8",
+    "winder_status": "<i1",
+}
+
+
+class Recorder:
+    def __init__(
+        self,
+        path: str,
+        route: cab_route.Route,
+        cars: typing.Sequence[cab_car.CableCar],
+        buffer_ticks: int = 1024,
+    ) -> None:
+        self._logger: logging.Logger = logging.getLogger(
+            f"CableCarSim.{self.__class__.__name__}"
+        )
+        self._path: str = path
+        self._route: cab_route.Route = route
+        self._winder: cab_power.Winder = route.winder
+        # The set of cars is fixed for the length of a recording
+        self._cars: typing.Tuple[cab_car.CableCar, ...] = tuple(cars)
+        self._capacity: int = buffer_ticks
+        self._buffers: typing.Dict[str, numpy.ndarray] = {
+            **{
+                name: numpy.zeros((buffer_ticks, len(self._cars)), dtype=dtype)
+                for name, dtype in CAR_COLUMNS.items()
+            },
+            **{
+                name: numpy.zeros(buffer_ticks, dtype=dtype)
+                for name, dtype in TICK_COLUMNS.items()
+            },
+        }
+        self._files: typing.Dict[str, typing.BinaryIO] = {}
+        self._size: int = 0
+        self._ticks: int = 0
+        self._time: float = 0.0
+
+    @property
+    def ticks(self) -> int:
+        return self._ticks
+
+    def start(self, period: float) -> None:
+        os.makedirs(self._path, exist_ok=True)
+        with open(os.path.join(self._path, "meta.json"), "w") as out_f:
+            json.dump(
+                {
+                    "version": FORMAT_VERSION,
+                    "period": period,
+                    "winder": self._winder.name,
+                    "cars": [car.number for car in self._cars],
+                    "stop_distances": list(self._route.distances),
+                    "stop_names": list(self._route.stop_names),
+                    "car_columns": CAR_COLUMNS,
+                    "tick_columns": TICK_COLUMNS,
+                },
+                out_f,
+                indent=2,
+            )
+        self._files = {
+            name: open(os.path.join(self._path, f"{name}.bin"), "wb")
+            for name in self._buffers
+        }
+
+    def sample(self, dt: float) -> None:
+        _row: int = self._size
+        self._time += dt
+        self._buffers["time"][_row] = self._time
+        self._buffers["winder_speed"][_row] = self._winder.speed
+        self._buffers["winder_status"][_row] = self._winder.status.value
+        for i, car in enumerate(self._cars):
+            self._buffers["position"][_row, i] = car.position
+            self._buffers["speed"][_row, i] = car.speed
+            self._buffers["grip_state"][_row, i] = car.grip_state.value
+            self._buffers["segment"][_row, i] = car.segment_index
+        self._size += 1
+        self._ticks += 1
+        if self._size == self._capacity:
+            self.flush()
+
+    def flush(self) -> None:
+        # Buffers are written as a block of whole rows, so each column file
+        # is a row-major array of all ticks recorded so far
+        for name, out_f in self._files.items():
+            out_f.write(self._buffers[name][: self._size].tobytes())
+            out_f.flush()
+        self._size = 0
+
+    def close(self) -> None:
+        self.flush()
+        for out_f in self._files.values():
+            out_f.close()
+        self._files = {}
+        self._logger.info("Recorded %d ticks to '%s'", self._ticks, self._path)
+
+
+class Recording:
+    def __init__(self, path: str) -> None:
+        with open(os.path.join(path, "meta.json")) as in_f:
+            self._meta: typing.Dict[str, typing.Any] = json.load(in_f)
+        if self._meta["version"] != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported recording version {self._meta['version']} in '{path}'"
+            )
+        _n_cars: int = len(self._meta["cars"])
+        _columns: typing.Dict[str, str] = {
+            **self._meta["car_columns"],
+            **self._meta["tick_columns"],
+        }
+        _sizes: typing.Dict[str, int] = {
+            name: os.path.getsize(os.path.join(path, f"{name}.bin"))
+            // numpy.dtype(dtype).itemsize
+            for name, dtype in _columns.items()
+        }
+        # A recording interrupted mid flush may hold more ticks in some
+        # columns than in others, only complete ticks are replayed
+        self._ticks: int = min(
+            _sizes[name] // _n_cars
+            if name in self._meta["car_columns"]
+            else _sizes[name]
+            for name in _columns
+            if _n_cars or name in self._meta["tick_columns"]
+        )
+        self._columns: typing.Dict[str, numpy.ndarray] = {}
+        for name, dtype in _columns.items():
+            _shape = (
+                (self._ticks, _n_cars)
+                if name in self._meta["car_columns"]
+                else (self._ticks,)
+            )
+            # Columns are memory mapped so that only the ticks being replayed
+            # are read from disk
+            self._columns[name] = (
+                numpy.memmap(
+                    os.path.join(path, f"{name}.bin"),
+                    dtype=dtype,
+                    mode="r",
+                    shape=_shape,
+                )
+                if self._ticks and _n_cars
+                else numpy.zeros(_shape, dtype=dtype)
+            )
+
+    def __len__(self) -> int:
+        return self._ticks
+
+    def __getitem__(self, name: str) -> numpy.ndarray:
+        return self._columns[name]
+
+    @property
+    def period(self) -> float:
+        return self._meta["period"]
+
+    @property
+    def winder(self) -> str:
+        return self._meta["winder"]
+
+    @property
+    def cars(self) -> typing.List[int]:
+        return self._meta["cars"]
+
+    @property
+    def stops(self) -> typing.Tuple[typing.List[float], typing.List[str]]:
+        return self._meta["stop_distances"], self._meta["stop_names"]
+
+
+class Replay:
+    def __init__(self, recording: Recording) -> None:
+        self._logger: logging.Logger = logging.getLogger(
+            f"CableCarSim.{self.__class__.__name__}"
+        )
+        self._recording: Recording = recording
+        self._server: typing.Optional[cab_server.SimulationServer] = None
+        self._route: typing.Optional[cab_route.Route] = None
+        self._cars: typing.List[cab_car.CableCar] = []
+        self._tick: int = 0
+
+    async def setup(self, server: cab_server.SimulationServer) -> None:
+        self._server = server
+        _winder = cab_power.Winder(self._recording.winder, server)
+        await _winder.setup()
+        self._route = cab_route.Route(_winder)
+        self._route.set_stops(*self._recording.stops)
+        for number in self._recording.cars:
+            self._cars.append(cab_car.CableCar(number))
+            await self._cars[-1].add_to_route(self._route, drive=False)
+        server.add_tick("physics", self.tick)
+
+    def tick(self, dt: float) -> None:
+        if self._tick >= len(self._recording):
+            self._logger.info("Replay of %d ticks complete", self._tick)
+            self._server.finish()
+            return
+        _i: int = self._tick
+        self._route.winder.status = cab_power.Status(
+            int(self._recording["winder_status"][_i])
+        )
+        self._route.winder.speed = float(self._recording["winder_speed"][_i])
+        _positions: typing.List[float] = self._recording["position"][_i].tolist()
+        _speeds: typing.List[float] = self._recording["speed"][_i].tolist()
+        _grips: typing.List[int] = self._recording["grip_state"][_i].tolist()
+        _segments: typing.List[int] = self._recording["segment"][_i].tolist()
+        for car, position, speed, grip, segment in zip(
+            self._cars, _positions, _speeds, _grips, _segments
+        ):
+            car.position = position
+            car.speed = speed
+            car.grip_state = cab_car.GripState(grip)
+            if segment >= 0:
+                car.location = self._route.segment(segment)
+        self._tick += 1
+
+
+async def run_replay(recording: Recording, headless: bool = False) -> None:
+    # The physics tick group runs at the rate of the recording so that each
+    # tick replays one recorded sample
+    async with cab_server.SimulationServer(
+        tick_rates={"physics": 1.0 / recording.period}, headless=headless
+    ) as server:
+        await Replay(recording).setup(server)
+        await server.launch()
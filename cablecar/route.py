@@ -1,3 +1,5 @@
+import array
+import bisect
 import typing
 
 import cablecar.power as cab_power
@@ -8,6 +10,10 @@ class Route:
         self._winder = winder
         self._call_points: typing.Dict[float, str] = {}
         self._let_go_points: typing.Dict[float, float] = {}
+        self._distances: memoryview = memoryview(array.array("d")).toreadonly()
+        self._stop_names: typing.Tuple[str, ...] = ()
+        self._length: float = 0
+        self._revision: int = 0
 
     @property
     def winder(self) -> cab_power.Winder:
@@ -15,10 +21,50 @@ class Route:
 
     @property
     def length(self) -> float:
-        return max(self._call_points.keys()) if self._call_points else 0
+        return self._length
+
+    @property
+    def distances(self) -> memoryview:
+        return self._distances
+
+    @property
+    def stop_names(self) -> typing.Tuple[str, ...]:
+        return self._stop_names
+
+    @property
+    def revision(self) -> int:
+        return self._revision
 
     def add_stop(self, stop_name: str, distance: float) -> None:
         self._call_points[distance] = stop_name
+        self._build_index()
+
+    def add_stops(self, stops: typing.Dict[str, float]) -> None:
+        for stop_name, distance in stops.items():
+            self._call_points[distance] = stop_name
+        self._build_index()
+
+    def set_stops(
+        self, distances: typing.Sequence[float], stop_names: typing.Sequence[str]
+    ) -> None:
+        # Replaces all stops with ones already sorted by distance, e.g. a
+        # compiled route, without sorting them again
+        self._call_points = dict(zip(distances, stop_names))
+        self._distances = memoryview(array.array("d", distances)).toreadonly()
+        self._stop_names = tuple(stop_names)
+        self._length = self._distances[-1] if len(self._distances) else 0
+        self._revision += 1
+
+    def _build_index(self) -> None:
+        # The index is replaced wholesale rather than mutated so that any
+        # cursor holding a reference to the previous one stays consistent
+        _ordered = sorted(self._call_points.items())
+        self._distances = memoryview(
+            array.array("d", (distance for distance, _ in _ordered))
+        ).toreadonly()
+        self._stop_names = tuple(name for _, name in _ordered)
+        self._length = _ordered[-1][0] if _ordered else 0
+        self._revision += 1
 
     def __str__(self) -> str:
         _loc_template = "{distance:>10}   O   {name:10}\n"
@@ -29,13 +75,76 @@ class Route:
                 _out_str += f"{'':>10}   |   {'':>20}\n"
         return _out_str
 
+    def segment_index(self, position: float) -> int:
+        return bisect.bisect_left(self._distances, position)
+
+    def segment(self, index: int) -> typing.Tuple[str, str]:
+        # 'index' is the number of stops already passed, before the first
+        # stop is passed the car reports the first two stops of the route
+        if index == 0:
+            return (self._stop_names[0], self._stop_names[1])
+        if index == 1:
+            return (self._stop_names[1], self._stop_names[0])
+        return (self._stop_names[index - 2], self._stop_names[index - 1])
+
     def where_am_i(self, position: float) -> typing.Tuple[str, str]:
-        _out_loc: typing.List[str] = list(self._call_points.values())[:3]
-        for distance, poi in self._call_points.items():
-            if position > distance:
-                _out_loc[0] = _out_loc[1]
-                _out_loc[1] = poi
-        return (_out_loc[0], _out_loc[1])
+        return self.segment(self.segment_index(position))
+
+    def cursor(self, position: float = 0.0) -> "SegmentCursor":
+        return SegmentCursor(self, position)
+
+
+class SegmentCursor:
+    __slots__ = ("_route", "_revision", "_index", "_lower", "_upper")
+
+    def __init__(self, route: Route, position: float = 0.0) -> None:
+        self._route: Route = route
+        self._revision: int = route.revision
+        self._index: int = 0
+        self._lower: float = float("-inf")
+        self._upper: float = float("inf")
+        self.seek(position)
+
+    @property
+    def index(self) -> int:
+        return self._index
+
+    @property
+    def location(self) -> typing.Tuple[str, str]:
+        return self._route.segment(self._index)
+
+    @property
+    def bounds(self) -> typing.Tuple[float, float]:
+        # The segment is left once the position is at or below the lower
+        # bound, or above the upper bound
+        return self._lower, self._upper
+
+    def _set_bounds(self) -> None:
+        _distances = self._route.distances
+        self._lower = _distances[self._index - 1] if self._index > 0 else float("-inf")
+        self._upper = (
+            _distances[self._index] if self._index < len(_distances) else float("inf")
+        )
+
+    def seek(self, position: float) -> None:
+        self._revision = self._route.revision
+        self._index = self._route.segment_index(position)
+        self._set_bounds()
+
+    def advance(self, position: float) -> bool:
+        if self._revision != self._route.revision:
+            _previous = self._index
+            self.seek(position)
+            return self._index != _previous
+        if self._lower < position <= self._upper:
+            return False
+        _distances = self._route.distances
+        while self._index < len(_distances) and position > _distances[self._index]:
+            self._index += 1
+        while self._index > 0 and position <= _distances[self._index - 1]:
+            self._index -= 1
+        self._set_bounds()
+        return True
 
 
 if __name__ in "__main__":
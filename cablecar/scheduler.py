@@ -0,0 +1,168 @@
+import asyncio
+import inspect
+import logging
+import time
+import typing
+
+import cablecar.histogram as cab_hist
+
+TickCallback = typing.Callable[[float], typing.Optional[typing.Awaitable[None]]]
+
+DEFAULT_TICK_RATES: typing.Dict[str, float] = {
+    "physics": 1.0,
+    "controllers": 2.0,
+    "publishing": 2.0,
+}
+
+
+def parse_tick_rate(value: str) -> typing.Tuple[str, float]:
+    # 'group=rate', with the rate in ticks per second
+    _name, _, _rate = value.partition("=")
+    if _name not in DEFAULT_TICK_RATES or not _rate:
+        raise ValueError(
+            f"Expected one of {', '.join(DEFAULT_TICK_RATES)} as 'group=rate', "
+            f"got '{value}'"
+        )
+    if float(_rate) <= 0:
+        raise ValueError(f"Tick rate for '{_name}' must be positive, got {_rate}")
+    return _name, float(_rate)
+
+
+class TickGroup:
+    def __init__(self, name: str, rate: float) -> None:
+        if rate <= 0:
+            raise ValueError(f"Tick rate for '{name}' must be positive, got {rate}")
+        self._logger: logging.Logger = logging.getLogger(
+            f"CableCarSim.{self.__class__.__name__}.{name}"
+        )
+        self._name: str = name
+        self._period: float = 1.0 / rate
+        # A dictionary is used as an ordered set so that callbacks run in
+        # the order they were added and can be removed in constant time
+        self._callbacks: typing.Dict[TickCallback, None] = {}
+        # Listeners run once all callbacks of a tick have completed, e.g. to
+        # sample the state those callbacks produced
+        self._listeners: typing.Dict[TickCallback, None] = {}
+        # Callbacks to run once at the start of a given tick, by tick number,
+        # and the tick number of each so that they can be cancelled
+        self._timers: typing.Dict[int, typing.Dict[TickCallback, None]] = {}
+        self._timer_ticks: typing.Dict[TickCallback, int] = {}
+        self._ticks: int = 0
+        self._missed: int = 0
+        self._durations: cab_hist.Histogram = cab_hist.Histogram()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def period(self) -> float:
+        return self._period
+
+    @property
+    def ticks(self) -> int:
+        return self._ticks
+
+    @property
+    def missed(self) -> int:
+        return self._missed
+
+    @property
+    def durations(self) -> cab_hist.Histogram:
+        return self._durations
+
+    def __len__(self) -> int:
+        return len(self._callbacks)
+
+    def add(self, callback: TickCallback) -> None:
+        self._callbacks[callback] = None
+
+    def remove(self, callback: TickCallback) -> None:
+        self._callbacks.pop(callback, None)
+
+    def add_listener(self, callback: TickCallback) -> None:
+        self._listeners[callback] = None
+
+    def remove_listener(self, callback: TickCallback) -> None:
+        self._listeners.pop(callback, None)
+
+    def call_at(self, tick: int, callback: TickCallback) -> None:
+        # Replaces any earlier request for the same callback
+        self.cancel(callback)
+        self._timers.setdefault(tick, {})[callback] = None
+        self._timer_ticks[callback] = tick
+
+    def cancel(self, callback: TickCallback) -> None:
+        _tick: typing.Optional[int] = self._timer_ticks.pop(callback, None)
+        if _tick is None:
+            return
+        del self._timers[_tick][callback]
+        if not self._timers[_tick]:
+            del self._timers[_tick]
+
+    async def _run_callbacks(self, callbacks: typing.Iterable[TickCallback]) -> None:
+        for callback in tuple(callbacks):
+            _result = callback(self._period)
+            if inspect.isawaitable(_result):
+                await _result
+
+    async def tick(self) -> None:
+        _start: float = time.perf_counter()
+        _due: typing.Dict[TickCallback, None] = self._timers.pop(self._ticks, {})
+        for callback in _due:
+            del self._timer_ticks[callback]
+        await self._run_callbacks(_due)
+        await self._run_callbacks(self._callbacks)
+        # The tick is counted before the listeners run, so that they see
+        # the count including the tick whose results they observe
+        self._ticks += 1
+        await self._run_callbacks(self._listeners)
+        self._durations.record(time.perf_counter() - _start)
+
+    async def run(self, running: typing.Callable[[], bool]) -> None:
+        _loop = asyncio.get_running_loop()
+        # Deadlines are derived from the start time rather than from the end
+        # of the previous tick so that time spent in callbacks does not
+        # accumulate as drift
+        _deadline: float = _loop.time() + self._period
+        while running():
+            _delay: float = _deadline - _loop.time()
+            if _delay > 0:
+                await asyncio.sleep(_delay)
+            elif -_delay >= self._period:
+                _skipped: int = int(-_delay // self._period)
+                self._missed += _skipped
+                self._logger.warning(
+                    "Tick overran by %.3fs, skipping %d deadline(s)", -_delay, _skipped
+                )
+                _deadline += _skipped * self._period
+            if not running():
+                break
+            await self.tick()
+            _deadline += self._period
+
+
+class TickScheduler:
+    def __init__(self, rates: typing.Optional[typing.Dict[str, float]] = None) -> None:
+        self._groups: typing.Dict[str, TickGroup] = {
+            name: TickGroup(name, rate)
+            for name, rate in {**DEFAULT_TICK_RATES, **(rates or {})}.items()
+        }
+
+    @property
+    def groups(self) -> typing.Dict[str, TickGroup]:
+        return self._groups
+
+    def __getitem__(self, name: str) -> TickGroup:
+        return self._groups[name]
+
+    def add(self, group: str, callback: TickCallback) -> None:
+        self._groups[group].add(callback)
+
+    def remove(self, group: str, callback: TickCallback) -> None:
+        self._groups[group].remove(callback)
+
+    def coroutines(
+        self, running: typing.Callable[[], bool]
+    ) -> typing.List[typing.Coroutine]:
+        return [group.run(running) for group in self._groups.values()]
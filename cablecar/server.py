@@ -1,22 +1,114 @@
 import asyncio
+import datetime
 import logging
 import typing
 
+import asyncua
+import asyncua.common.callback
+import asyncua.common.node
+import asyncua.common.subscription
+import asyncua.common.ua_utils
 import asyncua.crypto.permission_rules as asyncya_crypto_rules
-import asyncua.sync
 import asyncua.ua
 
 import cablecar
+import cablecar.diagnostics as cab_diag
+import cablecar.history as cab_history
+import cablecar.scheduler as cab_sched
 
 
-class SimulationServer(asyncua.sync.Server):
-    def __init__(self, port: int = 4080) -> None:
+class VariableSpec(typing.NamedTuple):
+    label: str
+    description: str
+    start_val: typing.Any
+    writable: bool = False
+
+
+class PublishPolicy(typing.NamedTuple):
+    deadband: float = 0.0
+    percent: bool = False
+    min_interval: float = 0.0
+    changes_only: bool = False
+    # Changes within the deadband are still published once the last
+    # published value is this many seconds old, so settled values show
+    max_age: float = 5.0
+
+    @classmethod
+    def from_config(cls, config: typing.Dict[str, typing.Any]) -> "PublishPolicy":
+        _type: str = config.get("deadband_type", "absolute")
+        if _type not in ("absolute", "percent"):
+            raise ValueError(f"Unknown deadband type '{_type}'")
+        return cls(
+            float(config.get("deadband", 0.0)),
+            _type == "percent",
+            float(config.get("min_interval", 0.0)),
+            bool(config.get("changes_only", False)),
+            float(config.get("max_age", 5.0)),
+        )
+
+    def suppresses(self, previous: typing.Any, value: typing.Any) -> bool:
+        if value == previous:
+            return self.changes_only or self.deadband > 0
+        if not self.deadband or isinstance(value, (bool, str)):
+            return False
+        # A percentage deadband is relative to the last published value
+        _band: float = (
+            abs(previous) * self.deadband / 100 if self.percent else self.deadband
+        )
+        return abs(value - previous) <= _band
+
+
+class SimulationServer(asyncua.Server):
+    def __init__(
+        self,
+        port: int = 4080,
+        tick_rates: typing.Optional[typing.Dict[str, float]] = None,
+        headless: bool = False,
+        diagnostics: bool = True,
+        history: typing.Optional[str] = None,
+        history_retention: datetime.timedelta = datetime.timedelta(days=1),
+        publish_policies: typing.Optional[
+            typing.Dict[str, typing.Dict[str, PublishPolicy]]
+        ] = None,
+    ) -> None:
         super().__init__()
         self._logger: logging.Logger = logging.getLogger(
             f"CableCarSim.{self.__class__.__name__}"
         )
         self._run_sim: bool = True
+        self._headless: bool = headless
         self._async_tasks: typing.List[typing.Coroutine] = []
+        self._scheduler: cab_sched.TickScheduler = cab_sched.TickScheduler(tick_rates)
+        self._scheduler.add("publishing", self._publish_tick)
+        self._running_tasks: typing.List[asyncio.Task] = []
+        self._pending_writes: typing.Dict[asyncua.ua.NodeId, typing.Any] = {}
+        # Policies are given per kind of object and variable key, and are
+        # resolved to node identifiers as objects are created
+        self._publish_policies: typing.Dict[str, typing.Dict[str, PublishPolicy]] = (
+            publish_policies or {}
+        )
+        self._node_policies: typing.Dict[asyncua.ua.NodeId, PublishPolicy] = {}
+        self._published: typing.Dict[
+            asyncua.ua.NodeId, typing.Tuple[typing.Any, float]
+        ] = {}
+        self._client_inputs: typing.Dict[
+            asyncua.ua.NodeId, typing.Callable[[typing.Any], None]
+        ] = {}
+        self._read_hooks: typing.Dict[
+            asyncua.ua.NodeId, typing.Callable[[], typing.Any]
+        ] = {}
+        self._input_subscription: typing.Optional[
+            asyncua.common.subscription.Subscription
+        ] = None
+        # Flush scheduled once a client input has been handled, so that the
+        # changes it causes do not wait for the next publishing tick
+        self._input_flush: typing.Optional[asyncio.Task] = None
+        self._namespace: typing.Optional[int] = None
+        self._diagnostics: typing.Optional[cab_diag.Diagnostics] = (
+            cab_diag.Diagnostics(self) if diagnostics else None
+        )
+        self._history: typing.Optional[str] = history
+        self._history_retention: datetime.timedelta = history_retention
         self._url: str = cablecar.SERVER_URL.format(port=port)
         self.set_endpoint(self._url)
         self.set_security_policy([asyncua.ua.SecurityPolicyType.NoSecurity])
@@ -26,36 +118,299 @@ class SimulationServer(asyncua.sync.Server):
         return self._run_sim
 
     @property
-    def objects_node(self) -> asyncua.sync.SyncNode:
+    def namespace(self) -> typing.Optional[int]:
+        return self._namespace
+
+    @property
+    def objects_node(self) -> asyncua.common.node.Node:
         return self.get_node(
             asyncua.ua.TwoByteNodeId(asyncua.ua.ObjectIds.ObjectsFolder)
         )
 
+    @property
+    def diagnostics(self) -> typing.Optional[cab_diag.Diagnostics]:
+        return self._diagnostics
+
+    @property
+    def scheduler(self) -> cab_sched.TickScheduler:
+        return self._scheduler
+
     def add_task(self, task: typing.Coroutine) -> None:
         self._async_tasks.append(task)
 
-    async def launch(self) -> None:
+    def add_tick(self, group: str, callback: cab_sched.TickCallback) -> None:
+        self._scheduler.add(group, callback)
+
+    def remove_tick(self, group: str, callback: cab_sched.TickCallback) -> None:
+        self._scheduler.remove(group, callback)
+
+    def publish(self, node: asyncua.common.node.Node, value: typing.Any) -> None:
+        # Only the latest value for each node is kept until the next flush
+        self._pending_writes[node.nodeid] = value
+
+    def publish_many(
+        self,
+        nodes: typing.Iterable[asyncua.common.node.Node],
+        values: typing.Iterable[typing.Any],
+    ) -> None:
+        # As publish, for values computed in bulk such as by the fleet engine
+        self._pending_writes.update(zip((i.nodeid for i in nodes), values))
+
+    async def watch(
+        self,
+        node: asyncua.common.node.Node,
+        callback: typing.Callable[[typing.Any], None],
+    ) -> None:
+        self._client_inputs[node.nodeid] = callback
+        await self._input_subscription.subscribe_data_change(node)
+
+    def add_read_hook(
+        self, node: asyncua.common.node.Node, callback: typing.Callable[[], typing.Any]
+    ) -> None:
+        # The value of the node is refreshed from 'callback' whenever a
+        # client reads it, for values which are not published as they change
+        self._read_hooks[node.nodeid] = callback
+
+    def remove_read_hook(self, node: asyncua.common.node.Node) -> None:
+        self._read_hooks.pop(node.nodeid, None)
+
+    async def _refresh_for_read(
+        self,
+        event: asyncua.common.callback.ServerItemCallback,
+        dispatcher: asyncua.common.callback.CallbackService,
+    ) -> None:
+        if not event.is_external or not self._read_hooks:
+            return
+        for read_value in event.request_params.NodesToRead:
+            if (
+                read_value.AttributeId == asyncua.ua.AttributeIds.Value
+                and read_value.NodeId in self._read_hooks
+            ):
+                await self.iserver.aspace.write_attribute_value(
+                    read_value.NodeId,
+                    asyncua.ua.AttributeIds.Value,
+                    asyncua.common.ua_utils.value_to_datavalue(
+                        self._read_hooks[read_value.NodeId]()
+                    ),
+                )
+
+    def datachange_notification(
+        self, node: asyncua.common.node.Node, val: typing.Any, data: typing.Any
+    ) -> None:
+        self._client_inputs[node.nodeid](val)
+        # Inputs arriving together are written out in a single flush
+        if self._input_flush is None or self._input_flush.done():
+            self._input_flush = asyncio.get_running_loop().create_task(self.flush())
+
+    async def _write_values(
+        self, writes: typing.Dict[asyncua.ua.NodeId, typing.Any]
+    ) -> None:
+        _write_params = asyncua.ua.WriteParameters()
+        for node_id, value in writes.items():
+            _write_value = asyncua.ua.WriteValue()
+            _write_value.NodeId = node_id
+            _write_value.AttributeId = asyncua.ua.AttributeIds.Value
+            _write_value.Value = asyncua.common.ua_utils.value_to_datavalue(value)
+            _write_params.NodesToWrite.append(_write_value)
+        for result in await self.iserver.isession.write(_write_params):
+            result.check()
+
+    def _apply_policies(
+        self, writes: typing.Dict[asyncua.ua.NodeId, typing.Any]
+    ) -> None:
+        _now: float = asyncio.get_running_loop().time()
+        for node_id in [i for i in writes if i in self._node_policies]:
+            _policy: PublishPolicy = self._node_policies[node_id]
+            _value: typing.Any = writes[node_id]
+            if node_id in self._published:
+                _previous, _time = self._published[node_id]
+                if _policy.suppresses(_previous, _value) and (
+                    _value == _previous or _now - _time < _policy.max_age
+                ):
+                    if _value != _previous:
+                        # Retried at each flush so that a value which has
+                        # settled within the deadband is published eventually
+                        self._pending_writes.setdefault(node_id, _value)
+                    del writes[node_id]
+                    continue
+                if _now - _time < _policy.min_interval:
+                    # Held back until the next flush unless a newer value
+                    # is published in the meantime
+                    self._pending_writes.setdefault(node_id, _value)
+                    del writes[node_id]
+                    continue
+            self._published[node_id] = (_value, _now)
+
+    async def flush(self, force: bool = False) -> None:
+        _writes, self._pending_writes = self._pending_writes, {}
+        # Forced flushes write the latest values regardless of policy, e.g.
+        # so that the address space holds the final state on shutdown
+        if self._node_policies and not force:
+            self._apply_policies(_writes)
+        if not _writes:
+            return
+        # All local changes since the last flush go out as one Write request
+        await self._write_values(_writes)
+
+    async def _publish_tick(self, dt: float) -> None:
+        await self.flush()
+
+    def finish(self) -> None:
+        self._run_sim = False
+
+    async def _end_after(self, duration: float) -> None:
+        await asyncio.sleep(duration)
+        self._logger.info("Simulation duration of %ss reached", duration)
+        self.finish()
+
+    async def launch(self, duration: typing.Optional[float] = None) -> None:
+        _coroutines: typing.List[typing.Coroutine] = [
+            i() for i in self._async_tasks
+        ] + self._scheduler.coroutines(lambda: self._run_sim)
+        if duration is not None:
+            _coroutines.append(self._end_after(duration))
+        await self.flush(force=True)
+        self._running_tasks = [asyncio.create_task(i) for i in _coroutines]
         try:
-            await asyncio.wait([asyncio.create_task(i()) for i in self._async_tasks])
-        except KeyboardInterrupt:
-            self._run_sim = False
+            await asyncio.gather(*self._running_tasks)
+        finally:
+            await self.shutdown()
 
-    def add_variable(
+    async def shutdown(self) -> None:
+        self._run_sim = False
+        for task in self._running_tasks:
+            task.cancel()
+        await asyncio.gather(*self._running_tasks, return_exceptions=True)
+        self._running_tasks = []
+        if self._input_flush is not None:
+            await self._input_flush
+            self._input_flush = None
+        await self.flush(force=True)
+
+    async def add_variable(
         self, namespace: int, label: str, description: str, start_val: typing.Any
-    ) -> asyncua.sync.SyncNode:
-        return self.objects_node.add_variable(
+    ) -> asyncua.common.node.Node:
+        return await self.objects_node.add_variable(
             f"ns={namespace};s={label}", description, start_val
         )
 
+    def _variable_item(
+        self, parent: asyncua.ua.NodeId, variable: VariableSpec, namespace: int
+    ) -> asyncua.ua.AddNodesItem:
+        _value = asyncua.ua.Variant(variable.start_val)
+        _access = asyncua.ua.AccessLevel.CurrentRead.mask
+        if variable.writable:
+            _access |= asyncua.ua.AccessLevel.CurrentWrite.mask
+        _attributes = asyncua.ua.VariableAttributes()
+        _attributes.Description = asyncua.ua.LocalizedText(variable.description)
+        _attributes.DisplayName = asyncua.ua.LocalizedText(variable.description)
+        _attributes.DataType = asyncua.ua.NodeId(
+            getattr(asyncua.ua.ObjectIds, _value.VariantType.name)
+        )
+        _attributes.Value = _value
+        _attributes.ValueRank = asyncua.ua.ValueRank.Scalar
+        _attributes.AccessLevel = _access
+        _attributes.UserAccessLevel = _access
+        _item = asyncua.ua.AddNodesItem()
+        _item.RequestedNewNodeId = asyncua.ua.NodeId.from_string(
+            f"ns={namespace};s={variable.label}"
+        )
+        _item.BrowseName = asyncua.ua.QualifiedName(variable.description)
+        _item.NodeClass = asyncua.ua.NodeClass.Variable
+        _item.ParentNodeId = parent
+        _item.ReferenceTypeId = asyncua.ua.NodeId(asyncua.ua.ObjectIds.HasComponent)
+        _item.TypeDefinition = asyncua.ua.NodeId(
+            asyncua.ua.ObjectIds.BaseDataVariableType
+        )
+        _item.NodeAttributes = _attributes
+        return _item
+
+    async def add_object(
+        self,
+        label: str,
+        description: str,
+        variables: typing.Dict[str, VariableSpec],
+        namespace: typing.Optional[int] = None,
+        kind: typing.Optional[str] = None,
+    ) -> typing.Dict[str, asyncua.common.node.Node]:
+        _namespace: int = self._namespace if namespace is None else namespace
+        _object_id = asyncua.ua.NodeId.from_string(f"ns={_namespace};s={label}")
+        _attributes = asyncua.ua.ObjectAttributes()
+        _attributes.Description = asyncua.ua.LocalizedText(description)
+        _attributes.DisplayName = asyncua.ua.LocalizedText(description)
+        _object = asyncua.ua.AddNodesItem()
+        _object.RequestedNewNodeId = _object_id
+        _object.BrowseName = asyncua.ua.QualifiedName(description, _namespace)
+        _object.NodeClass = asyncua.ua.NodeClass.Object
+        _object.ParentNodeId = asyncua.ua.NodeId(asyncua.ua.ObjectIds.ObjectsFolder)
+        _object.ReferenceTypeId = asyncua.ua.NodeId(asyncua.ua.ObjectIds.Organizes)
+        _object.TypeDefinition = asyncua.ua.NodeId(asyncua.ua.ObjectIds.BaseObjectType)
+        _object.NodeAttributes = _attributes
+
+        # The object and all of its variables are created by a single
+        # AddNodes request rather than one request per node
+        _results = await self.iserver.isession.add_nodes(
+            [_object]
+            + [
+                self._variable_item(_object_id, variable, _namespace)
+                for variable in variables.values()
+            ]
+        )
+        for result in _results:
+            result.StatusCode.check()
+        for key, result in zip(variables, _results[1:]):
+            if key in self._publish_policies.get(kind, {}):
+                self._node_policies[result.AddedNodeId] = self._publish_policies[kind][
+                    key
+                ]
+        return {
+            key: self.get_node(result.AddedNodeId)
+            for key, result in zip(variables, _results[1:])
+        }
+
     async def stop(self) -> None:
-        super().stop()
+        if self._headless:
+            await self.iserver.stop()
+        else:
+            await super().stop()
         self._run_sim = False
 
-    def __enter__(self) -> "SimulationServer":
-        self._logger.info(f"Starting server on: {self._url}")
-        self.start()
+    async def historize(self, *nodes: asyncua.common.node.Node) -> None:
+        if self._history:
+            await self.historize_node_data_change(
+                list(nodes), period=self._history_retention
+            )
+
+    async def __aenter__(self) -> "SimulationServer":
+        if self._history:
+            # The storage is initialised along with the server
+            self.iserver.history_manager.set_storage(
+                cab_history.SQLiteHistory(self._history)
+            )
+        await self.init()
+        # All winders and cars share one namespace, node identifiers are
+        # unique within it by construction
+        self._namespace = await self.register_namespace("CableCarSim")
+        # A publishing interval of zero dispatches client writes to the
+        # writable nodes as soon as they are made, without a polling loop
+        self._input_subscription = await self.create_subscription(0, self)
+        # Server callbacks are keyed by priority, a priority of its own keeps
+        # this one from replacing the read timing of the diagnostics
+        self.iserver.callback_service.addListener(
+            asyncua.common.callback.CallbackType.PreRead,
+            self._refresh_for_read,
+            priority=1,
+        )
+        if self._diagnostics:
+            await self._diagnostics.setup()
+            self.add_task(self._diagnostics.monitor)
+        if self._headless:
+            self._logger.info("Running headless, no server endpoint started")
+        else:
+            self._logger.info("Starting server on: %s", self._url)
+            await self.start()
         return self
 
-    def __exit__(self, *args, **kwargs) -> None:
+    async def __aexit__(self, *args, **kwargs) -> None:
         self._logger.info("Stopping server")
-        self.stop()
+        await self.stop()
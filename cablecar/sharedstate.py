@@ -0,0 +1,227 @@
+import array
+import logging
+import mmap
+import multiprocessing.resource_tracker
+import multiprocessing.shared_memory
+import struct
+import typing
+
+import cablecar.car as cab_car
+import cablecar.power as cab_power
+
+FORMAT_VERSION: int = 1
+
+# Magic, format version and number of cars followed by the generation
+# counter, tick count, simulated time, winder speed and winder status. The
+# header is padded to 64 bytes so that every column starts 8 byte aligned
+_HEADER: struct.Struct = struct.Struct("<4sHxxI4xQQddb15x")
+_MAGIC: bytes = b"CCSS"
+_GENERATION: struct.Struct = struct.Struct("<Q")
+_GENERATION_OFFSET: int = 16
+
+# Columns holding one value per car, as memoryview format characters. The
+# 8 byte columns come first so that all columns are naturally aligned
+CAR_COLUMNS: typing.Dict[str, str] = {
+    "position": "d",
+    "speed": "d",
+    "number": "i",
+    "segment": "i",
+    "grip_state": "b",
+    "rail_brake": "?",
+}
+
+
+class FleetSnapshot(typing.NamedTuple):
+    generation: int
+    tick: int
+    time: float
+    winder_speed: float
+    winder_status: int
+    cars: typing.Dict[str, array.array]
+
+
+def _column_offsets(n_cars: int) -> typing.Tuple[typing.Dict[str, int], int]:
+    _offsets: typing.Dict[str, int] = {}
+    _offset: int = _HEADER.size
+    for name, fmt in CAR_COLUMNS.items():
+        _offsets[name] = _offset
+        _size: int = n_cars * struct.calcsize(fmt)
+        _offset += _size + -_size % 8
+    return _offsets, _offset
+
+
+class _Block:
+    # A fixed size block of memory backed either by a named shared memory
+    # segment or by a memory mapped file
+    def __init__(self, name: str, size: int = 0, file: bool = False) -> None:
+        self._name: str = name
+        self._create: bool = size > 0
+        self._shared_memory: typing.Optional[
+            multiprocessing.shared_memory.SharedMemory
+        ] = None
+        self._mmap: typing.Optional[mmap.mmap] = None
+        if file:
+            # Readers map the file read only
+            with open(name, "w+b" if self._create else "rb") as out_f:
+                if self._create:
+                    out_f.truncate(size)
+                self._mmap = mmap.mmap(
+                    out_f.fileno(),
+                    0,
+                    access=mmap.ACCESS_WRITE if self._create else mmap.ACCESS_READ,
+                )
+            self.buffer: memoryview = memoryview(self._mmap)
+            return
+        self._shared_memory = multiprocessing.shared_memory.SharedMemory(
+            name, create=self._create, size=size
+        )
+        if not self._create:
+            # Attaching registers the segment with the resource tracker of
+            # this process, which would otherwise unlink it on exit
+            multiprocessing.resource_tracker.unregister(
+                self._shared_memory._name, "shared_memory"
+            )
+        self.buffer = self._shared_memory.buf
+
+    def close(self) -> None:
+        self.buffer.release()
+        if self._mmap is not None:
+            self._mmap.close()
+        if self._shared_memory is not None:
+            self._shared_memory.close()
+            if self._create:
+                self._shared_memory.unlink()
+
+
+class SharedStateWriter:
+    def __init__(
+        self,
+        name: str,
+        winder: cab_power.Winder,
+        cars: typing.Sequence[cab_car.CableCar],
+        file: bool = False,
+    ) -> None:
+        self._logger: logging.Logger = logging.getLogger(
+            f"CableCarSim.{self.__class__.__name__}"
+        )
+        self._name: str = name
+        self._winder: cab_power.Winder = winder
+        # The layout is fixed when the block is created, so is the set of cars
+        self._cars: typing.Tuple[cab_car.CableCar, ...] = tuple(cars)
+        _offsets, _size = _column_offsets(len(self._cars))
+        self._block: _Block = _Block(name, _size, file)
+        self._columns: typing.Dict[str, memoryview] = {
+            name: self._block.buffer[
+                offset : offset + len(self._cars) * struct.calcsize(fmt)
+            ].cast(fmt)
+            for (name, fmt), offset in zip(CAR_COLUMNS.items(), _offsets.values())
+        }
+        self._generation: int = 0
+        self._ticks: int = 0
+        self._time: float = 0.0
+        for i, car in enumerate(self._cars):
+            self._columns["number"][i] = car.number
+        self._write_header()
+
+    def _write_header(self) -> None:
+        _HEADER.pack_into(
+            self._block.buffer,
+            0,
+            _MAGIC,
+            FORMAT_VERSION,
+            len(self._cars),
+            self._generation,
+            self._ticks,
+            self._time,
+            self._winder.speed,
+            self._winder.status.value,
+        )
+
+    def _write_generation(self) -> None:
+        _GENERATION.pack_into(self._block.buffer, _GENERATION_OFFSET, self._generation)
+
+    def sample(self, dt: float) -> None:
+        # Seqlock, the generation is odd while the block is being written so
+        # readers retry rather than see a partially updated state
+        self._generation += 1
+        self._write_generation()
+        self._ticks += 1
+        self._time += dt
+        _position: memoryview = self._columns["position"]
+        _speed: memoryview = self._columns["speed"]
+        _segment: memoryview = self._columns["segment"]
+        _grip: memoryview = self._columns["grip_state"]
+        _brake: memoryview = self._columns["rail_brake"]
+        for i, car in enumerate(self._cars):
+            _position[i] = car.position
+            _speed[i] = car.speed
+            _segment[i] = car.segment_index
+            _grip[i] = car.grip_state.value
+            _brake[i] = car.rail_brake
+        self._write_header()
+        self._generation += 1
+        self._write_generation()
+
+    def close(self) -> None:
+        for column in self._columns.values():
+            column.release()
+        self._columns = {}
+        self._block.close()
+        self._logger.info("Closed shared state '%s'", self._name)
+
+
+class SharedState:
+    def __init__(self, name: str, file: bool = False) -> None:
+        self._block: _Block = _Block(name, file=file)
+        _magic, _version, _n_cars, *_ = _HEADER.unpack_from(self._block.buffer)
+        if (_magic, _version) != (_MAGIC, FORMAT_VERSION):
+            self._block.close()
+            raise ValueError(f"'{name}' is not a version {FORMAT_VERSION} fleet state")
+        self._n_cars: int = _n_cars
+        _offsets, _ = _column_offsets(_n_cars)
+        # Columns are views onto the shared block, nothing is copied
+        self._columns: typing.Dict[str, memoryview] = {
+            name: self._block.buffer[
+                offset : offset + _n_cars * struct.calcsize(fmt)
+            ].cast(fmt)
+            for (name, fmt), offset in zip(CAR_COLUMNS.items(), _offsets.values())
+        }
+
+    def __len__(self) -> int:
+        return self._n_cars
+
+    def __getitem__(self, name: str) -> memoryview:
+        return self._columns[name]
+
+    @property
+    def generation(self) -> int:
+        return _GENERATION.unpack_from(self._block.buffer, _GENERATION_OFFSET)[0]
+
+    def snapshot(self, retries: int = 1000) -> FleetSnapshot:
+        for _ in range(retries):
+            _header = _HEADER.unpack_from(self._block.buffer)
+            if _header[3] % 2:
+                continue
+            _cars: typing.Dict[str, array.array] = {
+                name: array.array(fmt if fmt != "?" else "b", column.tobytes())
+                for (name, fmt), column in zip(
+                    CAR_COLUMNS.items(), self._columns.values()
+                )
+            }
+            # The copy is only consistent if no write started while it was
+            # being taken
+            if self.generation == _header[3]:
+                return FleetSnapshot(*_header[3:], _cars)
+        raise TimeoutError(f"No consistent snapshot after {retries} attempts")
+
+    def close(self) -> None:
+        for column in self._columns.values():
+            column.release()
+        self._columns = {}
+        self._block.close()
+
+    def __enter__(self) -> "SharedState":
+        return self
+
+    def __exit__(self, *args, **kwargs) -> None:
+        self.close()
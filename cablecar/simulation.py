@@ -1,52 +1,563 @@
 import asyncio
-import logging
+import datetime
 import typing
 
 import click
 
-logging.basicConfig()
-
+import cablecar.bench as cab_bench
 import cablecar.car as cab_car
+import cablecar.clock as cab_clock
 import cablecar.configs as cab_config
+import cablecar.headway as cab_headway
+import cablecar.network as cab_network
 import cablecar.power as cab_power
+import cablecar.profiler as cab_profiler
 import cablecar.route as cab_route
+import cablecar.scheduler as cab_sched
 import cablecar.server as cab_server
+import cablecar.snapshot as cab_snapshot
+import cablecar.sweep as cab_sweep
+import cablecar.telemetry as cab_telemetry
+
+if typing.TYPE_CHECKING:
+    import cablecar.fleet as cab_fleet
+    import cablecar.recorder as cab_recorder
+    import cablecar.sharedstate as cab_shared
 
 
 class Simulation:
-    def __init__(self, configuration: str = "powell") -> None:
+    def __init__(
+        self,
+        configuration: str = "powell",
+        fleet: bool = False,
+        clock: typing.Optional[cab_clock.Clock] = None,
+        headless: bool = False,
+        port: int = 4080,
+        record: typing.Optional[str] = None,
+        history: typing.Optional[str] = None,
+        history_retention: datetime.timedelta = datetime.timedelta(days=1),
+        shared_state: typing.Optional[str] = None,
+        shared_state_file: bool = False,
+        winder_speed: float = 4.25,
+        event_driven: bool = False,
+        snapshot: typing.Optional[str] = None,
+        snapshot_interval: typing.Optional[float] = None,
+        min_headway: typing.Optional[float] = None,
+        auto_brake: bool = False,
+        profile: typing.Optional[str] = None,
+        tick_rates: typing.Optional[typing.Dict[str, float]] = None,
+    ) -> None:
         self._label: str = configuration.title()
-        self._config: typing.Dict[str, typing.Any] = getattr(
-            cab_config.Configs(), configuration
-        )
+        self._use_fleet: bool = fleet
+        self._clock: cab_clock.Clock = clock or cab_clock.Clock()
+        self._headless: bool = headless
+        self._port: int = port
+        self._configuration: str = configuration
+        self._winder_speed: float = winder_speed
+        self._event_driven: bool = event_driven
+        self._snapshot: typing.Optional[str] = snapshot
+        self._snapshot_interval: typing.Optional[float] = snapshot_interval
+        # Simulated time already elapsed when the simulation was restored
+        self._restored_time: float = 0.0
+        self._min_headway: typing.Optional[float] = min_headway
+        self._auto_brake: bool = auto_brake
+        self._headway: typing.Optional[cab_headway.HeadwayMonitor] = None
+        self._profile: typing.Optional[str] = profile
+        self._profiler: typing.Optional[cab_profiler.Profiler] = None
+        self._tick_rates: typing.Optional[typing.Dict[str, float]] = tick_rates
+        # Only checks that the configuration exists, it is parsed on use
+        cab_config.config_path(configuration)
         self._server: typing.Optional[cab_server.SimulationServer] = None
         self._route: typing.Optional[cab_route.Route] = None
         self._winder: typing.Optional[cab_power.Winder] = None
         self._cars: typing.List[cab_car.CableCar] = []
+        self._fleet: typing.Optional["cab_fleet.Fleet"] = None
+        self._loop: typing.Optional[asyncio.AbstractEventLoop] = None
+        self._record: typing.Optional[str] = record
+        self._history: typing.Optional[str] = history
+        self._history_retention: datetime.timedelta = history_retention
+        self._recorder: typing.Optional["cab_recorder.Recorder"] = None
+        self._shared_state: typing.Optional[str] = shared_state
+        self._shared_state_file: bool = shared_state_file
+        self._shared_state_writer: typing.Optional[
+            "cab_shared.SharedStateWriter"
+        ] = None
 
-    def __enter__(self) -> "Simulation":
-        self._server = cab_server.SimulationServer()
-        self._server.start()
-        self._setup_route()
+    async def __aenter__(self) -> "Simulation":
+        self._server = cab_server.SimulationServer(
+            port=self._port,
+            tick_rates=self._tick_rates,
+            headless=self._headless,
+            history=self._history,
+            history_retention=self._history_retention,
+            publish_policies={
+                kind: {
+                    key: cab_server.PublishPolicy.from_config(policy)
+                    for key, policy in variables.items()
+                }
+                for kind, variables in self.config.get("publish", {}).items()
+            },
+        )
+        await self._server.__aenter__()
+        await self._setup_route()
         return self
 
+    async def __aexit__(self, *args, **kwargs) -> None:
+        # A final snapshot is taken on exit so that a restart can carry on
+        # from where the simulation stopped
+        if self._snapshot and self._winder:
+            self.snapshot(self._snapshot)
+        await self._server.__aexit__(*args, **kwargs)
+        if self._recorder:
+            self._recorder.close()
+        if self._shared_state_writer:
+            self._shared_state_writer.close()
+
+    # The synchronous interface drives the same single event loop used by
+    # the OPC UA server and all simulation tasks
+    def __enter__(self) -> "Simulation":
+        self._loop = cab_clock.ClockEventLoop(self._clock)
+        return self._loop.run_until_complete(self.__aenter__())
+
     def __exit__(self, *args, **kwargs) -> None:
-        asyncio.run(self._server.stop())
+        self._loop.run_until_complete(self.__aexit__(*args, **kwargs))
+        self._loop.close()
 
-    def _setup_route(self) -> None:
-        self._winder = cab_power.Winder(self._label, self._server)
+    async def _setup_route(self) -> None:
+        self._winder = cab_power.Winder(self._label, self._server, self._winder_speed)
+        await self._winder.setup()
         self._route = cab_route.Route(self._winder)
+        self._route.set_stops(*cab_config.compile_route(self._configuration))
+        if self._use_fleet:
+            # NumPy is an optional dependency only required by the fleet engine
+            import cablecar.fleet as cab_fleet
+
+            self._fleet = cab_fleet.Fleet(self._route)
+        if self._min_headway is not None:
+            self._headway = cab_headway.HeadwayMonitor(
+                self._route, self._min_headway, self._auto_brake
+            )
+            await self._headway.setup()
+
+    async def create_car(
+        self, distance: float = 0.0, **characteristics: float
+    ) -> cab_car.CableCar:
+        self._cars.append(cab_car.CableCar(len(self._cars) + 1, **characteristics))
+        await self._cars[-1].add_to_route(
+            self._route,
+            distance=distance,
+            fleet=self._fleet,
+            event_driven=self._event_driven,
+        )
+        if self._headway:
+            self._headway.add_car(self._cars[-1])
+        return self._cars[-1]
+
+    def add_car(
+        self, distance: float = 0.0, **characteristics: float
+    ) -> cab_car.CableCar:
+        return self._loop.run_until_complete(
+            self.create_car(distance, **characteristics)
+        )
+
+    def snapshot(self, path: str) -> None:
+        _physics: cab_sched.TickGroup = self._server.scheduler["physics"]
+        cab_snapshot.write(
+            path,
+            cab_snapshot.Snapshot(
+                self._restored_time + _physics.ticks * _physics.period,
+                self._route.distances,
+                self._route.stop_names,
+                self._winder.state(),
+                [car.state() for car in self._cars],
+            ),
+        )
+
+    async def restore_snapshot(self, path: str) -> None:
+        _snapshot: cab_snapshot.Snapshot = cab_snapshot.read(path)
+        if _snapshot.winder.name != self._winder.name:
+            raise ValueError(
+                f"Snapshot '{path}' is of line '{_snapshot.winder.name}', "
+                f"not '{self._winder.name}'"
+            )
+        # The stops are restored too in case the configuration has changed
+        # since the snapshot was taken
+        self._route.set_stops(_snapshot.distances, _snapshot.stop_names)
+        self._winder.restore(_snapshot.winder)
+        self._restored_time = _snapshot.time
+        # Cars are numbered from one in the order they are created, any
+        # which do not yet exist are created first
+        while len(self._cars) < max((i.number for i in _snapshot.cars), default=0):
+            await self.create_car()
+        for state in _snapshot.cars:
+            self._cars[state.number - 1].restore(state)
+
+    def restore(self, path: str) -> None:
+        self._loop.run_until_complete(self.restore_snapshot(path))
+
+    async def _snapshot_periodically(self) -> None:
+        while self._server.running:
+            await asyncio.sleep(self._snapshot_interval)
+            self.snapshot(self._snapshot)
+
+    @property
+    def server(self) -> cab_server.SimulationServer:
+        return self._server
+
+    @property
+    def route(self) -> cab_route.Route:
+        return self._route
 
-    def add_car(self) -> None:
-        self._cars.append(cab_car.CableCar(len(self._cars) + 1))
-        self._cars[-1].add_to_route(self._route)
+    @property
+    def cars(self) -> typing.List[cab_car.CableCar]:
+        return self._cars
 
-    def run_simulation(self) -> None:
-        asyncio.run(self._server.launch())
+    @property
+    def headway(self) -> typing.Optional[cab_headway.HeadwayMonitor]:
+        return self._headway
+
+    @property
+    def profiler(self) -> typing.Optional[cab_profiler.Profiler]:
+        return self._profiler
+
+    @property
+    def config(self) -> typing.Dict[str, typing.Any]:
+        return cab_config.load(self._configuration)
+
+    @property
+    def clock(self) -> cab_clock.Clock:
+        return self._clock
+
+    def _start_recording(self) -> None:
+        # NumPy is an optional dependency only required for recordings
+        import cablecar.recorder as cab_recorder
+
+        _physics: cab_sched.TickGroup = self._server.scheduler["physics"]
+        self._recorder = cab_recorder.Recorder(self._record, self._route, self._cars)
+        self._recorder.start(_physics.period)
+        _physics.add_listener(self._recorder.sample)
+
+    def _start_shared_state(self) -> None:
+        import cablecar.sharedstate as cab_shared
+
+        self._shared_state_writer = cab_shared.SharedStateWriter(
+            self._shared_state, self._winder, self._cars, self._shared_state_file
+        )
+        # Written after each physics tick, so readers see whole ticks only
+        self._server.scheduler["physics"].add_listener(self._shared_state_writer.sample)
+
+    async def run(self, duration: typing.Optional[float] = None) -> None:
+        if self._record and not self._recorder:
+            self._start_recording()
+        if self._shared_state and not self._shared_state_writer:
+            self._start_shared_state()
+        if self._snapshot and self._snapshot_interval:
+            self._server.add_task(self._snapshot_periodically)
+        await self._server.launch(duration)
+
+    def run_simulation(self, duration: typing.Optional[float] = None) -> None:
+        if self._profile:
+            # Sampled from a CPU time signal, the event loop runs unchanged
+            self._profiler = cab_profiler.Profiler()
+            self._profiler.start()
+        try:
+            self._loop.run_until_complete(self.run(duration))
+        except KeyboardInterrupt:
+            # Interrupting run_until_complete leaves the simulation tasks
+            # pending, cancel them before the loop is closed
+            self._loop.run_until_complete(self._server.shutdown())
+        finally:
+            if self._profiler:
+                self._profiler.stop()
+                self._profiler.write(self._profile)
+
+
+def make_clock(speedup: float = 1.0, step: bool = False) -> cab_clock.Clock:
+    if step:
+        return cab_clock.SteppedClock()
+    if speedup != 1.0:
+        return cab_clock.ScaledClock(speedup)
+    return cab_clock.Clock()
+
+
+@click.group(invoke_without_command=True)
+@click.option(
+    "--line",
+    "lines",
+    multiple=True,
+    default=["powell"],
+    show_default=True,
+    help="Line to simulate, repeat to run several lines in separate processes",
+)
+@click.option(
+    "--all-lines",
+    is_flag=True,
+    help="Simulate every configured line, each in its own process",
+)
+@click.option(
+    "--fleet", is_flag=True, help="Use the vectorised fleet engine (requires numpy)"
+)
+@click.option(
+    "--event-driven",
+    is_flag=True,
+    help="Only wake cars when their motion changes rather than every tick",
+)
+@click.option(
+    "--speedup",
+    type=float,
+    default=1.0,
+    show_default=True,
+    help="Run simulated time this many times faster than real time",
+)
+@click.option(
+    "--step",
+    is_flag=True,
+    help="Advance simulated time as fast as possible in discrete steps",
+)
+@click.option(
+    "--headless", is_flag=True, help="Do not start the OPC UA server endpoint"
+)
+@click.option(
+    "--tick-rate",
+    "tick_rates",
+    multiple=True,
+    help=(
+        "Ticks per second of a tick group, as 'group=rate', one of: "
+        f"{', '.join(cab_sched.DEFAULT_TICK_RATES)}"
+    ),
+)
+@click.option(
+    "--duration",
+    type=float,
+    default=None,
+    help="Stop after this many seconds of simulated time",
+)
+@click.option(
+    "--record",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Record every tick to this directory for replay (requires numpy)",
+)
+@click.option(
+    "--history",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Historize car and winder positions and speeds in this SQLite database",
+)
+@click.option(
+    "--history-retention",
+    type=float,
+    default=24.0,
+    show_default=True,
+    help="Hours of history to keep",
+)
+@click.option(
+    "--snapshot",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Save the state of the simulation to this file on exit",
+)
+@click.option(
+    "--snapshot-interval",
+    type=float,
+    default=None,
+    help="Also save the snapshot every this many simulated seconds",
+)
+@click.option(
+    "--restore",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Start from the state saved in this snapshot file",
+)
+@click.option(
+    "--shared-state",
+    default=None,
+    help="Export the state of every car to this named shared memory block",
+)
+@click.option(
+    "--shared-state-file",
+    is_flag=True,
+    help="Treat --shared-state as the path of a memory mapped file instead",
+)
+@click.option(
+    "--min-headway",
+    type=float,
+    default=None,
+    help="Raise a conflict alarm when adjacent cars are closer than this in metres",
+)
+@click.option(
+    "--auto-brake",
+    is_flag=True,
+    help="Apply the rail brake of a car closing on another within --min-headway",
+)
+@click.option(
+    "--profile",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help=(
+        "Profile the run and write PROFILE.pstats and a flamegraph compatible "
+        "PROFILE.collapsed, best combined with --duration"
+    ),
+)
+@click.option(
+    "--log-level",
+    type=click.Choice(["DEBUG", "INFO", "WARNING", "ERROR"], case_sensitive=False),
+    default="WARNING",
+    show_default=True,
+    help="Level of messages written to the console",
+)
+@click.option(
+    "--log-interval",
+    type=float,
+    default=0.0,
+    show_default=True,
+    help="Log each car and winder variable at most once per this many seconds",
+)
+@click.option(
+    "--log-changes-only",
+    is_flag=True,
+    help="Only log a variable when its value differs from the last one logged",
+)
+@click.pass_context
+def simulate(
+    ctx: click.Context,
+    lines: typing.Tuple[str, ...],
+    all_lines: bool,
+    fleet: bool,
+    event_driven: bool,
+    speedup: float,
+    step: bool,
+    headless: bool,
+    tick_rates: typing.Tuple[str, ...],
+    duration: typing.Optional[float],
+    record: typing.Optional[str],
+    history: typing.Optional[str],
+    history_retention: float,
+    snapshot: typing.Optional[str],
+    snapshot_interval: typing.Optional[float],
+    restore: typing.Optional[str],
+    shared_state: typing.Optional[str],
+    shared_state_file: bool,
+    min_headway: typing.Optional[float],
+    auto_brake: bool,
+    profile: typing.Optional[str],
+    log_level: str,
+    log_interval: float,
+    log_changes_only: bool,
+) -> None:
+    # Subcommands are run instead of the simulation
+    if ctx.invoked_subcommand is not None:
+        return
+    try:
+        _tick_rates: typing.Dict[str, float] = dict(
+            cab_sched.parse_tick_rate(i) for i in tick_rates
+        )
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint="--tick-rate")
+    # Log records are written to the console from a separate thread so that
+    # output from large fleets does not block the event loop
+    _listener = cab_telemetry.start_logging(
+        log_level.upper(), log_interval, log_changes_only
+    )
+    _lines: typing.List[str] = cab_config.available() if all_lines else list(lines)
+    try:
+        if len(_lines) > 1:
+            # Each line runs on its own core and exposes its own endpoint on
+            # consecutive ports starting from the default
+            _results: typing.Dict[str, int] = cab_network.run_lines(
+                _lines,
+                options=cab_network.ShardOptions(
+                    fleet=fleet,
+                    event_driven=event_driven,
+                    speedup=speedup,
+                    step=step,
+                    headless=headless,
+                    tick_rates=_tick_rates,
+                    duration=duration,
+                    record=record,
+                    history=history,
+                    history_retention=history_retention,
+                    snapshot=snapshot,
+                    snapshot_interval=snapshot_interval,
+                    restore=restore,
+                    shared_state=shared_state,
+                    shared_state_file=shared_state_file,
+                    min_headway=min_headway,
+                    auto_brake=auto_brake,
+                    profile=profile,
+                    log_level=log_level.upper(),
+                    log_interval=log_interval,
+                    log_changes_only=log_changes_only,
+                ),
+            )
+            _failed: typing.List[str] = [
+                name for name, exitcode in _results.items() if exitcode
+            ]
+            if _failed:
+                raise click.ClickException(f"Line(s) failed: {', '.join(_failed)}")
+            return
+        with Simulation(
+            _lines[0],
+            fleet=fleet,
+            event_driven=event_driven,
+            clock=make_clock(speedup, step),
+            headless=headless,
+            tick_rates=_tick_rates,
+            record=record,
+            history=history,
+            history_retention=datetime.timedelta(hours=history_retention),
+            shared_state=shared_state,
+            shared_state_file=shared_state_file,
+            snapshot=snapshot,
+            snapshot_interval=snapshot_interval,
+            min_headway=min_headway,
+            auto_brake=auto_brake,
+            profile=profile,
+        ) as cabsim:
+            if restore:
+                cabsim.restore(restore)
+            else:
+                cabsim.add_car()
+            cabsim.run_simulation(duration)
+            if cabsim.profiler:
+                click.echo(cabsim.profiler.summary(), err=True)
+    finally:
+        _listener.stop()
+
+
+@simulate.command
+@click.argument("path", type=click.Path(exists=True, file_okay=False))
+@click.option(
+    "--speedup",
+    type=float,
+    default=1.0,
+    show_default=True,
+    help="Replay this many times faster than recorded",
+)
+@click.option(
+    "--step",
+    is_flag=True,
+    help="Replay as fast as possible in discrete steps",
+)
+@click.option(
+    "--headless", is_flag=True, help="Do not start the OPC UA server endpoint"
+)
+def replay(path: str, speedup: float, step: bool, headless: bool) -> None:
+    # NumPy is an optional dependency only required for recordings
+    import cablecar.recorder as cab_recorder
+
+    _listener = cab_telemetry.start_logging()
+    _loop = cab_clock.ClockEventLoop(make_clock(speedup, step))
+    try:
+        _loop.run_until_complete(
+            cab_recorder.run_replay(cab_recorder.Recording(path), headless)
+        )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _loop.close()
+        _listener.stop()
 
 
-@click.command
-def simulate() -> None:
-    with Simulation() as cabsim:
-        cabsim.add_car()
-        cabsim.run_simulation()
+simulate.add_command(cab_bench.bench)
+simulate.add_command(cab_sweep.sweep)
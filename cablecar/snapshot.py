@@ -0,0 +1,190 @@
+import array
+import os
+import struct
+import sys
+import typing
+
+import cablecar.car as cab_car
+import cablecar.common as cab_com
+import cablecar.power as cab_power
+
+FORMAT_VERSION: int = 1
+
+# Magic, format version, simulated time, number of stops and number of cars
+_HEADER: struct.Struct = struct.Struct("<4sHdII")
+_MAGIC: bytes = b"CCSN"
+# Status, controller, direction, speed and maximum speed of the winder
+_WINDER: struct.Struct = struct.Struct("<bbbdd")
+_LENGTH: struct.Struct = struct.Struct("<I")
+
+# Car states are stored column by column, as array type codes, so that
+# each column is encoded and decoded in a single call
+CAR_COLUMNS: typing.Dict[str, str] = {
+    "number": "i",
+    "position": "d",
+    "speed": "d",
+    "segment": "i",
+    "direction": "b",
+    "grip_state": "b",
+    "rail_brake": "b",
+    "controller": "b",
+    "bell": "b",
+    "grip_target": "b",
+    "grip_remaining": "d",
+    "bell_remaining": "d",
+    "acceleration": "d",
+    "rail_brake_factor": "d",
+    "shoe_brake_factor": "d",
+}
+
+
+class Snapshot(typing.NamedTuple):
+    time: float
+    distances: typing.Sequence[float]
+    stop_names: typing.Sequence[str]
+    winder: cab_power.WinderState
+    cars: typing.List[cab_car.CarState]
+
+
+def _pack_strings(strings: typing.Sequence[str]) -> bytes:
+    _data: bytes = "\0".join(strings).encode("utf-8")
+    return _LENGTH.pack(len(_data)) + _data
+
+
+def _unpack_strings(data: bytes, offset: int) -> typing.Tuple[typing.List[str], int]:
+    (_size,) = _LENGTH.unpack_from(data, offset)
+    _offset: int = offset + _LENGTH.size
+    return data[_offset : _offset + _size].decode("utf-8").split("\0"), _offset + _size
+
+
+def _encode_car(state: cab_car.CarState) -> typing.Tuple[typing.Any, ...]:
+    return (
+        state.number,
+        state.position,
+        state.speed,
+        state.segment,
+        state.direction.value,
+        state.grip_state.value,
+        state.rail_brake,
+        state.controller.value,
+        state.bell,
+        state.grip_target.value if state.grip_target else 0,
+        state.grip_remaining,
+        state.bell_remaining,
+        state.acceleration,
+        state.rail_brake_factor,
+        state.shoe_brake_factor,
+    )
+
+
+def _decode_car(values: typing.Tuple[typing.Any, ...]) -> cab_car.CarState:
+    (
+        _number,
+        _position,
+        _speed,
+        _segment,
+        _direction,
+        _grip,
+        _rail_brake,
+        _controller,
+        _bell,
+        _grip_target,
+        *_rest,
+    ) = values
+    return cab_car.CarState(
+        _number,
+        _position,
+        _speed,
+        _segment,
+        cab_com.Direction(_direction),
+        cab_car.GripState(_grip),
+        bool(_rail_brake),
+        cab_car.Controller(_controller),
+        bool(_bell),
+        cab_car.GripState(_grip_target) if _grip_target else None,
+        *_rest,
+    )
+
+
+def write(path: str, snapshot: Snapshot) -> None:
+    _parts: typing.List[bytes] = [
+        _HEADER.pack(
+            _MAGIC,
+            FORMAT_VERSION,
+            snapshot.time,
+            len(snapshot.distances),
+            len(snapshot.cars),
+        ),
+        _pack_strings(snapshot.stop_names),
+        _pack_strings([snapshot.winder.name]),
+        _WINDER.pack(
+            snapshot.winder.status.value,
+            snapshot.winder.controller.value,
+            snapshot.winder.direction.value,
+            snapshot.winder.speed,
+            snapshot.winder.max_speed,
+        ),
+    ]
+    _columns: typing.List[array.array] = [array.array("d", snapshot.distances)]
+    _rows = [_encode_car(i) for i in snapshot.cars]
+    for i, code in enumerate(CAR_COLUMNS.values()):
+        _columns.append(array.array(code, (row[i] for row in _rows)))
+    for column in _columns:
+        # Columns are always stored little endian
+        if sys.byteorder == "big":
+            column.byteswap()
+        _parts.append(column.tobytes())
+
+    # Written to a temporary file first so that an existing snapshot is
+    # only replaced by a complete one
+    _temp_path: str = f"{path}.{os.getpid()}"
+    with open(_temp_path, "wb") as out_f:
+        out_f.write(b"".join(_parts))
+    os.replace(_temp_path, path)
+
+
+def read(path: str) -> Snapshot:
+    with open(path, "rb") as in_f:
+        _data: bytes = in_f.read()
+    if len(_data) < _HEADER.size:
+        raise ValueError(f"'{path}' is not a snapshot")
+    _magic, _version, _time, _n_stops, _n_cars = _HEADER.unpack_from(_data)
+    if _magic != _MAGIC:
+        raise ValueError(f"'{path}' is not a snapshot")
+    if _version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {_version} in '{path}'")
+    _stop_names, _offset = _unpack_strings(_data, _HEADER.size)
+    _names, _offset = _unpack_strings(_data, _offset)
+    _status, _controller, _direction, _speed, _max_speed = _WINDER.unpack_from(
+        _data, _offset
+    )
+    _offset += _WINDER.size
+
+    def _column(code: str, count: int) -> array.array:
+        nonlocal _offset
+        _column_data: array.array = array.array(code)
+        _size: int = count * _column_data.itemsize
+        _column_data.frombytes(_data[_offset : _offset + _size])
+        if sys.byteorder == "big":
+            _column_data.byteswap()
+        _offset += _size
+        return _column_data
+
+    _distances: array.array = _column("d", _n_stops)
+    _cars: typing.List[array.array] = [
+        _column(code, _n_cars) for code in CAR_COLUMNS.values()
+    ]
+    return Snapshot(
+        _time,
+        _distances,
+        _stop_names if _n_stops else [],
+        cab_power.WinderState(
+            _names[0],
+            cab_power.Status(_status),
+            cab_power.Controller(_controller),
+            cab_com.Direction(_direction),
+            _speed,
+            _max_speed,
+        ),
+        [_decode_car(values) for values in zip(*_cars)],
+    )
@@ -0,0 +1,361 @@
+import concurrent.futures
+import csv
+import itertools
+import logging
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+import typing
+
+import click
+
+import cablecar.car as cab_car
+import cablecar.clock as cab_clock
+import cablecar.power as cab_power
+import cablecar.route as cab_route
+
+# Parameters which can be swept and their defaults, matching those of the
+# car and winder models. Drivers only stop using the rail brake, so the shoe
+# brake factor would have no effect on the results and is not swept.
+PARAMETERS: typing.Dict[str, float] = {
+    "acceleration": 0.1,
+    "rail_brake_factor": 2.0,
+    "winder_speed": 4.25,
+    "car_spacing": 50.0,
+}
+
+METRICS: typing.Tuple[str, ...] = (
+    "trip_time",
+    "stops_served",
+    "braking_distance",
+    "limit_hits",
+    "min_headway",
+)
+
+# A car which comes to rest within this distance of a stop has served it
+STOP_TOLERANCE: float = 2.0
+
+
+class Uniform(typing.NamedTuple):
+    low: float
+    high: float
+
+
+class RunSpec(typing.NamedTuple):
+    index: int
+    seed: int
+    parameters: typing.Dict[str, float]
+
+
+class RunResult(typing.NamedTuple):
+    index: int
+    seed: int
+    parameters: typing.Dict[str, float]
+    trip_time: float
+    stops_served: int
+    braking_distance: float
+    limit_hits: int
+    min_headway: float
+
+    def row(self) -> typing.Dict[str, typing.Any]:
+        return {
+            "run": self.index,
+            "seed": self.seed,
+            **self.parameters,
+            **{name: getattr(self, name) for name in METRICS},
+        }
+
+
+def parse_parameter(
+    value: str,
+) -> typing.Tuple[str, typing.Union[typing.List[float], Uniform]]:
+    # 'name=low:high' is sampled uniformly, 'name=a,b,c' is a grid axis
+    _name, _, _values = value.partition("=")
+    if _name not in PARAMETERS or not _values:
+        raise ValueError(
+            f"Expected one of {', '.join(PARAMETERS)} as 'name=a,b,c' "
+            f"or 'name=low:high', got '{value}'"
+        )
+    if ":" in _values:
+        _low, _high = _values.split(":")
+        return _name, Uniform(float(_low), float(_high))
+    return _name, [float(i) for i in _values.split(",")]
+
+
+def build_runs(
+    parameters: typing.Dict[str, typing.Union[typing.List[float], Uniform]],
+    samples: int = 1,
+    seed: int = 0,
+) -> typing.List[RunSpec]:
+    _random: random.Random = random.Random(seed)
+    _grid: typing.Dict[str, typing.List[float]] = {
+        name: values for name, values in parameters.items() if isinstance(values, list)
+    }
+    _distributions: typing.Dict[str, Uniform] = {
+        name: values
+        for name, values in parameters.items()
+        if isinstance(values, Uniform)
+    }
+    _runs: typing.List[RunSpec] = []
+    # Every point of the grid is run 'samples' times, each with its own draw
+    # from the distributions and its own seed, all derived from 'seed'
+    for point in itertools.product(*_grid.values()):
+        for _ in range(samples):
+            _parameters: typing.Dict[str, float] = {
+                **PARAMETERS,
+                **dict(zip(_grid, point)),
+                **{
+                    name: _random.uniform(*values)
+                    for name, values in _distributions.items()
+                },
+            }
+            _runs.append(RunSpec(len(_runs), _random.getrandbits(32), _parameters))
+    return _runs
+
+
+class _Driver:
+    # Drives a car from stop to stop, braking with the rail brake so as to
+    # come to rest at each stop and dwelling there for a random time
+    def __init__(
+        self,
+        car: cab_car.CableCar,
+        route: cab_route.Route,
+        rng: random.Random,
+        deceleration: float,
+    ) -> None:
+        self._car: cab_car.CableCar = car
+        self._route: cab_route.Route = route
+        self._random: random.Random = rng
+        self._deceleration: float = deceleration
+        self._target: typing.Optional[float] = None
+        self._braking_from: typing.Optional[float] = None
+        self._dwell: float = 0.0
+        self._beyond_limit: bool = False
+        self.finished_at: typing.Optional[float] = None
+        self.stops_served: int = 0
+        self.limit_hits: int = 0
+        self.braking_distances: typing.List[float] = []
+
+    @property
+    def car(self) -> cab_car.CableCar:
+        return self._car
+
+    def _next_stop(self) -> typing.Optional[float]:
+        for distance in self._route.distances:
+            if distance > self._car.position + STOP_TOLERANCE:
+                return distance
+        return None
+
+    def _depart(self) -> None:
+        self._target = self._next_stop()
+        self._car.command(cab_car.Controller.RAIL_BRAKE_RELEASE)
+        self._car.command(cab_car.Controller.GRIP_ENGAGE)
+
+    def tick(self, dt: float, now: float) -> None:
+        if self.finished_at is not None:
+            return
+        _position: float = self._car.position
+        _speed: float = abs(self._car.speed)
+        _beyond_limit: bool = _position < 0.0 or _position > self._route.length
+        if _beyond_limit and not self._beyond_limit:
+            self.limit_hits += 1
+        self._beyond_limit = _beyond_limit
+        if self._target is None:
+            self._dwell -= dt
+            if self._dwell <= cab_car.TIMER_TOLERANCE:
+                self._depart()
+        elif self._braking_from is None:
+            # Brakes are applied once the car would stop at the target, the
+            # car moves for one more tick before it starts to slow
+            _stopping: float = _speed**2 / (2 * self._deceleration) + _speed * dt
+            if _speed and self._target - _position <= _stopping:
+                self._braking_from = _position
+                self._car.command(cab_car.Controller.RAIL_BRAKE_APPLY)
+        elif not _speed:
+            self.braking_distances.append(_position - self._braking_from)
+            if abs(_position - self._target) <= STOP_TOLERANCE:
+                self.stops_served += 1
+            self._target = None
+            self._braking_from = None
+            self._dwell = self._random.uniform(10.0, 30.0)
+            # The trip ends on arrival at the last stop
+            if self._next_stop() is None:
+                self.finished_at = now
+
+
+def run(
+    spec: RunSpec,
+    configuration: str = "powell",
+    cars: int = 1,
+    duration: float = 3600.0,
+    fleet: bool = False,
+) -> RunResult:
+    # Imported here as this module is itself imported by the simulation CLI
+    import cablecar.simulation as cab_sim
+
+    _random: random.Random = random.Random(spec.seed)
+    _parameters: typing.Dict[str, float] = spec.parameters
+    _drivers: typing.List[_Driver] = []
+    _headways: typing.List[float] = []
+    _time: typing.List[float] = [0.0]
+    with cab_sim.Simulation(
+        configuration,
+        fleet=fleet,
+        clock=cab_clock.SteppedClock(),
+        headless=True,
+        winder_speed=_parameters["winder_speed"],
+    ) as cabsim:
+        if (cars - 1) * _parameters["car_spacing"] > cabsim.route.length:
+            raise ValueError(
+                f"{cars} cars {_parameters['car_spacing']}m apart do not fit "
+                f"on a route of length {cabsim.route.length}m"
+            )
+        # Car 1 leads and the others follow at the given spacing behind it
+        for i in range(cars):
+            _car = cabsim.add_car(
+                distance=(cars - 1 - i) * _parameters["car_spacing"],
+                acceleration=_parameters["acceleration"],
+                rail_brake_factor=_parameters["rail_brake_factor"],
+            )
+            _drivers.append(
+                _Driver(
+                    _car,
+                    cabsim.route,
+                    _random,
+                    _parameters["acceleration"] * _parameters["rail_brake_factor"],
+                )
+            )
+        cabsim.route.winder.status = cab_power.Status.CLOCKWISE
+
+        def _observe(dt: float) -> None:
+            _time[0] += dt
+            for driver in _drivers:
+                driver.tick(dt, _time[0])
+            # Cars which have finished their trip are out of service
+            _positions: typing.List[float] = sorted(
+                i.car.position for i in _drivers if i.finished_at is None
+            )
+            if len(_positions) > 1:
+                _headways.append(min(b - a for a, b in zip(_positions, _positions[1:])))
+            if all(i.finished_at is not None for i in _drivers):
+                cabsim.server.finish()
+
+        cabsim.server.scheduler["physics"].add_listener(_observe)
+        cabsim.run_simulation(duration)
+
+    _trips: typing.List[float] = [
+        i.finished_at for i in _drivers if i.finished_at is not None
+    ]
+    _braking: typing.List[float] = [j for i in _drivers for j in i.braking_distances]
+    return RunResult(
+        spec.index,
+        spec.seed,
+        _parameters,
+        sum(_trips) / len(_trips) if _trips else math.nan,
+        sum(i.stops_served for i in _drivers),
+        sum(_braking) / len(_braking) if _braking else math.nan,
+        sum(i.limit_hits for i in _drivers),
+        min(_headways) if _headways else math.nan,
+    )
+
+
+def run_sweep(
+    runs: typing.Sequence[RunSpec],
+    configuration: str = "powell",
+    cars: int = 1,
+    duration: float = 3600.0,
+    fleet: bool = False,
+    workers: typing.Optional[int] = None,
+) -> typing.Iterator[RunResult]:
+    # Results are yielded as runs complete rather than in the order given
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        _futures = [
+            executor.submit(run, spec, configuration, cars, duration, fleet)
+            for spec in runs
+        ]
+        for future in concurrent.futures.as_completed(_futures):
+            yield future.result()
+
+
+@click.command
+@click.option("--line", default="powell", show_default=True, help="Line to simulate")
+@click.option(
+    "--param",
+    "params",
+    multiple=True,
+    help=(
+        "Parameter to vary, as 'name=a,b,c' for a grid axis or 'name=low:high' "
+        f"for a uniform distribution, one of: {', '.join(PARAMETERS)}"
+    ),
+)
+@click.option(
+    "--samples",
+    type=int,
+    default=1,
+    show_default=True,
+    help="Number of runs at each point of the grid",
+)
+@click.option("--cars", type=int, default=1, show_default=True)
+@click.option(
+    "--duration",
+    type=float,
+    default=3600.0,
+    show_default=True,
+    help="Maximum simulated seconds per run",
+)
+@click.option(
+    "--fleet", is_flag=True, help="Use the vectorised fleet engine (requires numpy)"
+)
+@click.option(
+    "--workers",
+    type=int,
+    default=None,
+    help="Number of worker processes, defaults to the number of cores",
+)
+@click.option("--seed", type=int, default=0, show_default=True)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write the results table to this CSV file instead of the console",
+)
+def sweep(
+    line: str,
+    params: typing.Tuple[str, ...],
+    samples: int,
+    cars: int,
+    duration: float,
+    fleet: bool,
+    workers: typing.Optional[int],
+    seed: int,
+    output: typing.Optional[str],
+) -> None:
+    logging.basicConfig(level=logging.ERROR)
+    try:
+        _parameters = dict(parse_parameter(i) for i in params)
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint="--param")
+    _runs: typing.List[RunSpec] = build_runs(_parameters, samples, seed)
+    _start: float = time.perf_counter()
+    _out_f: typing.TextIO = open(output, "w", newline="") if output else sys.stdout
+    try:
+        _writer = csv.DictWriter(
+            _out_f, fieldnames=["run", "seed", *PARAMETERS, *METRICS]
+        )
+        _writer.writeheader()
+        for result in run_sweep(_runs, line, cars, duration, fleet, workers):
+            _writer.writerow(result.row())
+            _out_f.flush()
+    finally:
+        if output:
+            _out_f.close()
+    click.echo(
+        f"Completed {len(_runs)} runs in {time.perf_counter() - _start:.1f}s "
+        f"using {workers or os.cpu_count()} workers",
+        err=True,
+    )
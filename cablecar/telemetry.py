@@ -0,0 +1,66 @@
+import logging
+import logging.handlers
+import queue
+import typing
+
+
+class SamplingFilter(logging.Filter):
+    # Telemetry records share a format string per variable, e.g.
+    # "CURRENT_POSITION=%s", so the logger name and message together identify
+    # the variable of one car or winder and the arguments hold its value
+    def __init__(self, interval: float = 0.0, changes_only: bool = False) -> None:
+        super().__init__()
+        self._interval: float = interval
+        self._changes_only: bool = changes_only
+        self._last: typing.Dict[
+            typing.Tuple[str, str], typing.Tuple[float, typing.Any]
+        ] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Warnings and errors are never sampled
+        if record.levelno >= logging.WARNING or not record.args:
+            return True
+        _key: typing.Tuple[str, str] = (record.name, str(record.msg))
+        _previous: typing.Optional[typing.Tuple[float, typing.Any]] = self._last.get(
+            _key
+        )
+        if _previous is not None:
+            _created, _args = _previous
+            if self._changes_only and _args == record.args:
+                return False
+            if record.created - _created < self._interval:
+                return False
+        self._last[_key] = (record.created, record.args)
+        return True
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    # The default handler formats the message before queueing it, records
+    # are instead passed on untouched so that formatting happens in the
+    # listener thread rather than in the event loop
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def start_logging(
+    level: typing.Union[int, str] = logging.WARNING,
+    interval: float = 0.0,
+    changes_only: bool = False,
+) -> logging.handlers.QueueListener:
+    _queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _output: logging.Handler = logging.StreamHandler()
+    _output.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    _handler: logging.Handler = _DeferredQueueHandler(_queue)
+    _handler.addFilter(SamplingFilter(interval, changes_only))
+
+    _root: logging.Logger = logging.getLogger()
+    for handler in _root.handlers[:]:
+        _root.removeHandler(handler)
+    _root.addHandler(_handler)
+    # The level only applies to the simulation, the OPC UA library remains
+    # at its default level
+    logging.getLogger("CableCarSim").setLevel(level)
+
+    _listener = logging.handlers.QueueListener(_queue, _output)
+    _listener.start()
+    return _listener
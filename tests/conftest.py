@@ -0,0 +1,45 @@
+import typing
+
+import pytest
+
+import cablecar.clock as cab_clock
+import cablecar.simulation as cab_sim
+
+# State of every car after each physics tick
+Trace = typing.List[typing.List[typing.Tuple[typing.Any, ...]]]
+
+
+@pytest.fixture
+def simulation() -> typing.Callable[..., cab_sim.Simulation]:
+    # Headless and on a stepped clock unless given, so runs take as long as
+    # the ticks do
+    def _simulation(**options: typing.Any) -> cab_sim.Simulation:
+        return cab_sim.Simulation(
+            **{"clock": cab_clock.SteppedClock(), "headless": True, **options}
+        )
+
+    return _simulation
+
+
+@pytest.fixture
+def trace() -> typing.Callable[..., Trace]:
+    # Traces the cars of a simulation, calling on_tick with the number of
+    # physics ticks so far to change its course at given ticks
+    def _trace(
+        cabsim: cab_sim.Simulation,
+        on_tick: typing.Optional[typing.Callable[[int], None]] = None,
+        offset: int = 0,
+    ) -> Trace:
+        _trace: Trace = []
+
+        def _observe(dt: float) -> None:
+            _trace.append(
+                [(i.position, i.speed, i.location, i.grip_state) for i in cabsim.cars]
+            )
+            if on_tick is not None:
+                on_tick(cabsim.server.scheduler["physics"].ticks + offset)
+
+        cabsim.server.scheduler["physics"].add_listener(_observe)
+        return _trace
+
+    return _trace
@@ -0,0 +1,69 @@
+import asyncio
+import socket
+import typing
+
+import cablecar
+import cablecar.car as cab_car
+import cablecar.client as cab_client
+import cablecar.clock as cab_clock
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_client(simulation: typing.Callable) -> None:
+    # The server endpoint is needed, so the simulation runs in real time
+    _port: int = _free_port()
+    _states: typing.List[cab_client.FleetState] = []
+    _cars: typing.List[typing.Tuple[int, ...]] = []
+    with simulation(clock=cab_clock.Clock(), headless=False, port=_port) as cabsim:
+        for i in range(3):
+            cabsim.add_car(distance=i * 100.0)
+
+        async def _client() -> None:
+            try:
+                async with cab_client.CableCarClient(
+                    cablecar.SERVER_URL.format(port=_port)
+                ) as client:
+                    _cars.append(client.cars)
+                    _states.append(await client.read_fleet_state())
+                    await client.send_commands(
+                        {"Powell": "ON", 2: cab_car.Controller.RAIL_BRAKE_APPLY}
+                    )
+                    # The winder takes up to a tick to start
+                    for _ in range(50):
+                        _states.append(
+                            await client.read_fleet_state(("POSITION", "RAIL_BRAKE"))
+                        )
+                        if _states[-1].winder["STATUS"] == "CLOCKWISE":
+                            break
+                        await asyncio.sleep(0.1)
+            finally:
+                cabsim.server.finish()
+
+        cabsim.server.add_task(_client)
+        cabsim.run_simulation()
+    assert _cars == [(1, 2, 3)]
+    assert _states[0].winder == {
+        "STATUS": "STOPPED",
+        "CONTROLLER": "NONE",
+        "SPEED": 0.0,
+    }
+    assert _states[0].cars[2] == {
+        "LOCATION": "Depot",
+        "POSITION": 100.0,
+        "GRIPSTATE": "RELEASED",
+        "SPEED": 0.0,
+        "RAIL_BRAKE": False,
+        "CONTROLLER": "NONE",
+        "BELL": False,
+    }
+    assert _states[-1].winder["STATUS"] == "CLOCKWISE"
+    assert _states[-1].cars == {
+        1: {"POSITION": 0.0, "RAIL_BRAKE": False},
+        2: {"POSITION": 100.0, "RAIL_BRAKE": True},
+        3: {"POSITION": 200.0, "RAIL_BRAKE": False},
+    }
@@ -0,0 +1,106 @@
+import os
+import pathlib
+import typing
+
+import pytest
+
+import cablecar.configs as cab_config
+
+STOPS: str = """[route]
+"Depot" = 0
+"Top" = 100
+"Middle" = 50
+"""
+
+
+@pytest.fixture
+def config_dir(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> pathlib.Path:
+    # Configurations and their caches are kept out of the package
+    monkeypatch.setattr(cab_config, "CONFIG_DIR", str(tmp_path))
+    monkeypatch.setattr(cab_config, "_loaded", {})
+    monkeypatch.setattr(cab_config, "_compiled", {})
+    (tmp_path / "test.toml").write_text(STOPS)
+    return tmp_path
+
+
+def _compile_afresh() -> cab_config.CompiledRoute:
+    # Forgets the route compiled in this process, so the cache is read
+    cab_config._compiled.clear()
+    return cab_config.compile_route("test")
+
+
+def _touch(path: pathlib.Path) -> None:
+    _mtime: int = path.stat().st_mtime_ns + 1_000_000_000
+    os.utime(path, ns=(_mtime, _mtime))
+
+
+def test_cache_reused(
+    config_dir: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    _route: cab_config.CompiledRoute = cab_config.compile_route("test")
+    assert list(_route.distances) == [0.0, 50.0, 100.0]
+    assert _route.stop_names == ("Depot", "Middle", "Top")
+    assert (config_dir / "test.route.cache").exists()
+
+    def _load(name: str) -> typing.Dict[str, typing.Any]:
+        raise AssertionError("The TOML file was parsed again")
+
+    monkeypatch.setattr(cab_config, "load", _load)
+    assert _compile_afresh() == _route
+
+
+def test_cache_discarded_on_change(config_dir: pathlib.Path) -> None:
+    cab_config.compile_route("test")
+    (config_dir / "test.toml").write_text(STOPS + '"Bottom" = 75\n')
+    _touch(config_dir / "test.toml")
+    for route in (cab_config.compile_route("test"), _compile_afresh()):
+        assert list(route.distances) == [0.0, 50.0, 75.0, 100.0]
+        assert route.stop_names == ("Depot", "Middle", "Bottom", "Top")
+
+
+def _size() -> int:
+    return cab_config._CACHE_HEADER.size
+
+
+def _header(path: pathlib.Path, **fields: typing.Any) -> bytes:
+    _fields: typing.Dict[str, typing.Any] = {
+        "magic": cab_config._CACHE_MAGIC,
+        "version": cab_config._CACHE_VERSION,
+        "mtime": path.stat().st_mtime_ns,
+        "count": 3,
+        **fields,
+    }
+    return cab_config._CACHE_HEADER.pack(*_fields.values())
+
+
+@pytest.mark.parametrize(
+    "corrupt",
+    (
+        lambda path, data: b"",
+        lambda path, data: data[:10],
+        lambda path, data: b"XXXX" + data[4:],
+        lambda path, data: _header(path, version=0) + data[_size() :],
+        lambda path, data: _header(path, count=5) + data[_size() :],
+        lambda path, data: data[: _size() + 12],
+        lambda path, data: data[: _size() + 24] + b"\xff\xfe",
+    ),
+    ids=(
+        "empty",
+        "short header",
+        "magic",
+        "old version",
+        "count",
+        "short distances",
+        "names",
+    ),
+)
+def test_corrupt_cache_rebuilt(
+    config_dir: pathlib.Path, corrupt: typing.Callable[[pathlib.Path, bytes], bytes]
+) -> None:
+    _route: cab_config.CompiledRoute = cab_config.compile_route("test")
+    _cache: pathlib.Path = config_dir / "test.route.cache"
+    _data: bytes = _cache.read_bytes()
+    _cache.write_bytes(corrupt(config_dir / "test.toml", _data))
+    assert _compile_afresh() == _route
+    # and written again in full
+    assert _cache.read_bytes() == _data
@@ -0,0 +1,46 @@
+import typing
+
+import pytest
+
+import cablecar.car as cab_car
+import cablecar.power as cab_power
+
+
+def _drive(
+    simulation: typing.Callable, trace: typing.Callable, event_driven: bool
+) -> typing.List[typing.Any]:
+    with simulation(event_driven=event_driven) as cabsim:
+        for i in range(10):
+            cabsim.add_car(distance=i * 20.0)
+        cabsim.route.winder.status = cab_power.Status.CLOCKWISE
+        for car in cabsim.cars[::2]:
+            car.command(cab_car.Controller.GRIP_ENGAGE)
+
+        def _command(ticks: int) -> None:
+            # Sleeping cars are woken by commands and winder speed changes
+            if ticks == 100:
+                for car in cabsim.cars[::4]:
+                    car.command(cab_car.Controller.RAIL_BRAKE_APPLY)
+            elif ticks == 200:
+                cabsim.route.winder.status = cab_power.Status.STOPPED
+            elif ticks == 250:
+                cabsim.route.winder.status = cab_power.Status.CLOCKWISE
+                for car in cabsim.cars:
+                    car.command(cab_car.Controller.GRIP_ENGAGE)
+
+        _trace: typing.List[typing.Any] = trace(cabsim, _command)
+        cabsim.run_simulation(600)
+    return _trace
+
+
+def test_event_driven_matches_ticking(
+    simulation: typing.Callable, trace: typing.Callable
+) -> None:
+    _ticking: typing.List[typing.Any] = _drive(simulation, trace, False)
+    _event_driven: typing.List[typing.Any] = _drive(simulation, trace, True)
+    assert len(_event_driven) == len(_ticking)
+    for expected, actual in zip(_ticking, _event_driven):
+        # Positions of sleeping cars are interpolated, so may differ by
+        # rounding from those accumulated tick by tick
+        assert [i[0] for i in actual] == pytest.approx([i[0] for i in expected])
+        assert [i[1:] for i in actual] == [i[1:] for i in expected]
@@ -0,0 +1,55 @@
+import typing
+
+import pytest
+
+import cablecar.car as cab_car
+import cablecar.power as cab_power
+
+pytest.importorskip("numpy")
+
+
+def _drive(
+    simulation: typing.Callable,
+    trace: typing.Callable,
+    fleet: bool,
+    status: cab_power.Status,
+) -> typing.List[typing.Any]:
+    with simulation(fleet=fleet) as cabsim:
+        for i in range(6):
+            cabsim.add_car(distance=i * 200.0, acceleration=0.1 + i * 0.01)
+        cabsim.route.winder.status = status
+        for car in cabsim.cars[::2]:
+            car.command(cab_car.Controller.GRIP_ENGAGE)
+
+        def _command(ticks: int) -> None:
+            if ticks == 100:
+                for car in cabsim.cars[1::2]:
+                    car.command(cab_car.Controller.GRIP_ENGAGE)
+                cabsim.cars[0].command(cab_car.Controller.RAIL_BRAKE_APPLY)
+            elif ticks == 200:
+                cabsim.cars[2].command(cab_car.Controller.GRIP_RELEASE)
+
+        _trace: typing.List[typing.Any] = trace(cabsim, _command)
+        cabsim.run_simulation(400)
+    return _trace
+
+
+def test_fleet_enrolls_cars(simulation: typing.Callable) -> None:
+    with simulation(fleet=True) as cabsim:
+        for _ in range(3):
+            cabsim.add_car()
+        assert len(cabsim._fleet) == 3
+        assert all(car._fleet is cabsim._fleet for car in cabsim.cars)
+        # The fleet replaces the drive tick of every car
+        assert len(cabsim.server.scheduler["physics"]) == 1
+
+
+@pytest.mark.parametrize(
+    "status", (cab_power.Status.CLOCKWISE, cab_power.Status.COUNTER_CLOCKWISE)
+)
+def test_fleet_matches_drive(
+    simulation: typing.Callable, trace: typing.Callable, status: cab_power.Status
+) -> None:
+    assert _drive(simulation, trace, True, status) == _drive(
+        simulation, trace, False, status
+    )
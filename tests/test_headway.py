@@ -0,0 +1,45 @@
+import typing
+
+import pytest
+
+import cablecar.car as cab_car
+import cablecar.power as cab_power
+
+
+def _brakes(
+    simulation: typing.Callable,
+    status: cab_power.Status,
+    engaged: int,
+    auto_brake: bool = True,
+) -> typing.List[bool]:
+    with simulation(min_headway=30.0, auto_brake=auto_brake) as cabsim:
+        for distance in (0.0, 20.0):
+            cabsim.add_car(distance=distance)
+        cabsim.route.winder.status = status
+        cabsim.cars[engaged].command(cab_car.Controller.GRIP_ENGAGE)
+        cabsim.run_simulation(10)
+        assert cabsim.headway.conflicts
+        return [i.rail_brake for i in cabsim.cars]
+
+
+def test_headway_brakes_follower(simulation: typing.Callable) -> None:
+    # Cars accelerating against the cable still gain position, so the
+    # first car closes on the second one in either direction
+    assert _brakes(simulation, cab_power.Status.COUNTER_CLOCKWISE, 0) == [
+        True,
+        False,
+    ]
+    assert _brakes(simulation, cab_power.Status.COUNTER_CLOCKWISE, 0, False) == [
+        False,
+        False,
+    ]
+
+
+@pytest.mark.parametrize(
+    "status", (cab_power.Status.CLOCKWISE, cab_power.Status.COUNTER_CLOCKWISE)
+)
+def test_headway_spares_leader(
+    simulation: typing.Callable, status: cab_power.Status
+) -> None:
+    # The moving car is pulling away from the parked one behind it
+    assert _brakes(simulation, status, 1) == [False, False]
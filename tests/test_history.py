@@ -0,0 +1,108 @@
+import asyncio
+import datetime
+import pathlib
+import sqlite3
+import typing
+
+import asyncua.ua
+
+import cablecar.history as cab_history
+
+NODE: asyncua.ua.NodeId = asyncua.ua.NodeId(1, 2)
+
+
+def _value(value: float, time: datetime.datetime) -> asyncua.ua.DataValue:
+    return asyncua.ua.DataValue(
+        asyncua.ua.Variant(value, asyncua.ua.VariantType.Double),
+        SourceTimestamp=time,
+        ServerTimestamp=time,
+    )
+
+
+def _rows(path: pathlib.Path) -> int:
+    with sqlite3.connect(path) as connection:
+        return connection.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+
+def test_history_commits_in_batches(tmp_path: pathlib.Path) -> None:
+    _path: pathlib.Path = tmp_path / "history.db"
+
+    async def _run() -> None:
+        _history = cab_history.SQLiteHistory(str(_path), commit_interval=0.2)
+        await _history.init()
+        await _history.new_historized_node(NODE, datetime.timedelta(days=1))
+        _now: datetime.datetime = datetime.datetime.utcnow()
+        for i in range(5):
+            await _history.save_node_value(
+                NODE, _value(i, _now + datetime.timedelta(seconds=i))
+            )
+        # Values are buffered until the next commit writes them together
+        assert _rows(_path) == 0
+        await asyncio.sleep(0.5)
+        assert _rows(_path) == 5
+        await _history.save_node_value(NODE, _value(5, _now))
+        await _history.stop()
+        # and the last ones are written on stopping
+        assert _rows(_path) == 6
+
+    asyncio.run(_run())
+
+
+def test_history_retention(tmp_path: pathlib.Path) -> None:
+    _path: pathlib.Path = tmp_path / "history.db"
+
+    async def _run() -> typing.List[float]:
+        _history = cab_history.SQLiteHistory(str(_path), commit_interval=60.0)
+        await _history.init()
+        await _history.new_historized_node(NODE, datetime.timedelta(hours=1))
+        _now: datetime.datetime = datetime.datetime.utcnow()
+        for i, age in enumerate((180, 90, 30, 0)):
+            await _history.save_node_value(
+                NODE, _value(i, _now - datetime.timedelta(minutes=age))
+            )
+        _values, _ = await _history.read_node_history(NODE, None, None, 0)
+        await _history.stop()
+        return [i.Value.Value for i in _values]
+
+    # Values older than the retention period are deleted on commit, the
+    # read being in descending order without a start time
+    assert asyncio.run(_run()) == [3, 2]
+
+
+def test_history_read_continuation(tmp_path: pathlib.Path) -> None:
+    _path: pathlib.Path = tmp_path / "history.db"
+    _start: datetime.datetime = datetime.datetime.utcnow() - datetime.timedelta(
+        minutes=10
+    )
+
+    async def _run() -> typing.List[typing.Tuple[typing.List[float], bool]]:
+        _history = cab_history.SQLiteHistory(
+            str(_path), max_history_data_response_size=3
+        )
+        await _history.init()
+        await _history.new_historized_node(NODE, datetime.timedelta(days=1))
+        for i in range(7):
+            await _history.save_node_value(
+                NODE, _value(i, _start + datetime.timedelta(seconds=i))
+            )
+        _pages: typing.List[typing.Tuple[typing.List[float], bool]] = []
+        _from: typing.Optional[datetime.datetime] = _start
+        while _from is not None:
+            _values, _from = await _history.read_node_history(
+                NODE, _from, datetime.datetime.utcnow(), 0
+            )
+            _pages.append(([i.Value.Value for i in _values], _from is not None))
+        # Events are not historized
+        assert await _history.read_event_history(NODE, _start, None, 0, None) == (
+            [],
+            None,
+        )
+        await _history.stop()
+        return _pages
+
+    # Each page but the last carries the time of the next value on
+    assert asyncio.run(_run()) == [
+        ([0, 1, 2], True),
+        ([3, 4, 5], True),
+        ([6], False),
+    ]
@@ -0,0 +1,120 @@
+import os
+import pathlib
+import typing
+
+import pytest
+
+import cablecar.car as cab_car
+import cablecar.clock as cab_clock
+import cablecar.power as cab_power
+import cablecar.server as cab_server
+
+# Recordings require numpy
+cab_recorder = pytest.importorskip("cablecar.recorder")
+
+
+def _record(
+    simulation: typing.Callable,
+    trace: typing.Callable,
+    path: str,
+    buffer_ticks: typing.Optional[int] = None,
+) -> typing.List[typing.Any]:
+    with simulation(record=path) as cabsim:
+        for i in range(3):
+            cabsim.add_car(distance=i * 100.0)
+        cabsim.route.winder.status = cab_power.Status.CLOCKWISE
+        cabsim.cars[0].command(cab_car.Controller.GRIP_ENGAGE)
+
+        def _command(ticks: int) -> None:
+            if ticks == 20:
+                cabsim.cars[1].command(cab_car.Controller.GRIP_ENGAGE)
+
+        _trace: typing.List[typing.Any] = trace(cabsim, _command)
+        if buffer_ticks is not None:
+            # Replaces the recorder the run would start, to flush more often
+            _physics = cabsim.server.scheduler["physics"]
+            cabsim._recorder = cab_recorder.Recorder(
+                path, cabsim.route, cabsim.cars, buffer_ticks
+            )
+            cabsim._recorder.start(_physics.period)
+            _physics.add_listener(cabsim._recorder.sample)
+        cabsim.run_simulation(50)
+    return _trace
+
+
+def _check(recording, trace: typing.List[typing.Any]) -> None:
+    assert len(recording) <= len(trace)
+    for i in range(len(recording)):
+        assert recording["position"][i].tolist() == [car[0] for car in trace[i]]
+        assert recording["speed"][i].tolist() == [car[1] for car in trace[i]]
+        assert recording["grip_state"][i].tolist() == [car[3].value for car in trace[i]]
+    assert recording["time"][: len(recording)].tolist() == [
+        float(i + 1) for i in range(len(recording))
+    ]
+
+
+def _replay(recording) -> typing.List[typing.List[typing.Tuple[float, ...]]]:
+    _replayed: typing.List[typing.List[typing.Tuple[float, ...]]] = []
+
+    async def _run() -> None:
+        async with cab_server.SimulationServer(
+            tick_rates={"physics": 1.0 / recording.period}, headless=True
+        ) as server:
+            _replay = cab_recorder.Replay(recording)
+            await _replay.setup(server)
+            server.scheduler["physics"].add_listener(
+                lambda dt: _replayed.append(
+                    [(i.position, i.speed, i.location) for i in _replay._cars]
+                )
+            )
+            await server.launch()
+
+    _loop = cab_clock.ClockEventLoop(cab_clock.SteppedClock())
+    try:
+        _loop.run_until_complete(_run())
+    finally:
+        _loop.close()
+    return _replayed
+
+
+def test_record_and_replay(
+    simulation: typing.Callable, trace: typing.Callable, tmp_path: pathlib.Path
+) -> None:
+    _path: str = str(tmp_path / "recording")
+    # Shorter than the buffer, so only written by the final flush
+    _trace: typing.List[typing.Any] = _record(simulation, trace, _path)
+    _recording = cab_recorder.Recording(_path)
+    assert len(_recording) == len(_trace)
+    assert _recording.cars == [1, 2, 3]
+    _check(_recording, _trace)
+    _replayed = _replay(_recording)
+    assert _replayed[: len(_trace)] == [
+        [(car[0], car[1], car[2]) for car in tick] for tick in _trace
+    ]
+
+
+def test_record_partial_flush(
+    simulation: typing.Callable, trace: typing.Callable, tmp_path: pathlib.Path
+) -> None:
+    _path: str = str(tmp_path / "recording")
+    # Several full buffers followed by a short final one
+    _trace: typing.List[typing.Any] = _record(simulation, trace, _path, 16)
+    assert len(_trace) % 16
+    _recording = cab_recorder.Recording(_path)
+    assert len(_recording) == len(_trace)
+    _check(_recording, _trace)
+
+
+def test_recording_interrupted(
+    simulation: typing.Callable, trace: typing.Callable, tmp_path: pathlib.Path
+) -> None:
+    _path: str = str(tmp_path / "recording")
+    _trace: typing.List[typing.Any] = _record(simulation, trace, _path)
+    # A run interrupted while flushing leaves a partial tick in one column
+    # and fewer ticks in another
+    for name, size in (("position", 8 * 3 * 40 + 5), ("winder_speed", 8 * 45)):
+        with open(os.path.join(_path, f"{name}.bin"), "r+b") as out_f:
+            out_f.truncate(size)
+    _recording = cab_recorder.Recording(_path)
+    assert len(_recording) == 40
+    _check(_recording, _trace)
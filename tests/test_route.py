@@ -0,0 +1,107 @@
+import random
+import typing
+
+import pytest
+
+import cablecar.route as cab_route
+
+STOPS: typing.Dict[str, float] = {
+    "Depot": 0.0,
+    "A": 50.0,
+    "B": 120.5,
+    "C": 200.0,
+    "D": 350.0,
+}
+
+
+def _where_am_i(
+    stops: typing.Dict[str, float], position: float
+) -> typing.Tuple[str, str]:
+    # The linear scan the index replaced, over stops ordered by distance,
+    # including its reversal of the first segment once the first stop is
+    # passed
+    _call_points: typing.Dict[float, str] = {
+        distance: name for name, distance in sorted(stops.items(), key=lambda i: i[1])
+    }
+    _out_loc: typing.List[str] = list(_call_points.values())[:3]
+    for distance, poi in _call_points.items():
+        if position > distance:
+            _out_loc[0] = _out_loc[1]
+            _out_loc[1] = poi
+    return (_out_loc[0], _out_loc[1])
+
+
+def _positions(stops: typing.Dict[str, float]) -> typing.List[float]:
+    # Every stop boundary, either side of it, and beyond both ends
+    _positions: typing.List[float] = [-10.0, max(stops.values()) + 10.0]
+    for distance in stops.values():
+        _positions += [distance - 0.001, distance, distance + 0.001]
+    return _positions
+
+
+def _route_of(stops: typing.Dict[str, float]) -> cab_route.Route:
+    _route = cab_route.Route(None)
+    _route.add_stops(stops)
+    return _route
+
+
+def test_where_am_i_matches_scan() -> None:
+    _route: cab_route.Route = _route_of(STOPS)
+    for position in _positions(STOPS):
+        assert _route.where_am_i(position) == _where_am_i(STOPS, position), position
+
+
+def test_where_am_i_reverses_first_segment() -> None:
+    _route: cab_route.Route = _route_of(STOPS)
+    assert _route.where_am_i(0.0) == ("Depot", "A")
+    assert _route.where_am_i(25.0) == ("A", "Depot")
+    assert _route.where_am_i(50.0) == ("A", "Depot")
+    assert _route.where_am_i(50.1) == ("Depot", "A")
+    assert _route.where_am_i(1000.0) == ("C", "D")
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_cursor_matches_scan(seed: int) -> None:
+    _random: random.Random = random.Random(seed)
+    _route: cab_route.Route = _route_of(STOPS)
+    _cursor: cab_route.SegmentCursor = _route.cursor()
+    # Steps of any size in either direction, landing on boundaries too
+    _moves: typing.List[float] = _positions(STOPS) + [
+        _random.uniform(-20.0, 400.0) for _ in range(200)
+    ]
+    _random.shuffle(_moves)
+    for position in _moves:
+        _location: typing.Tuple[str, str] = _cursor.location
+        _changed: bool = _cursor.advance(position)
+        assert _cursor.location == _where_am_i(STOPS, position), position
+        assert _cursor.index == _route.segment_index(position)
+        if not _changed:
+            assert _cursor.location == _location
+        _lower, _upper = _cursor.bounds
+        assert _lower < position <= _upper
+
+
+def test_index_rebuilt_on_add_stop() -> None:
+    _route: cab_route.Route = _route_of(STOPS)
+    _cursor: cab_route.SegmentCursor = _route.cursor(150.0)
+    assert _cursor.location == ("A", "B")
+    _route.add_stop("B2", 160.0)
+    _stops: typing.Dict[str, float] = {**STOPS, "B2": 160.0}
+    assert _cursor.advance(170.0)
+    assert _cursor.location == ("B", "B2") == _where_am_i(_stops, 170.0)
+    for position in _positions(_stops):
+        assert _route.where_am_i(position) == _where_am_i(_stops, position)
+    assert _route.length == 350.0
+
+
+def test_index_rebuilt_on_set_stops() -> None:
+    _route: cab_route.Route = _route_of(STOPS)
+    _cursor: cab_route.SegmentCursor = _route.cursor(150.0)
+    _stops: typing.Dict[str, float] = {"X": 0.0, "Y": 100.0, "Z": 500.0}
+    _route.set_stops(list(_stops.values()), list(_stops))
+    # The cursor notices the new index even without leaving its bounds
+    assert _cursor.advance(150.0)
+    assert _cursor.location == ("X", "Y") == _where_am_i(_stops, 150.0)
+    for position in _positions(_stops):
+        assert _route.where_am_i(position) == _where_am_i(_stops, position)
+    assert _route.length == 500.0
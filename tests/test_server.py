@@ -0,0 +1,75 @@
+import typing
+
+import pytest
+
+import cablecar.car as cab_car
+import cablecar.power as cab_power
+import cablecar.server as cab_server
+
+
+@pytest.mark.parametrize(
+    "policy, previous, value, suppressed",
+    (
+        (cab_server.PublishPolicy(), 1.0, 1.0, False),
+        (cab_server.PublishPolicy(changes_only=True), 1.0, 1.0, True),
+        (cab_server.PublishPolicy(changes_only=True), 1.0, 1.5, False),
+        (cab_server.PublishPolicy(deadband=5.0), 100.0, 104.0, True),
+        (cab_server.PublishPolicy(deadband=5.0), 100.0, 106.0, False),
+        (cab_server.PublishPolicy(deadband=5.0, percent=True), 100.0, 104.0, True),
+        (cab_server.PublishPolicy(deadband=5.0, percent=True), 10.0, 10.6, False),
+        (cab_server.PublishPolicy(deadband=5.0), False, True, False),
+    ),
+)
+def test_policy_suppresses(
+    policy: cab_server.PublishPolicy,
+    previous: typing.Any,
+    value: typing.Any,
+    suppressed: bool,
+) -> None:
+    assert policy.suppresses(previous, value) == suppressed
+
+
+def test_policy_from_config() -> None:
+    assert cab_server.PublishPolicy.from_config(
+        {"deadband": 5, "deadband_type": "percent", "max_age": 20}
+    ) == cab_server.PublishPolicy(5.0, True, max_age=20.0)
+    with pytest.raises(ValueError):
+        cab_server.PublishPolicy.from_config({"deadband_type": "relative"})
+
+
+def test_policies_publish_settled_values(simulation: typing.Callable) -> None:
+    _published: typing.List[typing.Tuple[float, float]] = []
+    with simulation() as cabsim:
+        # Policies are resolved as objects are created
+        cabsim.server._publish_policies = {
+            "car": {
+                "CURRENT_POSITION": cab_server.PublishPolicy(deadband=5.0, max_age=10.0)
+            }
+        }
+        _car: cab_car.CableCar = cabsim.add_car()
+        cabsim.route.winder.status = cab_power.Status.CLOCKWISE
+        _car.command(cab_car.Controller.GRIP_ENGAGE)
+
+        async def _observe(dt: float) -> None:
+            _ticks: int = cabsim.server.scheduler["publishing"].ticks
+            if _ticks == 120:
+                _car.command(cab_car.Controller.GRIP_RELEASE)
+                _car.command(cab_car.Controller.RAIL_BRAKE_APPLY)
+            _published.append(
+                (
+                    _car.position,
+                    await _car._objects["CURRENT_POSITION"].read_value(),
+                )
+            )
+
+        # Runs after the flush of each publishing tick
+        cabsim.server.scheduler["publishing"].add_listener(_observe)
+        cabsim.run_simulation(120)
+    _moving: typing.List[typing.Tuple[float, float]] = _published[:120]
+    # Only changes beyond the deadband are written while the car moves
+    assert all(abs(actual - shown) <= 5.0 for actual, shown in _moving)
+    assert len({shown for _, shown in _moving}) < len({i for i, _ in _moving}) / 2
+    # Once the car has stopped its final position is written, even though
+    # it is within the deadband of the last one written
+    assert _published[-1][0] == _published[-40][0]
+    assert _published[-1][1] == _published[-1][0]
@@ -0,0 +1,50 @@
+import pathlib
+import typing
+
+import pytest
+
+import cablecar.car as cab_car
+import cablecar.power as cab_power
+import cablecar.sharedstate as cab_shared
+
+
+def test_shared_state_reads(
+    simulation: typing.Callable, tmp_path: pathlib.Path
+) -> None:
+    # A memory mapped file, as a shared memory block attached from the same
+    # process would be unregistered from its resource tracker
+    _path: str = str(tmp_path / "fleet.shm")
+    with simulation(shared_state=_path, shared_state_file=True) as cabsim:
+        for i in range(3):
+            cabsim.add_car(distance=i * 100.0)
+        cabsim.route.winder.status = cab_power.Status.CLOCKWISE
+        cabsim.cars[0].command(cab_car.Controller.GRIP_ENGAGE)
+        cabsim.run_simulation(100)
+        with cab_shared.SharedState(_path, file=True) as state:
+            _snapshot: cab_shared.FleetSnapshot = state.snapshot()
+            assert len(state) == 3
+            assert _snapshot.generation % 2 == 0
+            assert _snapshot.tick == cabsim.server.scheduler["physics"].ticks
+            assert _snapshot.winder_speed == cabsim.route.winder.speed
+            assert list(_snapshot.cars["number"]) == [1, 2, 3]
+            assert list(_snapshot.cars["position"]) == [i.position for i in cabsim.cars]
+            assert list(_snapshot.cars["grip_state"]) == [
+                i.grip_state.value for i in cabsim.cars
+            ]
+            # Columns are also readable in place
+            assert state["position"][0] == cabsim.cars[0].position > 0
+            # Readers retry while a tick is being written rather than return
+            # a partially written state
+            _writer: cab_shared.SharedStateWriter = cabsim._shared_state_writer
+            _writer._generation += 1
+            _writer._write_generation()
+            assert state.generation % 2 == 1
+            with pytest.raises(TimeoutError):
+                state.snapshot(retries=10)
+            _writer._generation += 1
+            _writer._write_generation()
+            assert state.snapshot() == _snapshot._replace(
+                generation=_snapshot.generation + 2
+            )
+            _writer.sample(1.0)
+            assert state.snapshot().tick == _snapshot.tick + 1
@@ -0,0 +1,32 @@
+import typing
+
+import click.testing
+import pytest
+
+import cablecar.scheduler as cab_sched
+import cablecar.simulation as cab_sim
+
+
+def test_tick_rates(simulation: typing.Callable) -> None:
+    with simulation(tick_rates={"physics": 4.0}) as cabsim:
+        cabsim.add_car()
+        cabsim.run_simulation(10)
+        assert cabsim.server.scheduler["physics"].period == 0.25
+        assert cabsim.server.scheduler["physics"].ticks == 40
+        # Groups which are not given keep their default rate
+        assert cabsim.server.scheduler["publishing"].period == 0.5
+
+
+def test_parse_tick_rate() -> None:
+    assert cab_sched.parse_tick_rate("physics=10") == ("physics", 10.0)
+    for value in ("physics", "physics=0", "physics=fast", "drawing=1"):
+        with pytest.raises(ValueError):
+            cab_sched.parse_tick_rate(value)
+
+
+def test_tick_rate_option() -> None:
+    _result: click.testing.Result = click.testing.CliRunner().invoke(
+        cab_sim.simulate, ["--tick-rate", "drawing=1"]
+    )
+    assert _result.exit_code == 2
+    assert "--tick-rate" in _result.output
@@ -0,0 +1,51 @@
+import pathlib
+import typing
+
+import cablecar.car as cab_car
+import cablecar.power as cab_power
+import cablecar.simulation as cab_sim
+
+# Tick of the full run on which the rail brake of the first car is applied
+BRAKE_TICK: int = 150
+
+
+def _start(cabsim: cab_sim.Simulation) -> None:
+    for i in range(6):
+        cabsim.add_car(distance=i * 30.0, acceleration=0.1 + i * 0.01)
+    cabsim.route.winder.status = cab_power.Status.CLOCKWISE
+    for car in cabsim.cars[::2]:
+        car.command(cab_car.Controller.GRIP_ENGAGE)
+    cabsim.cars[1].ring_bell(5)
+
+
+def test_snapshot_round_trip(
+    simulation: typing.Callable, trace: typing.Callable, tmp_path: pathlib.Path
+) -> None:
+    _path: str = str(tmp_path / "cablecar.snap")
+
+    def _command(cabsim: cab_sim.Simulation) -> typing.Callable[[int], None]:
+        def _brake(ticks: int) -> None:
+            if ticks == BRAKE_TICK:
+                cabsim.cars[0].command(cab_car.Controller.RAIL_BRAKE_APPLY)
+
+        return _brake
+
+    with simulation() as cabsim:
+        _start(cabsim)
+        _full: typing.List[typing.Any] = trace(cabsim, _command(cabsim))
+        cabsim.run_simulation(300)
+    with simulation() as cabsim:
+        _start(cabsim)
+        _resumed: typing.List[typing.Any] = trace(cabsim, _command(cabsim))
+        cabsim.run_simulation(100.2)
+        assert cabsim.server.scheduler["physics"].ticks == 100
+        cabsim.snapshot(_path)
+        _states: typing.List[cab_car.CarState] = [i.state() for i in cabsim.cars]
+    with simulation() as cabsim:
+        cabsim.restore(_path)
+        assert [i.state() for i in cabsim.cars] == _states
+        # Tick counts restart from zero in a restored simulation
+        _restored: typing.List[typing.Any] = trace(cabsim, _command(cabsim), 100)
+        cabsim.run_simulation(200)
+    # The restored run carries on exactly where the saved one stopped
+    assert _resumed + _restored == _full